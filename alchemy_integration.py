@@ -3,33 +3,203 @@ Alchemy API Integration for Enhanced Ethereum Data
 Provides faster, more reliable Ethereum token data with additional metrics
 """
 
-import requests
+import asyncio
+import async_http
+import http_client
+from rate_limiter import ALCHEMY_CU_COSTS
 import os
+import threading
 import time
-from typing import Dict, List, Optional
+from collections import Counter, OrderedDict, deque
+from jsonrpc_batch import RESULT_CAP, as_call, call_many, call_many_async, run_steps, run_steps_async
+from typing import Dict, Generator, List, Optional
 from datetime import datetime, timedelta
 
+ALCHEMY_BATCH_LIMIT = int(os.getenv("ALCHEMY_BATCH_LIMIT", "50"))  # JSON-RPC calls per batched POST
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"  # Transfer event
+BLOCK_TIME = 12  # seconds per mainnet block
+ACTIVITY_WINDOW_BLOCKS = 3600 // BLOCK_TIME  # rolling activity counters cover the last hour
+MAX_LOG_RANGE = int(os.getenv("ALCHEMY_MAX_LOG_RANGE", "500"))  # blocks per eth_getLogs call
+MAX_TRACKED_TOKENS = int(os.getenv("ALCHEMY_TRACKED_TOKENS", "5000"))  # least recently scanned are forgotten
+
+def _batch_cost(chunk: List[Dict]) -> int:
+    """Compute units of a batch: the sum of its calls' costs"""
+    return sum(ALCHEMY_CU_COSTS.get(payload["method"], 10) for payload in chunk)
+
+class _TokenActivity:
+    __slots__ = ("cursor", "transfers", "senders")
+
+    def __init__(self):
+        self.cursor: Optional[int] = None  # last block whose Transfer logs are counted
+        self.transfers = deque()           # (block, sender) inside the activity window, oldest first
+        self.senders = Counter()           # sender -> transfers inside the window
+
+class TransferLogScanner:
+    """
+    Incremental Transfer-log scanner: a per-token block cursor so each scan fetches only
+    blocks it has not seen, with rolling transfers / unique-sender counters over the last
+    hour. The scan itself is a generator of JSON-RPC call batches, driven by the sync and
+    async clients alike.
+    """
+
+    def __init__(self, max_tokens: int = MAX_TRACKED_TOKENS):
+        self.max_tokens = max_tokens
+        self._tokens: "OrderedDict[str, _TokenActivity]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'scans': 0, 'log_calls': 0, 'logs': 0, 'splits': 0, 'failed_ranges': 0}
+
+    def scan_steps(self, token_addresses: List[str]) -> Generator[List[tuple], tuple, None]:
+        """Yields lists of (method, params) calls and is sent back (results, errors) for each"""
+        tokens = [token.lower() for token in dict.fromkeys(token_addresses)]
+        if not tokens:
+            return
+        self.stats['scans'] += 1
+        results, _ = yield [("eth_blockNumber", [])]
+        if not results[0]:
+            return
+        latest = int(results[0], 16)
+        window_start = latest - ACTIVITY_WINDOW_BLOCKS + 1
+
+        # Only the blocks after each token's cursor, and never older than the window
+        bases, pending = {}, []
+        with self._lock:
+            for token in tokens:
+                state = self._tokens.get(token)
+                bases[token] = state.cursor if state else None
+        for token, cursor in bases.items():
+            start = window_start if cursor is None else max(cursor + 1, window_start)
+            for low in range(start, latest + 1, MAX_LOG_RANGE):
+                pending.append((token, low, min(latest, low + MAX_LOG_RANGE - 1)))
+
+        fetched = {token: [] for token in tokens}
+        while pending:
+            results, errors = yield [as_call(AlchemyClient._transfer_logs_payload(token, low, high))
+                                     for token, low, high in pending]
+            self.stats['log_calls'] += len(pending)
+            retry = []
+            for (token, low, high), logs, error in zip(pending, results, errors):
+                if logs is not None:
+                    fetched[token].append((low, high, logs))
+                elif high > low and error and RESULT_CAP.search(str(error.get('message', ''))):
+                    middle = (low + high) // 2
+                    retry += [(token, low, middle), (token, middle + 1, high)]
+                    self.stats['splits'] += 1
+                else:
+                    self.stats['failed_ranges'] += 1
+            pending = retry
+
+        for token, ranges in fetched.items():
+            cursor = bases[token]
+            self._apply(token, cursor, window_start if cursor is None else max(cursor + 1, window_start),
+                        sorted(ranges, key=lambda r: r[0]), window_start)
+
+    def _apply(self, token: str, base: Optional[int], start: int, ranges: List[tuple], window_start: int):
+        """Count the contiguous fetched ranges from start and advance the token's cursor past them"""
+        with self._lock:
+            state = self._tokens.get(token)
+            if (state.cursor if state else None) != base:
+                return  # a concurrent scan already counted these blocks
+            if state is None:
+                state = self._tokens[token] = _TokenActivity()
+            expected = start
+            for low, high, logs in ranges:
+                if low != expected:
+                    break  # a failed range: stop before it so it is fetched again next scan
+                for log in logs:
+                    topics = log.get('topics') or []
+                    if log.get('removed') or len(topics) < 2:
+                        continue
+                    sender = "0x" + topics[1][-40:].lower()
+                    state.transfers.append((int(log['blockNumber'], 16), sender))
+                    state.senders[sender] += 1
+                self.stats['logs'] += len(logs)
+                expected = high + 1
+            if expected > start:
+                state.cursor = expected - 1
+            while state.transfers and state.transfers[0][0] < window_start:
+                _, sender = state.transfers.popleft()
+                state.senders[sender] -= 1
+                if not state.senders[sender]:
+                    del state.senders[sender]
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+
+    def activity(self, token_address: str) -> Optional[Dict]:
+        """Rolling counters for a scanned token, None if it was never scanned"""
+        with self._lock:
+            state = self._tokens.get(token_address.lower())
+            if state is None or state.cursor is None:
+                return None
+            return {
+                'transfers_per_hour': len(state.transfers),
+                'unique_senders': len(state.senders),
+                'cursor': state.cursor,
+            }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            tracked = len(self._tokens)
+        return dict(self.stats, tracked_tokens=tracked, window_blocks=ACTIVITY_WINDOW_BLOCKS)
+
 class AlchemyClient:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("ALCHEMY_API_KEY")
         self.base_url = f"https://eth-mainnet.g.alchemy.com/v2/{self.api_key}"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'AlphaSniper/1.0'
-        })
+        self.transfers = TransferLogScanner()
+    
+    def _post(self, payload: Dict):
+        """Send one JSON-RPC request, charged at the method's compute-unit cost"""
+        cost = ALCHEMY_CU_COSTS.get(payload["method"], 10)
+        return http_client.post(self.base_url, json=payload, timeout=10, cost=cost)
+    
+    def _post_batch(self, chunk: List[Dict]):
+        """Send one JSON-RPC batch array, charged at the summed compute-unit cost"""
+        return http_client.post(self.base_url, json=chunk, timeout=10, cost=_batch_cost(chunk))
+    
+    @staticmethod
+    def _metadata_payload(token_address: str) -> Dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "alchemy_getTokenMetadata",
+            "params": [token_address]
+        }
+    
+    @staticmethod
+    def _transfer_logs_payload(token_address: str, from_block: int, to_block: int) -> Dict:
+        # Logs for Transfer events in an inclusive block range
+        return {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "eth_getLogs",
+            "params": [{
+                "fromBlock": hex(from_block),
+                "toBlock": hex(to_block),
+                "address": token_address,
+                "topics": [TRANSFER_TOPIC]
+            }]
+        }
+    
+    def get_block_number(self) -> Optional[int]:
+        """Latest mainnet block number"""
+        try:
+            response = self._post({"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []})
+            if response.status_code == 200:
+                data = response.json()
+                if data.get('result'):
+                    return int(data['result'], 16)
+        except Exception as e:
+            print(f"[alchemy] Error getting block number: {e}")
+        return None
     
     def get_token_metadata(self, token_address: str) -> Optional[Dict]:
         """Get ERC-20 token metadata from Alchemy"""
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "alchemy_getTokenMetadata",
-                "params": [token_address]
-            }
+            payload = self._metadata_payload(token_address)
             
-            response = self.session.post(self.base_url, json=payload, timeout=10)
+            response = self._post(payload)
             if response.status_code == 200:
                 data = response.json()
                 if 'result' in data and data['result']:
@@ -40,6 +210,13 @@ class AlchemyClient:
         
         return None
     
+    def get_token_metadata_many(self, token_addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        """ERC-20 metadata for many tokens, ALCHEMY_BATCH_LIMIT calls per POST"""
+        tokens = list(dict.fromkeys(token_addresses))
+        results = call_many(self._post_batch, [as_call(self._metadata_payload(token)) for token in tokens],
+                            ALCHEMY_BATCH_LIMIT, "alchemy-metadata")
+        return {token: result or None for token, result in zip(tokens, results)}
+    
     def get_token_balances(self, token_address: str, page_key: str = None) -> Optional[Dict]:
         """Get token holder balances using Alchemy"""
         try:
@@ -58,7 +235,7 @@ class AlchemyClient:
             if page_key:
                 payload["params"][1]["pageKey"] = page_key
             
-            response = self.session.post(self.base_url, json=payload, timeout=10)
+            response = self._post(payload)
             if response.status_code == 200:
                 data = response.json()
                 if 'result' in data:
@@ -70,22 +247,15 @@ class AlchemyClient:
         return None
     
     def get_transaction_receipts(self, token_address: str, from_block: str = "latest") -> Optional[List]:
-        """Get recent transactions for the token"""
+        """Transfer logs of the token from from_block (hex) to the latest block; by default the last hour"""
         try:
-            # Get logs for Transfer events
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "eth_getLogs",
-                "params": [{
-                    "fromBlock": hex(int(from_block, 16) - 1000) if from_block != "latest" else "0x" + hex(int(time.time()) - 3600)[2:],
-                    "toBlock": "latest",
-                    "address": token_address,
-                    "topics": ["0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"]  # Transfer event
-                }]
-            }
+            latest = self.get_block_number()
+            if latest is None:
+                return None
+            start = latest - ACTIVITY_WINDOW_BLOCKS + 1 if from_block == "latest" else int(from_block, 16)
+            payload = self._transfer_logs_payload(token_address, start, latest)
             
-            response = self.session.post(self.base_url, json=payload, timeout=10)
+            response = self._post(payload)
             if response.status_code == 200:
                 data = response.json()
                 if 'result' in data:
@@ -96,8 +266,28 @@ class AlchemyClient:
         
         return None
     
+    def scan_transfers(self, token_addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        """Fetch the tokens' Transfer logs since their cursors (batched) and return their rolling activity"""
+        tokens = list(dict.fromkeys(token_addresses))
+        run_steps(self.transfers.scan_steps(tokens),
+                   lambda calls: call_many(self._post_batch, calls, ALCHEMY_BATCH_LIMIT, "alchemy-logs",
+                                           return_errors=True))
+        return {token: self.transfers.activity(token) for token in tokens}
+    
     def enhanced_token_analysis(self, token_address: str) -> Dict:
         """Get enhanced token analysis combining multiple Alchemy endpoints"""
+        return self._analysis(token_address, self.get_token_metadata(token_address),
+                              self.scan_transfers([token_address])[token_address])
+    
+    def enhanced_token_analysis_many(self, token_addresses: List[str]) -> Dict[str, Dict]:
+        """enhanced_token_analysis for many tokens, with their metadata and log calls batched"""
+        metadata = self.get_token_metadata_many(token_addresses)
+        activity = self.scan_transfers(token_addresses)
+        return {token: self._analysis(token, metadata[token], activity[token]) for token in metadata}
+    
+    @staticmethod
+    def _analysis(token_address: str, metadata: Optional[Dict], activity: Optional[Dict]) -> Dict:
+        """Combine the metadata and rolling Transfer activity into one analysis (shared by the async client)"""
         result = {
             'token_address': token_address,
             'metadata': None,
@@ -110,8 +300,7 @@ class AlchemyClient:
             'risk_flags': []
         }
         
-        # Get basic metadata
-        metadata = self.get_token_metadata(token_address)
+        # Basic metadata
         if metadata:
             result['metadata'] = metadata
             result['name'] = metadata.get('name', 'Unknown')
@@ -122,22 +311,78 @@ class AlchemyClient:
             # Basic verification check
             result['verified'] = len(result['name']) > 0 and len(result['symbol']) > 0
         
-        # Get transaction activity
-        transactions = self.get_transaction_receipts(token_address)
-        if transactions:
-            result['transaction_count'] = len(transactions)
-            result['activity_score'] = min(len(transactions) / 100.0, 5.0)  # Scale 0-5
+        # Transfer activity over the last hour, from the incremental log scanner
+        if activity:
+            transfers = activity['transfers_per_hour']
+            result['transaction_count'] = transfers
+            result['unique_senders'] = activity['unique_senders']
+            result['activity_score'] = min(transfers / 100.0, 5.0)  # Scale 0-5
             
             # Risk analysis based on transaction patterns
-            if len(transactions) < 10:
+            if transfers < 10:
                 result['risk_flags'].append('LOW_ACTIVITY')
             if result['total_supply'] == 0:
                 result['risk_flags'].append('ZERO_SUPPLY')
         
         return result
 
-# Global Alchemy client
+class AsyncAlchemyClient:
+    """
+    Awaitable Alchemy client for the bot's event loop, on the pooled aiohttp session.
+    Request payloads, compute-unit costs and the analysis are shared with the sync AlchemyClient.
+    """
+
+    def __init__(self, client: AlchemyClient):
+        self.client = client
+    
+    async def _rpc(self, payload: Dict, what: str, token_address: str, require_value: bool) -> Optional:
+        try:
+            cost = ALCHEMY_CU_COSTS.get(payload["method"], 10)
+            response = await async_http.post(self.client.base_url, json=payload, timeout=10, cost=cost)
+            if response.status_code == 200:
+                data = response.json()
+                if 'result' in data and (data['result'] or not require_value):
+                    return data['result']
+        except Exception as e:
+            print(f"[alchemy] Error getting {what} for {token_address}: {e}")
+        return None
+    
+    async def _post_batch(self, chunk: List[Dict]):
+        return await async_http.post(self.client.base_url, json=chunk, timeout=10, cost=_batch_cost(chunk))
+    
+    async def get_token_metadata(self, token_address: str) -> Optional[Dict]:
+        return await self._rpc(AlchemyClient._metadata_payload(token_address), "token metadata", token_address, True)
+    
+    async def scan_transfers(self, token_addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        """scan_transfers on the shared scanner, so cursors advance whichever client fetched"""
+        tokens = list(dict.fromkeys(token_addresses))
+        scanner = self.client.transfers
+        await run_steps_async(scanner.scan_steps(tokens),
+                               lambda calls: call_many_async(self._post_batch, calls, ALCHEMY_BATCH_LIMIT,
+                                                             "alchemy-logs", return_errors=True))
+        return {token: scanner.activity(token) for token in tokens}
+    
+    async def enhanced_token_analysis(self, token_address: str) -> Dict:
+        """Metadata and new Transfer logs fetched concurrently, then the same analysis as the sync client"""
+        metadata, activity = await asyncio.gather(self.get_token_metadata(token_address),
+                                                  self.scan_transfers([token_address]))
+        return AlchemyClient._analysis(token_address, metadata, activity[token_address])
+    
+    async def get_token_metadata_many(self, token_addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        tokens = list(dict.fromkeys(token_addresses))
+        results = await call_many_async(self._post_batch,
+                                        [as_call(AlchemyClient._metadata_payload(token)) for token in tokens],
+                                        ALCHEMY_BATCH_LIMIT, "alchemy-metadata")
+        return {token: result or None for token, result in zip(tokens, results)}
+    
+    async def enhanced_token_analysis_many(self, token_addresses: List[str]) -> Dict[str, Dict]:
+        metadata, activity = await asyncio.gather(self.get_token_metadata_many(token_addresses),
+                                                  self.scan_transfers(token_addresses))
+        return {token: AlchemyClient._analysis(token, metadata[token], activity[token]) for token in metadata}
+
+# Global Alchemy clients: sync for Flask and worker threads, async for the bot loop
 alchemy_client = AlchemyClient()
+async_alchemy_client = AsyncAlchemyClient(alchemy_client)
 
 def get_enhanced_ethereum_data(token_address: str) -> Dict:
     """Get enhanced Ethereum token data using Alchemy API"""
@@ -147,6 +392,22 @@ def get_enhanced_ethereum_data(token_address: str) -> Dict:
     
     return alchemy_client.enhanced_token_analysis(token_address)
 
+async def get_enhanced_ethereum_data_async(token_address: str) -> Dict:
+    """Awaitable get_enhanced_ethereum_data for code on the event loop"""
+    if not alchemy_client.api_key:
+        print("[alchemy] No API key configured, using fallback data")
+        return {}
+    
+    return await async_alchemy_client.enhanced_token_analysis(token_address)
+
+async def get_enhanced_ethereum_data_many_async(token_addresses: List[str]) -> Dict[str, Dict]:
+    """get_enhanced_ethereum_data_async for many tokens in one batched round-trip, keyed by token"""
+    if not alchemy_client.api_key:
+        print("[alchemy] No API key configured, using fallback data")
+        return {}
+    
+    return await async_alchemy_client.enhanced_token_analysis_many(token_addresses)
+
 def is_alchemy_available() -> bool:
     """Check if Alchemy API is available and configured"""
     return alchemy_client.api_key is not None
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Pre-post Alert Enrichment
+Helius / Alchemy analysis starts for every hit as soon as it arrives; hits of the same chain
+arriving within ENRICH_BATCH_WINDOW share one batched JSON-RPC round-trip. The result is
+folded into the alert itself as an embed. Alerts wait at most ENRICH_DEADLINE for it;
+late results are attached to the posted alert afterwards.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+import discord
+
+ENRICH_DEADLINE = float(os.getenv("ENRICH_DEADLINE", "4"))  # seconds an alert waits for its enrichment
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "6"))  # batched analyses in flight at once
+ENRICH_BATCH_WINDOW = float(os.getenv("ENRICH_BATCH_WINDOW", "0.25"))  # seconds hits are collected per batch
+# Holder pages (1000 accounts each) read per Solana token: a few rounds fit the deadline, where a
+# full scan (HELIUS_MAX_HOLDER_PAGES, for !analyze) could page for a minute holding a slot
+ENRICH_HOLDER_PAGES = int(os.getenv("ENRICH_HOLDER_PAGES", "3"))
+
+_slots: Optional[asyncio.Semaphore] = None
+_pending: Dict[str, Dict[str, asyncio.Future]] = {}  # chain -> token -> future of the batch being collected
+
+# Flags worth a visible warning, per chain (the old "Risk Analysis" follow-up triggers)
+CRITICAL_FLAGS = {
+    'solana': {'HIGH_WHALE_CONCENTRATION', 'LOW_HOLDER_COUNT'},
+    'ethereum': {'LOW_ACTIVITY', 'ZERO_SUPPLY'},
+}
+
+_stats = {'started': 0, 'batches': 0, 'completed': 0, 'in_time': 0, 'late': 0, 'failed': 0, 'empty': 0,
+          'total_seconds': 0.0}
+
+async def _analyze(chain: str, tokens: List[str]) -> Dict[str, Dict]:
+    if chain == 'solana':
+        from helius_integration import get_enhanced_solana_data_many_async
+        return await get_enhanced_solana_data_many_async(tokens, max_pages=ENRICH_HOLDER_PAGES)
+    from alchemy_integration import get_enhanced_ethereum_data_many_async
+    return await get_enhanced_ethereum_data_many_async(tokens)
+
+async def _timed_analyze(chain: str, batch: Dict[str, asyncio.Future]):
+    """Analyze one collected batch and resolve each token's future"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(ENRICH_CONCURRENCY)
+    try:
+        async with _slots:
+            started = time.monotonic()
+            try:
+                results = await _analyze(chain, list(batch))
+            except Exception as e:
+                results, error = None, e
+            finally:
+                _stats['batches'] += 1
+                _stats['completed'] += len(batch)
+                _stats['total_seconds'] += time.monotonic() - started
+        for token, future in batch.items():
+            if future.done():
+                continue
+            if results is None:
+                future.set_exception(error)
+            else:
+                future.set_result(results.get(token) or {})
+    finally:
+        # Cancelled (bot shutdown): never leave an alert waiting on late_result forever
+        for future in batch.values():
+            if not future.done():
+                future.cancel()
+
+def _flush(chain: str):
+    batch = _pending.pop(chain, None)
+    if batch:
+        asyncio.ensure_future(_timed_analyze(chain, batch))
+
+def start_enrichment(hit) -> Optional[asyncio.Future]:
+    """
+    Queue the hit's chain analysis into the batch being collected for its chain (sent
+    ENRICH_BATCH_WINDOW after the batch's first hit); None for unsupported chains
+    """
+    chain = hit.chain.lower()
+    if chain not in CRITICAL_FLAGS:
+        return None
+    _stats['started'] += 1
+    loop = asyncio.get_running_loop()
+    batch = _pending.get(chain)
+    if batch is None:
+        batch = _pending[chain] = {}
+        loop.call_later(ENRICH_BATCH_WINDOW, _flush, chain)
+    future = batch.get(hit.token)
+    if future is None:
+        future = batch[hit.token] = loop.create_future()
+    return future
+
+async def within_deadline(future: Optional[asyncio.Future], started: float) -> Optional[Dict]:
+    """The enrichment result if it finishes by the deadline (counted from started), else None"""
+    if future is None:
+        return None
+    remaining = ENRICH_DEADLINE - (time.monotonic() - started)
+    done, _ = await asyncio.wait({future}, timeout=max(0.0, remaining))
+    if not done:
+        _stats['late'] += 1
+        return None
+    _stats['in_time'] += 1
+    return _result(future)
+
+def _result(future: asyncio.Future) -> Optional[Dict]:
+    if future.cancelled():
+        _stats['failed'] += 1
+        return None
+    try:
+        data = future.result()
+    except Exception as e:
+        _stats['failed'] += 1
+        print(f"[enrichment] Error getting enhanced data: {e}")
+        return None
+    if not data:
+        _stats['empty'] += 1
+    return data or None
+
+async def late_result(future: asyncio.Future) -> Optional[Dict]:
+    """Wait for an enrichment that missed the deadline"""
+    await asyncio.wait({future})
+    return _result(future)
+
+def _fields(chain: str, data: Dict) -> List[tuple]:
+    """(name, value) embed fields, mirroring the old Enhanced Analysis follow-ups"""
+    fields = []
+    if chain == 'solana':
+        holder_count = data.get('holder_count') or 0
+        if holder_count > 0:
+            partial = "" if data.get('holders_complete', True) else "+"
+            fields.append(("👥 Holders", f"{holder_count:,}{partial}"))
+            fields.append(("🐋 Whale concentration", f"{data.get('whale_concentration', 0):.1f}%"))
+    else:
+        tx_count = data.get('transaction_count') or 0
+        if tx_count > 0:
+            fields.append(("🔁 Transfers (1h)", f"{tx_count}"))
+            fields.append(("👤 Unique senders", f"{data.get('unique_senders', 0)}"))
+            fields.append(("⚗️ Activity score", f"{data.get('activity_score', 0):.1f}/5.0"))
+    return fields
+
+def enrichment_embed(hit, data: Optional[Dict]) -> Optional[discord.Embed]:
+    """Embed with the hit's Helius / Alchemy analysis, or None when there is nothing to show"""
+    if not data:
+        return None
+    chain = hit.chain.lower()
+    risk_flags = data.get('risk_flags') or []
+    fields = _fields(chain, data)
+    if not fields and not risk_flags:
+        return None
+    critical = any(flag in CRITICAL_FLAGS[chain] for flag in risk_flags)
+    provider = "Helius" if chain == 'solana' else "Alchemy"
+    embed = discord.Embed(title=f"🔍 {provider} analysis for {hit.ticker}",
+                          colour=discord.Colour.red() if critical else discord.Colour.blue())
+    for name, value in fields:
+        embed.add_field(name=name, value=value, inline=True)
+    if risk_flags:
+        label = "⚠️ Risk warning" if critical else "Risk flags"
+        embed.add_field(name=label, value=', '.join(risk_flags).replace('_', ' ').lower(), inline=False)
+    return embed
+
+def get_stats() -> Dict:
+    stats = dict(_stats)
+    finished = stats['in_time'] + stats['late']
+    stats['deadline'] = ENRICH_DEADLINE
+    stats['in_time_rate'] = round(stats['in_time'] / finished, 3) if finished else 0
+    stats['batch_window'] = ENRICH_BATCH_WINDOW
+    stats['holder_pages'] = ENRICH_HOLDER_PAGES
+    stats['avg_batch_size'] = round(stats['completed'] / stats['batches'], 1) if stats['batches'] else 0
+    stats['avg_seconds'] = round(stats.pop('total_seconds') / stats['batches'], 2) if stats['batches'] else 0
+    return stats
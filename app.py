@@ -54,46 +54,55 @@ logging.info("Discord bot thread started")
 from routes import *
 
 # Whale tracking webhook endpoints
-from whale_tracker import whale_tracker, is_tracked_whale
+from whale_tracker import eth_whales, sol_whales
 from flask import request, jsonify
 import json
-import requests
+import dex_lookup
 import time
+from webhook_queue import webhook_queue, first_delivery
 
-# ETH Runner Detection Helper Functions
-MAX_MC = 500_000
-MAX_AGE_MIN = 24*60
-MIN_LP = 15_000
+import scoring_rules
+
+# ETH Runner Detection Helper Functions (limits in scoring_rules 'whale_runner')
+
+def _pair_meta(pairs):
+    """Runner metadata from a token's DexScreener pairs (the newest pair), None without pairs"""
+    if not pairs: 
+        return None
+    p = sorted(pairs, key=lambda x: x.get("pairCreatedAt") or 0, reverse=True)[0]
+    fdv = float(p.get("fdv") or 0)
+    lp = float((p.get("liquidity") or {}).get("usd") or 0)
+    created = p.get("pairCreatedAt") or int(time.time()*1000)
+    age_min = int((time.time()*1000 - created)/60000)
+    base = p.get("baseToken") or {}
+    return {
+        "fdv": fdv, 
+        "lp": lp, 
+        "age_min": age_min,
+        "symbol": base.get("symbol") or "?", 
+        "name": base.get("name") or "?",
+        "chart": p.get("url") or p.get("pairUrl") or "", 
+        "chain": p.get("chainId") or ""
+    }
 
 def ds_info_by_token(addr: str):
     """Get DexScreener info for token analysis - works for SOL & EVM tokens"""
     try:
-        # Works for SOL & EVM tokens; picks newest pair
-        r = requests.get(f"https://api.dexscreener.com/latest/dex/tokens/{addr}", timeout=12)
-        if r.status_code != 200: 
-            return None
-        pairs = r.json().get("pairs") or []
-        if not pairs: 
-            return None
-        p = sorted(pairs, key=lambda x: x.get("pairCreatedAt") or 0, reverse=True)[0]
-        fdv = float(p.get("fdv") or 0)
-        lp = float((p.get("liquidity") or {}).get("usd") or 0)
-        created = p.get("pairCreatedAt") or int(time.time()*1000)
-        age_min = int((time.time()*1000 - created)/60000)
-        base = p.get("baseToken") or {}
-        return {
-            "fdv": fdv, 
-            "lp": lp, 
-            "age_min": age_min,
-            "symbol": base.get("symbol") or "?", 
-            "name": base.get("name") or "?",
-            "chart": p.get("url") or p.get("pairUrl") or "", 
-            "chain": p.get("chainId") or ""
-        }
+        # Works for SOL & EVM tokens; picks newest pair (batched with concurrent lookups)
+        return _pair_meta(dex_lookup.get_token_pairs(addr))
     except Exception as e:
         print(f"[ds_info_by_token] Error fetching token data: {e}")
         return None
 
+def ds_info_many(addrs) -> dict:
+    """ds_info_by_token for many tokens: one batched lookup, each distinct token fetched and parsed once"""
+    try:
+        found = dex_lookup.get_token_pairs_many(addrs)
+    except Exception as e:
+        print(f"[ds_info_many] Error fetching token data: {e}")
+        return {}
+    return {addr: _pair_meta(pairs) for addr, pairs in found.items()}
+
 # Keep backward compatibility alias
 def ds_info(erc20_addr: str):
     """Backward compatibility wrapper"""
@@ -103,171 +112,247 @@ def is_runner(meta):
     """Check if token qualifies as a runner based on criteria"""
     if not meta: 
         return False
-    if meta["age_min"] > MAX_AGE_MIN: 
+    limits = scoring_rules.current().whale_runner
+    if meta["age_min"] > limits["max_age_min"]: 
         return False
-    if meta["fdv"] and meta["fdv"] > MAX_MC: 
+    if meta["fdv"] and meta["fdv"] > limits["max_mc"]: 
         return False
-    if meta["lp"] < MIN_LP: 
+    if meta["lp"] < limits["min_lp"]: 
         return False
     return True
 
-# Solana whale tracking helpers
-import json
-WHALES_SOL_FILE = "whales_sol.json"
+def _activity_token_addr(a):
+    """Token contract address from the various Alchemy activity shapes"""
+    return (
+        a.get("rawContract", {}).get("address") 
+        or (a.get("erc20Metadata") or {}).get("contractAddress")
+        or (a.get("log", {}).get("address") if "log" in a else None)
+    )
+
+def _activity_tx(a):
+    return a.get("hash") or a.get("transactionHash") or ""
+
+def _activity_index(a):
+    """Position of an activity within its transaction: the log index for token transfers"""
+    log_index = (a.get("log") or {}).get("logIndex")
+    if log_index is not None:
+        return log_index
+    # External / internal ETH transfers carry no log; identify them by their contents
+    return f"{a.get('category') or 'external'}:{a.get('fromAddress')}:{a.get('toAddress')}:{a.get('value')}"
+
+def _enqueue_webhook(provider: str, payload):
+    """Acknowledge a delivery as soon as it is queued; a full queue asks the provider to retry later"""
+    if not webhook_queue.submit(provider, payload):
+        return jsonify({"ok": False, "error": "busy"}), 503, {"Retry-After": "30"}
+    return jsonify({"ok": True, "queued": True}), 200
+
+def process_alchemy_payload(payload: dict):
+    """Turn one Alchemy address-activity delivery into whale alerts (runs on a webhook worker)"""
+    # Support multiple shapes Alchemy may send
+    event = payload.get("event") or {}
+    activity = (
+        event.get("activity")
+        or payload.get("activity")
+        or payload.get("events")
+        or []
+    )
+
+    # Tracked whales (shared in-memory registry)
+    watched = eth_whales
+    messages = []
+
+    # Handle both single activity and list of activities
+    activity_list = activity if isinstance(activity, list) else ([activity] if activity else [])
+    # Skip activities already processed from an earlier (re)delivery, before any lookups
+    activity_list = [a for a in activity_list if a and first_delivery("alchemy", _activity_tx(a), _activity_index(a))]
+
+    # Resolve every whale-bought token with one batched DexScreener lookup up front
+    buy_tokens = []
+    for a in activity_list:
+        to_addr = ((a or {}).get("toAddress") or "").lower()
+        if to_addr in watched:
+            buy_tokens.append(_activity_token_addr(a))
+    dex_lookup.get_token_pairs_many(t for t in buy_tokens if t)
+
+    for a in activity_list:
+        if not a:  # Skip empty activities
+            continue
+
+        from_addr = (a.get("fromAddress") or "").lower()
+        to_addr = (a.get("toAddress") or "").lower()
+
+        # Token/amount extraction with better fallbacks
+        asset = (
+            a.get("asset") 
+            or (a.get("erc20Metadata") or {}).get("symbol")
+            or (a.get("erc20Metadata") or {}).get("name")
+            or "ETH"
+        )
 
-def _load_sol():
-    try: 
-        return set(json.load(open(WHALES_SOL_FILE)))
-    except: 
-        return set()
+        # Extract value from various possible locations
+        value = (
+            a.get("value") 
+            or a.get("amount")
+            or (a.get("rawContract") or {}).get("value")
+            or (a.get("rawContract") or {}).get("rawValue")
+            or ""
+        )
 
-def _save_sol(s):
-    try: 
-        json.dump(list(s), open(WHALES_SOL_FILE, "w"))
-    except: 
-        pass
+        # Convert hex values to readable format if needed
+        if isinstance(value, str) and value.startswith("0x"):
+            try:
+                value = str(int(value, 16))
+            except:
+                pass
 
-@app.route('/alchemy', methods=['GET', 'POST'])
-def alchemy_webhook():
-    """Webhook endpoint for Alchemy ETH whale tracking with health check"""
-    # Health check for browser/Alchemy "Test URL"
-    if request.method == "GET":
-        return "OK (alchemy)", 200
+        tx = a.get("hash") or a.get("transactionHash") or ""
 
-    try:
-        payload = request.get_json(force=True, silent=True) or {}
-        # Log small snippet for debugging
-        print(f"[alchemy] payload: {json.dumps(payload)[:600]}")
-
-        # Support multiple shapes Alchemy may send
-        event = payload.get("event") or {}
-        activity = (
-            event.get("activity")
-            or payload.get("activity")
-            or payload.get("events")
-            or []
-        )
+        # Only process if we have addresses and they're not empty
+        if not from_addr or not to_addr:
+            continue
 
-        # Load tracked whales from simplified system
-        from discord_bot import _load_eth
-        watched = _load_eth()
-        messages = []
-
-        # Handle both single activity and list of activities
-        activity_list = activity if isinstance(activity, list) else ([activity] if activity else [])
-        
-        for a in activity_list:
-            if not a:  # Skip empty activities
-                continue
-                
-            from_addr = (a.get("fromAddress") or "").lower()
-            to_addr = (a.get("toAddress") or "").lower()
-
-            # Token/amount extraction with better fallbacks
-            asset = (
-                a.get("asset") 
-                or (a.get("erc20Metadata") or {}).get("symbol")
-                or (a.get("erc20Metadata") or {}).get("name")
-                or "ETH"
-            )
-            
-            # Extract value from various possible locations
-            value = (
-                a.get("value") 
-                or a.get("amount")
-                or (a.get("rawContract") or {}).get("value")
-                or (a.get("rawContract") or {}).get("rawValue")
-                or ""
+        # Alert only if a watched address is involved
+        if from_addr in watched or to_addr in watched:
+
+            direction = "BUY" if to_addr in watched else "SELL"
+            whale_addr = to_addr if direction == "BUY" else from_addr
+            link = f"https://etherscan.io/tx/{tx}" if tx else ""
+
+            # Format value for display
+            display_value = str(value)[:20] + "..." if len(str(value)) > 20 else str(value)
+
+            # Enhanced whale alert with runner detection
+            base_msg = (
+                f"🐋 **ETH Whale {direction}**\n"
+                f"Addr: `{whale_addr[:8]}...{whale_addr[-6:]}`\n"
+                f"Asset: {asset}  |  Amount: {display_value}\n{link}"
             )
-            
-            # Convert hex values to readable format if needed
-            if isinstance(value, str) and value.startswith("0x"):
-                try:
-                    value = str(int(value, 16))
-                except:
-                    pass
-            
-            tx = a.get("hash") or a.get("transactionHash") or ""
-
-            # Only process if we have addresses and they're not empty
-            if not from_addr or not to_addr:
-                continue
-
-            # Alert only if a watched address is involved (check both systems)
-            if (from_addr in watched or to_addr in watched or 
-                is_tracked_whale("ethereum", from_addr) or is_tracked_whale("ethereum", to_addr)):
-                
-                direction = "BUY" if (to_addr in watched or is_tracked_whale("ethereum", to_addr)) else "SELL"
-                whale_addr = to_addr if direction == "BUY" else from_addr
-                link = f"https://etherscan.io/tx/{tx}" if tx else ""
-                
-                # Format value for display
-                display_value = str(value)[:20] + "..." if len(str(value)) > 20 else str(value)
-                
-                # Enhanced whale alert with runner detection
-                base_msg = (
-                    f"🐋 **ETH Whale {direction}**\n"
-                    f"Addr: `{whale_addr[:8]}...{whale_addr[-6:]}`\n"
-                    f"Asset: {asset}  |  Amount: {display_value}\n{link}"
-                )
-                
-                # Enhanced token detection for BUY transactions only
-                if direction == "BUY":
-                    # Extract token contract address from multiple possible locations
-                    token_addr = (
-                        a.get("rawContract", {}).get("address") 
-                        or (a.get("erc20Metadata") or {}).get("contractAddress")
-                        or (a.get("log", {}).get("address") if "log" in a else None)
-                    )
-                    
-                    # Analyze token if we have an address
-                    if token_addr:
-                        meta = ds_info_by_token(token_addr)
-                        if not is_runner(meta):
-                            continue  # Skip low-signal whale transactions
-                        
-                        # High-signal runner whale alert
-                        if meta and all(key in meta for key in ['name', 'symbol', 'fdv', 'lp', 'age_min', 'chart']):
-                            msg = (
-                                f"🚨 **ETH Whale BUY - RUNNER DETECTED** 🚨\n\n"
-                                f"🎯 **{meta['name']}** (${meta['symbol']})\n"
-                                f"💰 MC: ${int(meta['fdv']):,} | 💧 LP: ${int(meta['lp']):,} | ⏰ Age: {meta['age_min']}m\n\n"
-                                f"🐋 **Whale:** `{whale_addr[:8]}...{whale_addr[-6:]}`\n"
-                                f"💵 **Amount:** {display_value}\n\n"
-                                f"🔗 **Links**\n"
-                                f"• [Chart]({meta['chart']})\n"
-                                f"• [Transaction]({link})\n\n"
-                                f"**Alert:** Fresh runner token with whale accumulation detected"
-                            )
-                        else:
-                            msg = base_msg
-                        messages.append(msg)
+
+            # Enhanced token detection for BUY transactions only
+            if direction == "BUY":
+                # Extract token contract address from multiple possible locations
+                token_addr = _activity_token_addr(a)
+
+                # Analyze token if we have an address
+                if token_addr:
+                    meta = ds_info_by_token(token_addr)
+                    if not is_runner(meta):
+                        continue  # Skip low-signal whale transactions
+
+                    # High-signal runner whale alert
+                    if meta and all(key in meta for key in ['name', 'symbol', 'fdv', 'lp', 'age_min', 'chart']):
+                        msg = (
+                            f"🚨 **ETH Whale BUY - RUNNER DETECTED** 🚨\n\n"
+                            f"🎯 **{meta['name']}** (${meta['symbol']})\n"
+                            f"💰 MC: ${int(meta['fdv']):,} | 💧 LP: ${int(meta['lp']):,} | ⏰ Age: {meta['age_min']}m\n\n"
+                            f"🐋 **Whale:** `{whale_addr[:8]}...{whale_addr[-6:]}`\n"
+                            f"💵 **Amount:** {display_value}\n\n"
+                            f"🔗 **Links**\n"
+                            f"• [Chart]({meta['chart']})\n"
+                            f"• [Transaction]({link})\n\n"
+                            f"**Alert:** Fresh runner token with whale accumulation detected"
+                        )
                     else:
-                        # Regular whale alert for transactions without token address
-                        messages.append(base_msg)
+                        msg = base_msg
+                    messages.append(msg)
                 else:
-                    # SELL transactions get standard whale alerts
+                    # Regular whale alert for transactions without token address
                     messages.append(base_msg)
-                
-                print(f"[alchemy] Generated whale alert: {direction} {asset} by {whale_addr[:8]}...")
+            else:
+                # SELL transactions get standard whale alerts
+                messages.append(base_msg)
 
-        # Send messages to Discord via webhook
-        for m in messages:
-            try:
-                from discord_bot import webhook_send
-                webhook_send(m)
-            except Exception as e:
-                print(f"[alchemy_webhook] Error sending alert: {e}")
+            print(f"[alchemy] Generated whale alert: {direction} {asset} by {whale_addr[:8]}...")
 
-        return jsonify({"ok": True, "count": len(messages)}), 200
+    # Send messages to Discord via webhook
+    for m in messages:
+        try:
+            from discord_bot import webhook_send
+            webhook_send(m)
+        except Exception as e:
+            print(f"[alchemy_webhook] Error sending alert: {e}")
 
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"[alchemy error] {e}")
-        print(f"[alchemy error details] {error_details}")
-        # Return 200 so Alchemy doesn't spam retries
-        return jsonify({"ok": False, "error": str(e), "details": error_details[:500]}), 200
+@app.route('/alchemy', methods=['GET', 'POST'])
+def alchemy_webhook():
+    """Webhook endpoint for Alchemy ETH whale tracking with health check"""
+    # Health check for browser/Alchemy "Test URL"
+    if request.method == "GET":
+        return "OK (alchemy)", 200
+
+    payload = request.get_json(force=True, silent=True)
+    if not isinstance(payload, dict):
+        # Return 200 so Alchemy doesn't spam retries of a payload that will never parse
+        return jsonify({"ok": False, "error": "expected a JSON object"}), 200
+    # Log small snippet for debugging
+    print(f"[alchemy] payload: {json.dumps(payload)[:600]}")
+    return _enqueue_webhook("alchemy", payload)
+
+def process_helius_payload(txs: list):
+    """Turn one Helius enhanced-transactions delivery into whale runner alerts (runs on a webhook worker)"""
+    watched = sol_whales
+    msgs = []
+
+    # Token transfers by (signature, position in the tx); redelivered ones are skipped
+    transfers = [
+        (tx, ev)
+        for tx in txs
+        for i, ev in enumerate((tx.get("events") or {}).get("tokenTransfers") or [])
+        if first_delivery("helius", tx.get("signature") or "", i)
+    ]
+
+    # Pass 1: transfers where a watched whale is sender/receiver, and the distinct mints they touch
+    hits = []
+    for tx, ev in transfers:
+        mint = ev.get("tokenAddress") or ev.get("mint")
+        if not mint: 
+            continue
+        dst = ev.get("toUserAccount")
+        if dst in watched:
+            hits.append((tx, mint, dst))
+            continue
+        src = ev.get("fromUserAccount")
+        if src in watched:
+            hits.append((tx, mint, src))
+    if not hits:
+        return
+    mints = list(dict.fromkeys(mint for _, mint, _ in hits))
+
+    # Pass 2: one batched DexScreener lookup for all of them; the runner filter runs once per mint
+    runners = {mint: meta for mint, meta in ds_info_many(mints).items() if is_runner(meta)}
+    print(f"[helius] {len(hits)} whale transfers, {len(mints)} distinct mints, {len(runners)} runners")
+
+    for tx, mint, whale in hits:
+        meta = runners.get(mint)
+        if meta is None:
+            continue
+
+        sig = tx.get("signature") or tx.get("transaction") or ""
+        link = f"https://solscan.io/tx/{sig}" if sig else ""
+
+        # High-signal Solana whale runner alert
+        msg = (
+            f"🚨 **SOL Whale BUY - RUNNER DETECTED** 🚨\n\n"
+            f"🎯 **{meta['name']}** (${meta['symbol']})\n"
+            f"💰 MC: ${int(meta['fdv']):,} | 💧 LP: ${int(meta['lp']):,} | ⏰ Age: {meta['age_min']}m\n\n"
+            f"🐋 **Whale:** `{whale[:8]}...{whale[-6:]}`\n"
+            f"🪙 **Mint:** `{mint}`\n\n"
+            f"🔗 **Links**\n"
+            f"• [Chart]({meta['chart']})\n"
+            f"• [Transaction]({link})\n\n"
+            f"**Alert:** Fresh Solana runner token with whale accumulation detected"
+        )
+        msgs.append(msg)
+
+    # Send alerts via Discord
+    from discord_bot import get_bot_instance, webhook_send, CHANNEL_ID
+    from discord_dispatch import discord_dispatch
+    bot = get_bot_instance()
+    ch = bot.get_channel(CHANNEL_ID) if CHANNEL_ID else None
+    for m in msgs:
+        if ch and bot.is_ready(): 
+            discord_dispatch.send_alert(ch, m)  # thread-safe hand-off to the bot loop
+        webhook_send(m)
+        print(f"[helius] Generated SOL whale runner alert")
 
 @app.route("/helius", methods=["GET","POST"])
 def helius_webhook():
@@ -275,70 +360,13 @@ def helius_webhook():
     if request.method == "GET":
         return "OK (helius)", 200
 
-    try:
-        payload = request.get_json(force=True, silent=True) or []
-        print("[helius raw]", str(payload)[:900])
-        watched = _load_sol()
-        msgs = []
-
-        # Helius sends a list of txs; we look for token transfers where a watched whale is sender/receiver
-        for tx in payload if isinstance(payload, list) else []:
-            events = (tx.get("events") or {})
-            tts = events.get("tokenTransfers") or []
-            for ev in tts:
-                src = ev.get("fromUserAccount")
-                dst = ev.get("toUserAccount")
-                mint = ev.get("tokenAddress") or ev.get("mint")
-                amount = ev.get("tokenAmount") or ev.get("amount")
-                if not mint: 
-                    continue
-
-                direction = None
-                whale = None
-                if dst in watched:
-                    direction, whale = "BUY", dst
-                elif src in watched:
-                    direction, whale = "SELL", src
-                else:
-                    continue
-
-                meta = ds_info_by_token(mint)
-                if not is_runner(meta):   # uses the shared filter below
-                    continue
-
-                sig = tx.get("signature") or tx.get("transaction") or ""
-                link = f"https://solscan.io/tx/{sig}" if sig else ""
-                
-                # High-signal Solana whale runner alert
-                msg = (
-                    f"🚨 **SOL Whale BUY - RUNNER DETECTED** 🚨\n\n"
-                    f"🎯 **{meta['name']}** (${meta['symbol']})\n"
-                    f"💰 MC: ${int(meta['fdv']):,} | 💧 LP: ${int(meta['lp']):,} | ⏰ Age: {meta['age_min']}m\n\n"
-                    f"🐋 **Whale:** `{whale[:8]}...{whale[-6:]}`\n"
-                    f"🪙 **Mint:** `{mint}`\n\n"
-                    f"🔗 **Links**\n"
-                    f"• [Chart]({meta['chart']})\n"
-                    f"• [Transaction]({link})\n\n"
-                    f"**Alert:** Fresh Solana runner token with whale accumulation detected"
-                )
-                msgs.append(msg)
-
-        # Send alerts via Discord
-        from discord_bot import get_bot_instance, webhook_send, CHANNEL_ID
-        bot = get_bot_instance()
-        ch = bot.get_channel(CHANNEL_ID) if CHANNEL_ID else None
-        for m in msgs:
-            if ch and bot.is_ready(): 
-                bot.loop.create_task(ch.send(m))
-            webhook_send(m)
-            print(f"[helius] Generated SOL whale runner alert")
+    payload = request.get_json(force=True, silent=True)
+    print("[helius raw]", str(payload)[:900])
+    if not isinstance(payload, list):
+        # Return 200 so Helius doesn't spam retries of a payload that will never parse
+        return jsonify({"ok": False, "error": "expected a JSON array of transactions"}), 200
+    return _enqueue_webhook("helius", payload)
 
-        return jsonify({"ok": True, "count": len(msgs)}), 200
-        
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"[helius error] {e}")
-        print(f"[helius error details] {error_details}")
-        # Return 200 so Helius doesn't spam retries
-        return jsonify({"ok": False, "error": str(e), "details": error_details[:500]}), 200
+# Webhook deliveries are processed off the request thread
+webhook_queue.register("alchemy", process_alchemy_payload)
+webhook_queue.register("helius", process_helius_payload)
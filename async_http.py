@@ -0,0 +1,110 @@
+"""
+Async HTTP Client for Upstream APIs
+aiohttp counterpart of http_client for code running on the bot's event loop: one pooled
+keep-alive session per event loop, the same per-host pool sizes, timeouts and User-Agent,
+and the same per-host rate limiter (awaited instead of sleeping the thread).
+"""
+
+import asyncio
+import json
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from http_client import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, HOST_POOL_SIZES, MAX_429_RETRIES, USER_AGENT
+from rate_limiter import rate_limiter
+
+TOTAL_CONNECTIONS = sum(HOST_POOL_SIZES.values())
+
+class AsyncResponse:
+    """Status, headers and body of a completed request (the connection is already released)"""
+
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(self, status_code: int, headers, content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+_host_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+_stats_lock = threading.Lock()
+_requests: Dict[str, int] = {}
+
+def _session() -> aiohttp.ClientSession:
+    """The pooled session of the running event loop, created on first use"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        # Per-host sizes are enforced by _slot(); the connector only caps the total
+        connector = aiohttp.TCPConnector(limit=TOTAL_CONNECTIONS, keepalive_timeout=30)
+        session = aiohttp.ClientSession(connector=connector, headers={'User-Agent': USER_AGENT},
+                                        timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT))
+        _sessions[loop] = session
+    return session
+
+def _slot(host: str) -> asyncio.Semaphore:
+    """Concurrent requests allowed to host on the running loop, matching the sync pool size"""
+    slots = _host_slots.setdefault(asyncio.get_running_loop(), {})
+    slot = slots.get(host)
+    if slot is None:
+        slot = slots[host] = asyncio.Semaphore(HOST_POOL_SIZES.get(host, DEFAULT_POOL_SIZE))
+    return slot
+
+async def request(method: str, url: str, cost: float = 1, timeout: Optional[float] = None,
+                  **kwargs) -> AsyncResponse:
+    """
+    Send through the loop's pooled session, awaiting the host's rate budget first.
+    429 responses back the host off and the request is queued again instead of failing.
+    """
+    host = urlsplit(url).hostname or ""
+    for attempt in range(MAX_429_RETRIES + 1):
+        await rate_limiter.acquire_async(host, cost)
+        response = await request_once(method, url, timeout, **kwargs)
+        backoff = rate_limiter.record_response(host, response.status_code, response.headers)
+        if backoff is None or attempt == MAX_429_RETRIES:
+            return response
+        print(f"[async_http] {host} throttled (429), retrying in {backoff:.1f}s")
+    return response
+
+async def request_once(method: str, url: str, timeout: Optional[float] = None, **kwargs) -> AsyncResponse:
+    """
+    One attempt through the loop's pooled session, without the host rate limiter or 429 retries;
+    for callers that pace the route themselves (the Discord dispatcher) and handle 429s
+    """
+    host = urlsplit(url).hostname or ""
+    if timeout is not None:
+        kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+    with _stats_lock:
+        _requests[host] = _requests.get(host, 0) + 1
+    async with _slot(host), _session().request(method, url, **kwargs) as resp:
+        return AsyncResponse(resp.status, resp.headers, await resp.read())
+
+async def get(url: str, **kwargs) -> AsyncResponse:
+    return await request("GET", url, **kwargs)
+
+async def post(url: str, **kwargs) -> AsyncResponse:
+    return await request("POST", url, **kwargs)
+
+async def close():
+    """Close the running loop's session (on bot shutdown)"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+def get_stats() -> Dict:
+    """Per-host request counts and pooled connections per live event loop"""
+    with _stats_lock:
+        requests = dict(_requests)
+    pools = []
+    for session in list(_sessions.values()):
+        if not session.closed:
+            connector = session.connector
+            pools.append({'limit': connector.limit, 'limit_per_host': connector.limit_per_host})
+    return {'requests': requests, 'sessions': pools}
@@ -0,0 +1,193 @@
+"""
+Vectorized Batch Runner Scoring
+Scores a whole cycle of pairs at once with NumPy instead of one dict at a time.
+Produces exactly the same scores as calculate_runner_score_dex / calculate_eth_runner_score;
+both are compiled from the same scoring_rules table, whose defaults are checked against the
+frozen pre-engine scorers in scoring_reference.
+
+    python batch_scoring.py            # parity check + throughput benchmark (10k-100k pairs)
+"""
+
+import contextlib
+import io
+import random
+import time
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to the scalar scorers
+    np = None
+
+import scoring_rules
+
+def _to_columns(rows: List[Optional[tuple]], fields: tuple) -> Dict:
+    """Feature rows (None = malformed pair) as float columns plus an 'error' mask"""
+    error_row = (scoring_rules.NAN,) * len(fields)
+    errors = [row is None for row in rows]
+    rows = [error_row if row is None else row for row in rows]
+    if not rows:
+        arrays = {name: np.zeros(0) for name in fields}
+    else:
+        arrays = {name: np.asarray(col, dtype=np.float64) for name, col in zip(fields, zip(*rows))}
+    arrays['error'] = np.asarray(errors, dtype=bool)
+    return arrays
+
+def build_columns(pairs: List[Dict], chain: str, now_ms: Optional[float] = None,
+                  rules: Optional[scoring_rules.RuleSet] = None) -> Dict:
+    """
+    Columnar arrays of a chain profile's scoring fields for raw pair dicts, using a single
+    timestamp. Pairs the scalar scorer would reject are flagged in the 'error' mask.
+    """
+    rules = rules or scoring_rules.current()
+    now_ms = now_ms if now_ms is not None else time.time() * 1000
+    rows = []
+    for pair in pairs:
+        try:
+            rows.append(rules.extract(pair, chain, now_ms))
+        except Exception:
+            rows.append(None)
+    return _to_columns(rows, rules.fields(chain))
+
+def score_solana_columns(cols: Dict, rules: Optional[scoring_rules.RuleSet] = None):
+    """Vectorized calculate_runner_score_dex"""
+    return (rules or scoring_rules.current()).score_columns(cols, 'solana')
+
+def score_ethereum_columns(cols: Dict, rules: Optional[scoring_rules.RuleSet] = None):
+    """Vectorized calculate_eth_runner_score"""
+    return (rules or scoring_rules.current()).score_columns(cols, 'ethereum')
+
+_VECTOR = {'solana': score_solana_columns, 'ethereum': score_ethereum_columns}
+
+def scalar_scorer(chain: str):
+    """The per-pair reference scorer for a chain (imported lazily; the scanners import this module)"""
+    if chain == 'ethereum':
+        from ethereum_scanner import calculate_eth_runner_score
+        return calculate_eth_runner_score
+    from solana_scanner import calculate_runner_score_dex
+    return calculate_runner_score_dex
+
+def score_pairs(pairs: List[Dict], chain: str, now_ms: Optional[float] = None) -> List[float]:
+    """Runner scores for a list of pairs of one chain ('solana' or 'ethereum')"""
+    if np is None or not pairs:
+        scorer = scalar_scorer(chain)
+        return [scorer(pair) for pair in pairs]
+    rules = scoring_rules.current()  # one rules version for the whole batch
+    return _VECTOR[chain](build_columns(pairs, chain, now_ms, rules), rules).tolist()
+
+def score_records(records: List, chain: str) -> List[float]:
+    """Runner scores for Pair records, whose features were parsed once for the cycle"""
+    rules = scoring_rules.current()  # one rules version for the whole batch
+    if np is None or not records:
+        return [rules.score_features(r.features, chain) if r.features is not None else 0 for r in records]
+    cols = _to_columns([r.features for r in records], scoring_rules.DEX_FIELDS)
+    return _VECTOR[chain](cols, rules).tolist()
+
+def score_solana_pairs(records: List) -> List[float]:
+    return score_records(records, 'solana')
+
+def score_ethereum_pairs(records: List) -> List[float]:
+    return score_records(records, 'ethereum')
+
+# --- parity check and benchmark -------------------------------------------------
+
+def synthetic_pairs(n: int, now_ms: float, seed: int = 7) -> List[Dict]:
+    """Random DexScreener-shaped pairs covering every band edge plus malformed values"""
+    rng = random.Random(seed)
+    edges = [0, 0.3, 1, 3, 5, 8, 10, 15, 20, 25, 40, 50, 75, 150, 5000, 10000, 20000, 25000, 50000,
+             100000, 300000, 500000, 1000000, 3000000, 8000000]
+    junk = [None, "", "12.5", "abc"]
+
+    def value(scale):
+        roll = rng.random()
+        if roll < 0.15:
+            return rng.choice(edges)
+        if roll < 0.18:
+            return rng.choice(junk)
+        return round(rng.random() * scale, rng.choice([0, 2]))
+
+    pairs = []
+    for i in range(n):
+        pair = {
+            'pairAddress': f"pair{i}",
+            'fdv': value(5_000_000),
+            'marketCap': value(5_000_000),
+            'liquidity': {'usd': value(200_000)},
+            'volume': {'h24': value(1_000_000), 'h6': value(300_000)},
+            'priceChange': {'m5': value(30), 'h1': value(60), 'h6': value(120), 'h24': value(300)},
+            'pairCreatedAt': rng.choice([0, now_ms - rng.random() * 4 * 86400000, now_ms - 15 * 60000]),
+            'age_minutes': rng.choice([rng.random() * 6000, 30, 120, 480, 1440, 4320]),
+            'txns': {'h1': {'buys': rng.randint(0, 200), 'sells': rng.randint(0, 200)}, 'h6': {}},
+        }
+        roll = rng.random()
+        if roll < 0.03:
+            pair['txns'] = None
+        elif roll < 0.05:
+            pair['liquidity'] = None
+        elif roll < 0.07:
+            pair['txns'] = {'h1': {'buys': "7", 'sells': 3}}
+        elif roll < 0.09:
+            del pair['priceChange']
+        pairs.append(pair)
+    return pairs
+
+def check_parity(pairs: List[Dict], now_ms: float) -> Dict:
+    """
+    Compare the default rules table, through both the scalar engine and the vector scorer,
+    against the frozen pre-engine if-ladders in scoring_reference (time frozen at now_ms)
+    """
+    import scoring_reference
+    reference = {
+        'solana': lambda pair: scoring_reference.calculate_runner_score_dex(pair, now_ms),
+        'ethereum': scoring_reference.calculate_eth_runner_score,
+    }
+    rules = scoring_rules.RuleSet(scoring_rules.DEFAULT_RULES)  # never a DB override
+
+    def engine(pair, chain):
+        try:
+            return rules.score(pair, chain, now_ms)
+        except Exception:
+            return 0  # what the scanner wrappers return for malformed pairs
+
+    mismatches = {}
+    for chain in ('solana', 'ethereum'):
+        expected = [reference[chain](pair) for pair in pairs]
+        scalar = [engine(pair, chain) for pair in pairs]
+        mismatches[f"{chain} scalar"] = [i for i, (a, b) in enumerate(zip(expected, scalar)) if a != b]
+        if np is not None:
+            vector = _VECTOR[chain](build_columns(pairs, chain, now_ms, rules), rules).tolist()
+            mismatches[f"{chain} vector"] = [i for i, (a, b) in enumerate(zip(expected, vector)) if a != b]
+    return mismatches
+
+def benchmark(sizes=(10_000, 100_000)):
+    now_ms = time.time() * 1000
+    for n in sizes:
+        pairs = synthetic_pairs(n, now_ms)
+        for chain in ('solana', 'ethereum'):
+            scorer = scalar_scorer(chain)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # scalar scorers print on malformed pairs
+                for pair in pairs:
+                    scorer(pair)
+            scalar_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            cols = build_columns(pairs, chain, now_ms)
+            build_s = time.perf_counter() - start
+            start = time.perf_counter()
+            _VECTOR[chain](cols)
+            vector_s = time.perf_counter() - start
+
+            print(f"{chain:8} n={n:>7,}: scalar {n / scalar_s:>10,.0f} pairs/s | "
+                  f"columns {build_s * 1000:7.1f}ms + vector {vector_s * 1000:6.1f}ms "
+                  f"= {n / (build_s + vector_s):>10,.0f} pairs/s (vector only {n / vector_s:>12,.0f})")
+
+if __name__ == "__main__":
+    now = time.time() * 1000
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = check_parity(synthetic_pairs(20_000, now), now)
+    for chain, bad in result.items():
+        print(f"parity {chain}: {'OK' if not bad else f'{len(bad)} mismatches, first {bad[:5]}'}")
+    if np is None:
+        raise SystemExit("NumPy is required for the batch scorer benchmark")
+    benchmark()
@@ -1,5 +1,5 @@
 # birdeye_scraper.py
-import requests
+import http_client
 import time
 
 def get_birdeye_new_tokens(limit=20):
@@ -15,7 +15,7 @@ def get_birdeye_new_tokens(limit=20):
     
     for endpoint in endpoints:
         try:
-            response = requests.get(endpoint, timeout=10)
+            response = http_client.get(endpoint)
             if response.status_code == 200:
                 data = response.json()
                 tokens = data.get('data', {}).get('tokens', [])
@@ -54,7 +54,7 @@ def get_solscan_new_tokens(limit=20):
     """
     try:
         url = "https://api.solscan.io/token/trending"
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         
         if response.status_code == 200:
             data = response.json()
@@ -95,7 +95,7 @@ def get_coingecko_new_tokens(limit=20):
         import random
         page = random.randint(1, 5)
         url = f"https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_asc&per_page=50&page={page}"
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         
         if response.status_code == 200:
             data = response.json()
@@ -128,19 +128,20 @@ def get_coingecko_new_tokens(limit=20):
         print(f"[coingecko] Error: {e}")
         return []
 
+# Fallback sources as (name, fetcher, host); the scanner schedules each one separately
+FRESH_SOURCES = [
+    ("birdeye", get_birdeye_new_tokens, "public-api.birdeye.so"),
+    ("solscan", get_solscan_new_tokens, "api.solscan.io"),
+    ("coingecko", get_coingecko_new_tokens, "api.coingecko.com")
+]
+
 def get_combined_fresh_tokens(max_tokens=30):
     """
     Combine tokens from multiple sources for better coverage
     """
     all_tokens = []
     
-    sources = [
-        ("birdeye", get_birdeye_new_tokens),
-        ("solscan", get_solscan_new_tokens), 
-        ("coingecko", get_coingecko_new_tokens)
-    ]
-    
-    for source_name, source_func in sources:
+    for source_name, source_func, host in FRESH_SOURCES:
         try:
             tokens = source_func(10)  # Get 10 from each source
             all_tokens.extend(tokens)
@@ -149,7 +150,10 @@ def get_combined_fresh_tokens(max_tokens=30):
             print(f"[{source_name}] Failed: {e}")
             continue
     
-    # Remove duplicates and limit results
+    return unique_fresh_tokens(all_tokens, max_tokens)
+
+def unique_fresh_tokens(all_tokens, max_tokens=30):
+    """Drop tokens already seen under the same address and limit results"""
     seen_addresses = set()
     unique_tokens = []
     
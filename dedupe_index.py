@@ -0,0 +1,215 @@
+"""
+Bounded Dedupe Index
+String keys with per-entry expiry, LRU eviction at a size bound, optional re-alert rules
+and optional persistence to a JSON file so restarts don't replay recent work (saved on
+writes, every SAVE_INTERVAL while changes are pending, and at interpreter exit)
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+SAVE_INTERVAL = 30.0  # seconds between persisted snapshots
+
+# Persisted indexes, saved by one background flusher while dirty and once more at exit
+_persisted: "weakref.WeakSet[DedupeIndex]" = weakref.WeakSet()
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+
+def flush_all():
+    """Save every persisted index with unsaved changes (flusher thread and interpreter exit)"""
+    for index in list(_persisted):
+        if index._dirty:
+            index.save()
+
+def _flush_periodically():
+    while True:
+        time.sleep(SAVE_INTERVAL)
+        try:
+            flush_all()
+        except Exception as e:
+            print(f"[dedupe] periodic save failed: {e}")
+
+def _track(index: "DedupeIndex"):
+    global _flusher
+    _persisted.add(index)
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_periodically, name="dedupe-flush", daemon=True)
+            _flusher.start()
+            atexit.register(flush_all)
+
+class DedupeIndex:
+    """
+    Entries are kept in last-touched order; with one TTL per index that is also expiry
+    order, so expired and over-limit entries are always dropped from the front in O(1).
+    realert(old_value, new_value) decides whether a live key may pass again.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int, path: Optional[str] = None,
+                 realert: Optional[Callable[[Any, Any], bool]] = None):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.path = path or None
+        self.realert = realert
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        self.added = 0
+        self.suppressed = 0
+        self.realerts = 0
+        self.expired = 0
+        self.evicted = 0
+        if self.path:
+            self._load()
+            _track(self)
+
+    def _prune(self, now: float):
+        entries = self._entries
+        while entries:
+            key, (expires_at, _) = next(iter(entries.items()))
+            if expires_at > now:
+                break
+            entries.popitem(last=False)
+            self.expired += 1
+            self._dirty = True
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evicted += 1
+            self._dirty = True
+
+    def _live(self, key: str, now: float) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= now:
+            del self._entries[key]
+            self.expired += 1
+            self._dirty = True
+            return None
+        return entry
+
+    def _allows(self, key: str, value: Any, now: float) -> bool:
+        entry = self._live(key, now)
+        if entry is None:
+            return True
+        return self.realert is not None and value is not None and self.realert(entry[1], value)
+
+    def _put(self, key: str, value: Any, now: float):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        self._dirty = True
+        self._prune(now)
+
+    def allows(self, key: str, value: Any = None) -> bool:
+        """True when key is unknown/expired or the re-alert rule lets value through; no side effects"""
+        with self._lock:
+            return self._allows(key, value, time.time())
+
+    def add(self, key: str, value: Any = None):
+        """Record key (refreshing its expiry) with an optional value for re-alert rules"""
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                self.realerts += 1
+            else:
+                self.added += 1
+            self._put(key, value, now)
+        self.save_if_due()
+
+    def admit(self, key: str, value: Any = None) -> bool:
+        """Atomic allows() + add(); False means a duplicate was suppressed"""
+        now = time.time()
+        with self._lock:
+            if not self._allows(key, value, now):
+                self.suppressed += 1
+                return False
+            if key in self._entries:
+                self.realerts += 1
+            else:
+                self.added += 1
+            self._put(key, value, now)
+        self.save_if_due()
+        return True
+
+    def suppress(self):
+        """Count a duplicate the caller skipped after allows() returned False"""
+        with self._lock:
+            self.suppressed += 1
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._live(key, time.time())
+            return entry[1] if entry else None
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._live(key, time.time()) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._prune(time.time())
+            return len(self._entries)
+
+    # --- persistence --------------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[dedupe] {self.name}: ignoring unreadable {self.path}: {e}")
+            return
+        now = time.time()
+        for key, expires_at, value in sorted(stored.get("entries", []), key=lambda e: e[1]):
+            if expires_at > now:
+                self._entries[key] = (expires_at, value)
+        self._prune(now)
+        self._dirty = False
+        print(f"[dedupe] {self.name}: restored {len(self._entries)} entries from {self.path}")
+
+    def save(self):
+        """Write live entries atomically (temp file + rename)"""
+        if not self.path:
+            return
+        with self._lock:
+            self._prune(time.time())
+            snapshot = [[key, expires_at, value] for key, (expires_at, value) in self._entries.items()]
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        tmp_path = f"{self.path}.tmp"
+        with self._save_lock:
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump({"entries": snapshot}, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[dedupe] {self.name}: could not save {self.path}: {e}")
+
+    def save_if_due(self):
+        """Save from the write path when the last save is old; the flusher covers quiet periods"""
+        if self.path and self._dirty and time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self.save()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._prune(time.time())
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'added': self.added,
+                'suppressed': self.suppressed,
+                'realerts': self.realerts,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'persisted': bool(self.path),
+            }
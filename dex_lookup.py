@@ -0,0 +1,176 @@
+"""
+Batched DexScreener Lookups
+Collects token and pair addresses from concurrent callers over a short window and
+resolves them with one multi-address request per chunk of up to 30 addresses
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+import http_client
+from response_cache import CoalescingCache
+
+DEX_TOKENS_URL = "https://api.dexscreener.com/latest/dex/tokens/{}"
+DEX_PAIRS_URL = "https://api.dexscreener.com/latest/dex/pairs/{}/{}"
+BATCH_SIZE = 30  # DexScreener accepts up to 30 comma-separated addresses
+BATCH_WINDOW = float(os.getenv("DEX_BATCH_WINDOW", "0.05"))  # seconds to wait for more callers
+LOOKUP_TTL = float(os.getenv("DEX_LOOKUP_TTL", "10"))  # seconds results are reused
+
+def normalize_address(addr: str) -> str:
+    """EVM addresses are case-insensitive; Solana mints are not"""
+    addr = (addr or "").strip()
+    return addr.lower() if addr.startswith("0x") else addr
+
+class BatchLookup:
+    """
+    Window-based batcher: the first caller waits BATCH_WINDOW for others to join,
+    then fetches every pending key in chunks and hands each caller its own result.
+    """
+
+    def __init__(self, name: str, fetch_chunk: Callable[[List], Dict], group_key: Callable = None,
+                 batch_size: int = BATCH_SIZE, window: float = BATCH_WINDOW, ttl: float = LOOKUP_TTL):
+        self.name = name
+        self.fetch_chunk = fetch_chunk
+        self.group_key = group_key or (lambda key: None)
+        self.batch_size = batch_size
+        self.window = window
+        self.cache = CoalescingCache(ttl=ttl, maxsize=2048)
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._flush_scheduled = False
+        self.batches = 0
+        self.keys_fetched = 0
+
+    def lookup_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[List]]:
+        """Resolve keys, joining any batch already collecting; None marks a failed lookup"""
+        results = {}
+        futures = {}
+        leader = False
+        with self._lock:
+            for key in keys:
+                if key in results or key in futures:
+                    continue
+                cached = self.cache.get(key)
+                if cached is not None:
+                    results[key] = cached
+                    continue
+                future = self._pending.get(key)
+                if future is None:
+                    future = Future()
+                    self._pending[key] = future
+                futures[key] = future
+            if self._pending and not self._flush_scheduled:
+                self._flush_scheduled = True
+                leader = True
+
+        if leader:
+            try:
+                time.sleep(self.window)  # callers on the bot's event loop use asyncio.to_thread
+            finally:
+                self._flush()
+
+        for key, future in futures.items():
+            results[key] = future.result()
+        return results
+
+    def lookup(self, key: Hashable) -> Optional[List]:
+        """Resolve a single key through the shared batch"""
+        return self.lookup_many([key])[key]
+
+    def _flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._flush_scheduled = False
+
+        try:
+            groups: Dict[Hashable, List] = {}
+            for key in pending:
+                groups.setdefault(self.group_key(key), []).append(key)
+
+            for keys in groups.values():
+                for i in range(0, len(keys), self.batch_size):
+                    chunk = keys[i:i + self.batch_size]
+                    try:
+                        found = self.fetch_chunk(chunk)
+                    except Exception as e:
+                        print(f"[dex_lookup] {self.name} batch of {len(chunk)} failed: {e}")
+                        found = None
+                    self.batches += 1
+                    self.keys_fetched += len(chunk)
+                    for key in chunk:
+                        value = None if found is None else found.get(key, [])
+                        if value is not None:
+                            self.cache.put(key, value)
+                        pending[key].set_result(value)
+        except Exception as e:
+            print(f"[dex_lookup] {self.name} flush failed: {e}")
+        finally:
+            # Waiters block on future.result(): every one gets an answer, None = failed lookup
+            for future in pending.values():
+                if not future.done():
+                    future.set_result(None)
+
+    def stats(self) -> Dict:
+        return {
+            'batches': self.batches,
+            'keys_fetched': self.keys_fetched,
+            'avg_batch_size': round(self.keys_fetched / self.batches, 1) if self.batches else 0,
+            'cache': self.cache.stats(),
+        }
+
+def _fetch_token_chunk(addresses: List[str]) -> Optional[Dict[str, List]]:
+    """One /tokens call for up to 30 addresses; pairs are grouped by base and quote token"""
+    response = http_client.get(DEX_TOKENS_URL.format(",".join(addresses)), timeout=12)
+    if response.status_code != 200:
+        return None
+    wanted = set(addresses)
+    by_token = {addr: [] for addr in addresses}
+    for pair in response.json().get("pairs") or []:
+        for side in ("baseToken", "quoteToken"):
+            addr = normalize_address((pair.get(side) or {}).get("address", ""))
+            if addr in wanted:
+                by_token[addr].append(pair)
+    return by_token
+
+def _fetch_pair_chunk(keys: List[tuple]) -> Optional[Dict[tuple, List]]:
+    """One /pairs/{chain} call for up to 30 pair addresses of the same chain"""
+    chain_id = keys[0][0]
+    response = http_client.get(DEX_PAIRS_URL.format(chain_id, ",".join(addr for _, addr in keys)))
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    pairs = data.get("pairs") or ([data["pair"]] if data.get("pair") else [])
+    by_pair = {key: [] for key in keys}
+    for pair in pairs:
+        key = (chain_id, normalize_address(pair.get("pairAddress", "")))
+        if key in by_pair:
+            by_pair[key].append(pair)
+    return by_pair
+
+# Global batchers shared by the webhooks, paper trading and scrapers
+token_batcher = BatchLookup("tokens", _fetch_token_chunk)
+pair_batcher = BatchLookup("pairs", _fetch_pair_chunk, group_key=lambda key: key[0])
+
+def get_token_pairs(token_address: str) -> Optional[List]:
+    """All DexScreener pairs for a token (None if the lookup failed); do not mutate the result"""
+    return token_batcher.lookup(normalize_address(token_address))
+
+def get_token_pairs_many(token_addresses: Iterable[str]) -> Dict[str, Optional[List]]:
+    """Pairs for many tokens in as few requests as possible, keyed by the caller's addresses"""
+    addresses = [a for a in token_addresses if a]
+    found = token_batcher.lookup_many(normalize_address(a) for a in addresses)
+    return {a: found[normalize_address(a)] for a in addresses}
+
+def get_pairs_many(chain_pairs: Iterable[tuple]) -> Dict[tuple, Optional[List]]:
+    """Full pair data for (chain_id, pair_address) keys, batched per chain"""
+    keys = [(chain, addr) for chain, addr in chain_pairs if chain and addr]
+    found = pair_batcher.lookup_many((chain, normalize_address(addr)) for chain, addr in keys)
+    return {(chain, addr): found[(chain, normalize_address(addr))] for chain, addr in keys}
+
+def get_stats() -> Dict:
+    """Batch counts and cache stats for both lookup kinds"""
+    return {'tokens': token_batcher.stats(), 'pairs': pair_batcher.stats()}
@@ -1,38 +1,46 @@
 # discord_bot.py (diagnostic)
-import os, requests, discord
+import os, time, discord
+import http_client
+import async_http
+import scoring_rules
 from discord.ext import commands
 import asyncio
+from loop_monitor import loop_monitor
+from discord_dispatch import discord_dispatch
+from alert_enrichment import start_enrichment, within_deadline, late_result, enrichment_embed
 
 TOKEN = os.getenv("DISCORD_TOKEN")
 # accept either name to avoid mismatch
 CHAN_ENV = os.getenv("DISCORD_CHANNEL_ID") or os.getenv("CHANNEL_ID")
 WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
 
-# Scanner configuration constants
-MIN_LP = 3000
-MAX_MC = 1_500_000
-MAX_AGE_MIN = 60
-MIN_HOLDERS = 0
+# Scanner filter limits live in scoring_rules (tunable via the 'scoring_rules' BotConfig row)
 BANKROLL = float(os.getenv("BANKROLL_DEFAULT", "5000"))
 BANKROLL = float(os.getenv("BANKROLL_DEFAULT", "5000"))
 
 def n(x): return "✅" if x else "❌"
 
 async def scanner_loop():
-    """Background task to scan for crypto opportunities"""
-    from scanner import pick_new_pairs
+    """Background task posting the hits of the scan worker thread"""
+    from scan_worker import scan_worker
     
     await bot.wait_until_ready()
     ch = bot.get_channel(CHANNEL_ID) if CHANNEL_ID else None
-    print(f"[diag] Scanner loop started with criteria: MIN_LP={MIN_LP}, MAX_MC={MAX_MC:,}, MAX_AGE_MIN={MAX_AGE_MIN}, MIN_HOLDERS={MIN_HOLDERS}")
+    rules = scoring_rules.refresh(force=True)
+    for chain, limits in rules.filters.items():
+        base = limits["base"]
+        print(f"[diag] Scanner loop started with {chain} criteria (rules v{rules.version}): MIN_LP={base['min_lp']}, "
+              f"MAX_MC={base['max_mc']:,}, MAX_AGE_MIN={base['max_age_min']}, MIN_HOLDERS={limits.get('min_holders', 0)}")
     print(f"[diag] BANKROLL set to ${int(BANKROLL):,}")
     
+    # Scan cycles run in their own thread; this loop only awaits their hits and queues the posts
+    scan_worker.start(asyncio.get_running_loop())
     while not bot.is_closed():
         try:
-            for hit in pick_new_pairs():
+            async for hit in scan_worker.iter_hits():
                 # Enhanced message with much more detail
-                runner_score = hit.get('runner_score', 0)
-                age_min = hit.get('age_minutes', 0)
+                runner_score = hit.runner_score
+                age_min = hit.age_minutes
                 
                 # Format age properly
                 if age_min < 60:
@@ -61,130 +69,99 @@ async def scanner_loop():
                     else:
                         return f"${amount:.0f}"
                 
-                mc_formatted = format_dollars(hit.get('market_cap', 0))
-                lp_formatted = format_dollars(hit.get('liquidity', 0))
+                mc_formatted = format_dollars(hit.fdv)
+                lp_formatted = format_dollars(hit.liquidity)
                 
                 # Chain-specific formatting
-                chain = hit['chain'].upper()
+                chain = hit.chain.upper()
                 is_solana = chain == 'SOLANA'
                 is_ethereum = chain == 'ETHEREUM'
                 
                 # Chain-specific links and formatting
                 if is_solana:
-                    explorer_link = f"[Token: `{hit['token'][:8]}...`](https://solscan.io/token/{hit['token']})"
-                    pump_link = f"• [Pump.fun](https://pump.fun/{hit['token']})\n"
+                    explorer_link = f"[Token: `{hit.token[:8]}...`](https://solscan.io/token/{hit.token})"
+                    pump_link = f"• [Pump.fun](https://pump.fun/{hit.token})\n"
                     chain_emoji = "☀️"
                 elif is_ethereum:
-                    explorer_link = f"[Token: `{hit['token'][:8]}...`](https://etherscan.io/token/{hit['token']})"
-                    pump_link = f"• [Etherscan](https://etherscan.io/token/{hit['token']})\n"
+                    explorer_link = f"[Token: `{hit.token[:8]}...`](https://etherscan.io/token/{hit.token})"
+                    pump_link = f"• [Etherscan](https://etherscan.io/token/{hit.token})\n"
                     chain_emoji = "⛽"
                 else:
-                    explorer_link = f"Token: `{hit['token'][:8]}...`"
+                    explorer_link = f"Token: `{hit.token[:8]}...`"
                     pump_link = ""
                     chain_emoji = "🔗"
                 
                 # Add paper trading and sentiment suggestions
-                paper_trade_msg = f"\n\n💡 **Paper Trade**: `!enter {hit['token']} 1000` ($1000 position)"
+                paper_trade_msg = f"\n\n💡 **Paper Trade**: `!enter {hit.token} 1000` ($1000 position)"
                 sentiment_msg = f"\n📊 **React to share sentiment**: 🚀 Bullish • 📉 Bearish • 🤔 Uncertain"
                 
                 text = (
                     f"🚨 **{chain_emoji} {chain} RUNNER ALERT** 🚨\n\n"
-                    f"🎯 **{hit['name']}** (${hit['symbol']})\n"
+                    f"🎯 **{hit.title}** (${hit.ticker})\n"
                     f"**Score:** {runner_score}/5 ⭐\n"
                     f"{potential}\n\n"
                     f"💰 **MARKET DATA**\n"
                     f"• Market Cap: {mc_formatted}\n"
                     f"• Liquidity: {lp_formatted}\n"
-                    f"• Holders: {hit['holders']:,}\n"
+                    f"• Holders: {hit.holders:,}\n"
                     f"• Age: {age_str}\n\n"
                     f"🔗 **LINKS**\n"
-                    f"• [Chart]({hit['chart']})\n"
+                    f"• [Chart]({hit.url})\n"
                     f"• {explorer_link}\n"
                     f"{pump_link}\n"
                     f"**Chain:** {chain}\n"
                     f"**Why This Matters:** Fresh {chain.lower()} token with runner characteristics detected by multi-source analysis{paper_trade_msg}{sentiment_msg}"
                 )
-                if ch: 
-                    message = await ch.send(text)
-                    # Register alert for sentiment tracking
-                    try:
-                        from sentiment_tracker import register_runner_alert
-                        register_runner_alert(
-                            str(message.id),
-                            hit['token'],
-                            hit['symbol'],
-                            hit['chain'].lower(),
-                            runner_score
-                        )
-                        # Add initial reaction options for users
-                        await message.add_reaction("🚀")  # Bullish
-                        await message.add_reaction("📉")  # Bearish  
-                        await message.add_reaction("🤔")  # Uncertain
-                        
-                        # Enhanced data for Solana tokens using Helius
-                        if hit['chain'].lower() == 'solana':
-                            try:
-                                from helius_integration import get_enhanced_solana_data
-                                enhanced_data = get_enhanced_solana_data(hit['token'])
-                                if enhanced_data and enhanced_data.get('risk_flags'):
-                                    risk_flags = enhanced_data['risk_flags']
-                                    print(f"[helius] Risk flags for {hit['symbol']}: {risk_flags}")
-                                    
-                                    # Add risk warning to message if critical risks detected
-                                    if any(flag in ['HIGH_WHALE_CONCENTRATION', 'LOW_HOLDER_COUNT'] for flag in risk_flags):
-                                        warning_msg = f"\n⚠️ **Risk Warning**: {', '.join(risk_flags).replace('_', ' ').lower()}"
-                                        # Send follow-up message with risk analysis
-                                        await ch.send(f"🔍 **Helius Risk Analysis for {hit['symbol']}**{warning_msg}")
-                                        
-                                if enhanced_data and enhanced_data.get('holder_count'):
-                                    holder_count = enhanced_data['holder_count']
-                                    whale_conc = enhanced_data.get('whale_concentration', 0)
-                                    print(f"[helius] {hit['symbol']}: {holder_count} holders, whale concentration: {whale_conc:.1f}%")
-                                    
-                                    # Add Helius insights to the main alert message
-                                    if holder_count > 0:
-                                        helius_insight = f"\n🔍 **Helius**: {holder_count:,} holders, {whale_conc:.1f}% whale concentration"
-                                        if risk_flags:
-                                            helius_insight += f" | ⚠️ {len(risk_flags)} risk flags"
-                                        await ch.send(f"📊 **Enhanced Analysis for {hit['symbol']}**{helius_insight}")
-                            except Exception as e:
-                                print(f"[helius] Error getting enhanced data: {e}")
-                        
-                        # Enhanced data for Ethereum tokens using Alchemy
-                        elif hit['chain'].lower() == 'ethereum':
-                            try:
-                                from alchemy_integration import get_enhanced_ethereum_data
-                                enhanced_data = get_enhanced_ethereum_data(hit['token'])
-                                if enhanced_data and enhanced_data.get('risk_flags'):
-                                    risk_flags = enhanced_data['risk_flags']
-                                    print(f"[alchemy] Risk flags for {hit['symbol']}: {risk_flags}")
-                                    
-                                    # Add risk warning to message if critical risks detected
-                                    if any(flag in ['LOW_ACTIVITY', 'ZERO_SUPPLY'] for flag in risk_flags):
-                                        warning_msg = f"\n⚠️ **Risk Warning**: {', '.join(risk_flags).replace('_', ' ').lower()}"
-                                        # Send follow-up message with risk analysis
-                                        await ch.send(f"🔍 **Alchemy Risk Analysis for {hit['symbol']}**{warning_msg}")
-                                
-                                if enhanced_data and enhanced_data.get('transaction_count'):
-                                    tx_count = enhanced_data['transaction_count']
-                                    activity_score = enhanced_data.get('activity_score', 0)
-                                    print(f"[alchemy] {hit['symbol']}: {tx_count} recent transactions, activity score: {activity_score:.1f}")
-                                    
-                                    # Add Alchemy insights to the main alert message
-                                    if tx_count > 0:
-                                        alchemy_insight = f"\n⚗️ **Alchemy**: {tx_count} recent transactions, activity score: {activity_score:.1f}/5.0"
-                                        if enhanced_data.get('risk_flags'):
-                                            alchemy_insight += f" | ⚠️ {len(enhanced_data['risk_flags'])} risk flags"
-                                        await ch.send(f"📊 **Enhanced Analysis for {hit['symbol']}**{alchemy_insight}")
-                            except Exception as e:
-                                print(f"[alchemy] Error getting enhanced data: {e}")
-                    except Exception as e:
-                        print(f"[sentiment_tracker] Error registering alert or adding reactions: {e}")
-                webhook_send(text)
+                # Enrichment starts now, concurrently for every hit; the alert waits for it up to the deadline
+                if ch or WEBHOOK_URL:
+                    enrichment = start_enrichment(hit)
+                    asyncio.create_task(post_alert(ch, hit, text, enrichment, time.monotonic()),
+                                        name=f"post_alert:{hit.ticker}")
         except Exception as e:
             print("[scanner_loop]", e)
-        
-        await asyncio.sleep(20)  # gentle poll for free tier
+
+async def post_alert(ch, hit, text, enrichment, started):
+    """Post one alert with the enrichment that finished by the deadline; attach late results afterwards"""
+    embed = enrichment_embed(hit, await within_deadline(enrichment, started))
+    late = enrichment is not None and not enrichment.done()
+    embeds = [embed] if embed else None
+    alert = discord_dispatch.send_alert(ch, text, embeds) if ch else None
+    if WEBHOOK_URL:
+        discord_dispatch.send_webhook(WEBHOOK_URL, text, embeds)
+    
+    message = None
+    if alert is not None:
+        try:
+            message = await alert  # None when merged into a batched alert message
+        except Exception as e:
+            print(f"[scanner_loop] Alert for {hit.ticker} not sent: {e}")
+    
+    if message is not None:
+        # Register alert for sentiment tracking
+        try:
+            from sentiment_tracker import register_runner_alert
+            register_runner_alert(
+                str(message.id),
+                hit.token,
+                hit.ticker,
+                hit.chain.lower(),
+                hit.runner_score
+            )
+            # Add initial reaction options for users
+            discord_dispatch.add_reactions(message, ("🚀", "📉", "🤔"))  # Bullish, Bearish, Uncertain
+        except Exception as e:
+            print(f"[sentiment_tracker] Error registering alert or adding reactions: {e}")
+    
+    # Enrichment that missed the deadline updates the posted alert (the webhook copy stays as sent)
+    if late and ch:
+        late_embed = enrichment_embed(hit, await late_result(enrichment))
+        if late_embed is None:
+            return
+        if message is not None and len(message.embeds) < 10:
+            discord_dispatch.edit_embeds(message, message.embeds + [late_embed])
+        else:
+            discord_dispatch.send_followup(ch, f"📊 **Enhanced Analysis for {hit.ticker}**", [late_embed])
+
 print(f"[diag] TOKEN present: {n(bool(TOKEN))}")
 print(f"[diag] CHANNEL env (DISCORD_CHANNEL_ID or CHANNEL_ID) present: {n(bool(CHAN_ENV))}")
 print(f"[diag] WEBHOOK_URL present: {n(bool(WEBHOOK_URL))}")
@@ -193,24 +170,40 @@ CHANNEL_ID = int(CHAN_ENV) if CHAN_ENV else 0
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Long rate-limit waits raise discord.RateLimited so the dispatcher can requeue instead of stalling
+bot = commands.Bot(command_prefix="!", intents=intents, max_ratelimit_timeout=30.0)
+
+@bot.before_invoke
+async def label_command(ctx):
+    """Attribute event-loop stalls during a command to the command"""
+    loop_monitor.label_current_task(f"!{ctx.command.qualified_name}")
+
+@bot.after_invoke
+async def unlabel_command(ctx):
+    loop_monitor.label_current_task(None)
 
 def webhook_send(text: str):
     if WEBHOOK_URL:
         try:
-            r = requests.post(WEBHOOK_URL, json={"content": text}, timeout=10)
+            r = http_client.post(WEBHOOK_URL, json={"content": text})
             print(f"[diag] webhook status: {r.status_code}")
         except Exception as e:
             print(f"[diag] webhook failed: {e}")
 
+async def webhook_send_async(text: str):
+    """webhook_send from a coroutine: the rate-limited POST runs off the event loop"""
+    if WEBHOOK_URL:
+        await asyncio.to_thread(webhook_send, text)
+
 @bot.event
 async def on_ready():
     from datetime import datetime
     print(f"[diag] Logged in as {bot.user} (id: {bot.user.id})")
     print(f"[diag] guilds: {[g.name for g in bot.guilds]}")
     
-    # Start scanner loop
-    bot.loop.create_task(scanner_loop())
+    # Start the outbound queue, then the scanner loop that feeds it
+    discord_dispatch.start(bot.loop)
+    bot.loop.create_task(scanner_loop(), name="scanner_loop")
     
     # Bot is ready and connected
     
@@ -250,30 +243,28 @@ async def on_ready():
             print("[diag] channel not found – check ID and that bot is in this server")
     else:
         print("[diag] CHANNEL_ID missing")
-    webhook_send(msg)
+    await webhook_send_async(msg)
 
 @bot.command()
 async def alert(ctx, token: str="SIMPS", chain: str="Solana",
                 mc: str="$120K", lp: str="$17K", holders: str="312"):
     text = f"🚨 **Alpha Alert**\n${token} | {chain}\nMC: {mc} | LP: {lp} | Holders: {holders}"
     await ctx.send(text)
-    webhook_send(text)
+    await webhook_send_async(text)
 
 @bot.command()
 async def scan(ctx):
     """Raw test: fetch recent pairs via DexScreener search (no filters)."""
-    import requests
-
     total = 0
     for chain in ["solana", "ethereum"]:
         url = f"https://api.dexscreener.com/latest/dex/search?q={chain}"
         try:
-            r = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+            r = await asyncio.to_thread(http_client.get, url)
             await ctx.send(f"{chain} HTTP {r.status_code}")
             if r.status_code != 200:
                 continue
-
             data = r.json()
+
             pairs = data.get("pairs", [])[:3]   # just show first 3 results
             total += len(pairs)
 
@@ -314,7 +305,7 @@ async def paper_enter(ctx, token_address: str = None, size: str = None):
         chain = "ethereum" if len(token_address) == 42 and token_address.startswith("0x") else "solana"
         symbol = token_address[:8] + "..." if len(token_address) > 8 else token_address
         
-        result = paper_engine.enter_position(token_address, symbol, chain, size_usd)
+        result = await asyncio.to_thread(paper_engine.enter_position, token_address, symbol, chain, size_usd)
         await ctx.send(result["message"])
     except ValueError:
         await ctx.send("Invalid size amount")
@@ -331,7 +322,7 @@ async def paper_exit(ctx, token_identifier: str = None):
         return
     
     try:
-        result = paper_engine.exit_position(token_identifier)
+        result = await asyncio.to_thread(paper_engine.exit_position, token_identifier)
         await ctx.send(result["message"])
     except Exception as e:
         await ctx.send(f"Error exiting position: {e}")
@@ -342,7 +333,7 @@ async def paper_pnl(ctx):
     from paper_trading import paper_engine
     
     try:
-        summary = paper_engine.get_pnl_summary()
+        summary = await asyncio.to_thread(paper_engine.get_pnl_summary)
         
         response = f"📊 **Paper Trading Summary**\n\n"
         response += f"💰 **P/L Overview**\n"
@@ -407,15 +398,24 @@ async def enhanced_analyze(ctx, token_address: str = None, chain: str = "auto"):
                 return
         
         if chain.lower() == "solana":
-            from helius_integration import get_enhanced_solana_data, is_helius_available
+            from helius_integration import get_enhanced_solana_data_async, is_helius_available
             
             if not is_helius_available():
                 await ctx.send("Helius API not available for Solana analysis")
                 return
             
-            await ctx.send(f"🔍 Analyzing Solana token {token_address[:8]}... (using Helius)")
+            status = await ctx.send(f"🔍 Analyzing Solana token {token_address[:8]}... (using Helius)")
+            last_update = [time.monotonic()]
+            
+            def holder_progress(scan):
+                # Large tokens take many holder pages: show the running count, at most every 2s
+                if time.monotonic() - last_update[0] >= 2:
+                    last_update[0] = time.monotonic()
+                    asyncio.ensure_future(status.edit(
+                        content=f"🔍 Analyzing Solana token {token_address[:8]}... "
+                                f"{scan.holder_count:,} holders scanned ({scan.pages} pages)"))
             
-            enhanced_data = get_enhanced_solana_data(token_address)
+            enhanced_data = await get_enhanced_solana_data_async(token_address, holder_progress)
             
             if not enhanced_data:
                 await ctx.send("Could not retrieve enhanced data for this token")
@@ -431,7 +431,8 @@ async def enhanced_analyze(ctx, token_address: str = None, chain: str = "auto"):
                 response += f"• Verified: {'✅' if enhanced_data.get('verified', False) else '❌'}\n\n"
             
             response += f"👥 **Holder Analysis**\n"
-            response += f"• Total Holders: {enhanced_data.get('holder_count', 0):,}\n"
+            holders_suffix = "" if enhanced_data.get('holders_complete', True) else "+"
+            response += f"• Total Holders: {enhanced_data.get('holder_count', 0):,}{holders_suffix}\n"
             response += f"• Whale Concentration: {enhanced_data.get('whale_concentration', 0):.1f}%\n\n"
             
             risk_flags = enhanced_data.get('risk_flags', [])
@@ -453,7 +454,7 @@ async def enhanced_analyze(ctx, token_address: str = None, chain: str = "auto"):
                 response += "🟡 Medium Risk (Some Concerns)"
                 
         elif chain.lower() == "ethereum":
-            from alchemy_integration import get_enhanced_ethereum_data, is_alchemy_available
+            from alchemy_integration import get_enhanced_ethereum_data_async, is_alchemy_available
             
             if not is_alchemy_available():
                 await ctx.send("Alchemy API not available for Ethereum analysis")
@@ -461,7 +462,7 @@ async def enhanced_analyze(ctx, token_address: str = None, chain: str = "auto"):
             
             await ctx.send(f"🔍 Analyzing Ethereum token {token_address[:8]}... (using Alchemy)")
             
-            enhanced_data = get_enhanced_ethereum_data(token_address)
+            enhanced_data = await get_enhanced_ethereum_data_async(token_address)
             
             if not enhanced_data:
                 await ctx.send("Could not retrieve enhanced data for this token")
@@ -478,7 +479,8 @@ async def enhanced_analyze(ctx, token_address: str = None, chain: str = "auto"):
                 response += f"• Total Supply: {enhanced_data.get('total_supply', 0):,}\n\n"
             
             response += f"📊 **Activity Analysis**\n"
-            response += f"• Recent Transactions: {enhanced_data.get('transaction_count', 0):,}\n"
+            response += f"• Transfers (last hour): {enhanced_data.get('transaction_count', 0):,}\n"
+            response += f"• Unique Senders: {enhanced_data.get('unique_senders', 0):,}\n"
             response += f"• Activity Score: {enhanced_data.get('activity_score', 0):.1f}/5.0\n\n"
             
             risk_flags = enhanced_data.get('risk_flags', [])
@@ -511,7 +513,7 @@ async def enhanced_analyze(ctx, token_address: str = None, chain: str = "auto"):
 @bot.command(name='whale')
 async def whale_management(ctx, action: str = None, chain: str = None, address: str = None):
     """Whale tracking: !whale [add|remove|list] [ethereum|solana] [address]"""
-    from whale_tracker import add_whale_address, remove_whale_address, whale_tracker
+    from whale_tracker import add_whale_address, is_tracked_whale, remove_whale_address, whale_tracker
     
     if not action:
         await ctx.send("Usage: `!whale [add|remove|list] [ethereum|solana] [address]`\n"
@@ -528,18 +530,18 @@ async def whale_management(ctx, action: str = None, chain: str = None, address:
                 return
             
             if chain.lower() == "ethereum":
-                whales = whale_tracker.get_eth_whales()
+                whales = whale_tracker.get_eth_whales(limit=20)
                 if whales:
-                    whale_list = "\n".join([f"• `{addr[:8]}...{addr[-6:]}`" for addr in whales[:20]])
-                    await ctx.send(f"🐋 **Ethereum Whales Tracked** ({len(whales)} total)\n{whale_list}")
+                    whale_list = "\n".join([f"• `{addr[:8]}...{addr[-6:]}`" for addr in whales])
+                    await ctx.send(f"🐋 **Ethereum Whales Tracked** ({len(whale_tracker.eth_whales):,} total)\n{whale_list}")
                 else:
                     await ctx.send("No Ethereum whale addresses tracked")
             
             elif chain.lower() == "solana":
-                whales = whale_tracker.get_sol_whales()
+                whales = whale_tracker.get_sol_whales(limit=20)
                 if whales:
-                    whale_list = "\n".join([f"• `{addr[:8]}...{addr[-6:]}`" for addr in whales[:20]])
-                    await ctx.send(f"🐋 **Solana Whales Tracked** ({len(whales)} total)\n{whale_list}")
+                    whale_list = "\n".join([f"• `{addr[:8]}...{addr[-6:]}`" for addr in whales])
+                    await ctx.send(f"🐋 **Solana Whales Tracked** ({len(whale_tracker.sol_whales):,} total)\n{whale_list}")
                 else:
                     await ctx.send("No Solana whale addresses tracked")
             
@@ -551,8 +553,10 @@ async def whale_management(ctx, action: str = None, chain: str = None, address:
             success = add_whale_address(chain.lower(), address)
             if success:
                 await ctx.send(f"✅ Added {chain.lower()} whale address `{address[:8]}...{address[-6:]}`")
+            elif is_tracked_whale(chain.lower(), address):
+                await ctx.send(f"ℹ️ Address already tracked")
             else:
-                await ctx.send(f"❌ Address already tracked or invalid format")
+                await ctx.send(f"❌ Invalid {chain.lower()} address")
         
         elif action.lower() == "remove":
             if not chain or not address:
@@ -611,52 +615,37 @@ async def on_reaction_remove(reaction, user):
     except Exception as e:
         print(f"[sentiment_tracker] Error handling reaction remove: {e}")
 
-# Simplified ETH whale commands for quick management
-import json
-WHALES_ETH_FILE = "whales_eth.json"
-
-def _load_eth():
-    try: return set(json.load(open(WHALES_ETH_FILE)))
-    except: return set()
-
-def _save_eth(s):
-    try: json.dump(list(s), open(WHALES_ETH_FILE, "w"))
-    except: pass
+# Simplified ETH whale commands for quick management (same shared lists as !whale)
+from whale_tracker import eth_whales, sol_whales
 
-# Solana whale management helpers
-WHALES_SOL_FILE = "whales_sol.json"
-
-def _load_sol():
-    try: 
-        return set(json.load(open(WHALES_SOL_FILE)))
-    except: 
-        return set()
-
-def _save_sol(s):
-    try: 
-        json.dump(list(s), open(WHALES_SOL_FILE, "w"))
-    except: 
-        pass
+LIST_LIMIT = 40  # addresses shown by the list commands (Discord messages cap at 2000 chars)
 
 @bot.command()
 async def whaleadd(ctx, addr: str):
     """Quick add ETH whale: !whaleadd 0x123..."""
-    s = _load_eth(); s.add(addr.lower()); _save_eth(s)
-    await ctx.send(f"✅ Added ETH whale: `{addr}`")
+    if eth_whales.add(addr):
+        await ctx.send(f"✅ Added ETH whale: `{addr}`")
+    elif addr in eth_whales:
+        await ctx.send(f"ℹ️ ETH whale already tracked: `{addr}`")
+    else:
+        await ctx.send(f"❌ Invalid ETH address: `{addr}`")
 
 @bot.command()
 async def whaledel(ctx, addr: str):
     """Quick remove ETH whale: !whaledel 0x123..."""
-    s = _load_eth(); s.discard(addr.lower()); _save_eth(s)
-    await ctx.send(f"✅ Removed ETH whale: `{addr}`")
+    if eth_whales.remove(addr):
+        await ctx.send(f"✅ Removed ETH whale: `{addr}`")
+    else:
+        await ctx.send(f"❌ ETH whale not tracked: `{addr}`")
 
 @bot.command()
 async def whalelist(ctx):
-    """List all tracked ETH whales: !whalelist"""
-    s = _load_eth()
-    if s:
-        whale_list = "\n".join(f"- `{a[:8]}...{a[-6:]}`" for a in sorted(s))
-        await ctx.send(f"🐋 **ETH Whales Tracked** ({len(s)} total):\n{whale_list}")
+    """List tracked ETH whales: !whalelist"""
+    total = len(eth_whales)
+    if total:
+        whale_list = "\n".join(f"- `{a[:8]}...{a[-6:]}`" for a in eth_whales.first(LIST_LIMIT))
+        more = f"\n…and {total - LIST_LIMIT:,} more" if total > LIST_LIMIT else ""
+        await ctx.send(f"🐋 **ETH Whales Tracked** ({total:,} total):\n{whale_list}{more}")
     else:
         await ctx.send("No ETH whales tracked yet.")
 
@@ -664,22 +653,29 @@ async def whalelist(ctx):
 @bot.command()
 async def swhaleadd(ctx, addr: str):
     """Quick add SOL whale: !swhaleadd 9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM"""
-    s = _load_sol(); s.add(addr); _save_sol(s)
-    await ctx.send(f"✅ Added SOL whale: `{addr}`")
+    if sol_whales.add(addr):
+        await ctx.send(f"✅ Added SOL whale: `{addr}`")
+    elif addr in sol_whales:
+        await ctx.send(f"ℹ️ SOL whale already tracked: `{addr}`")
+    else:
+        await ctx.send(f"❌ Invalid SOL address: `{addr}`")
 
 @bot.command()
 async def swhaledel(ctx, addr: str):
     """Quick remove SOL whale: !swhaledel 9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM"""
-    s = _load_sol(); s.discard(addr); _save_sol(s)
-    await ctx.send(f"✅ Removed SOL whale: `{addr}`")
+    if sol_whales.remove(addr):
+        await ctx.send(f"✅ Removed SOL whale: `{addr}`")
+    else:
+        await ctx.send(f"❌ SOL whale not tracked: `{addr}`")
 
 @bot.command()
 async def swhalelist(ctx):
-    """List all tracked SOL whales: !swhalelist"""
-    s = _load_sol()
-    if s:
-        whale_list = "\n".join(f"- `{a[:8]}...{a[-6:]}`" for a in sorted(s))
-        await ctx.send(f"🐋 **SOL Whales Tracked** ({len(s)} total):\n{whale_list}")
+    """List tracked SOL whales: !swhalelist"""
+    total = len(sol_whales)
+    if total:
+        whale_list = "\n".join(f"- `{a[:8]}...{a[-6:]}`" for a in sol_whales.first(LIST_LIMIT))
+        more = f"\n…and {total - LIST_LIMIT:,} more" if total > LIST_LIMIT else ""
+        await ctx.send(f"🐋 **SOL Whales Tracked** ({total:,} total):\n{whale_list}{more}")
     else:
         await ctx.send("No SOL whales tracked yet.")
 
@@ -731,7 +727,7 @@ async def send_alert(alert_id):
         
         # Fallback to webhook
         if WEBHOOK_URL:
-            webhook_send(message)
+            await webhook_send_async(message)
             alert.status = 'sent'
             alert.sent_at = datetime.utcnow()
             
@@ -768,4 +764,8 @@ async def send_alert(alert_id):
 async def run_discord_bot():
     if not TOKEN:
         raise RuntimeError("Missing DISCORD_TOKEN secret")
-    await bot.start(TOKEN)
\ No newline at end of file
+    loop_monitor.start(asyncio.get_running_loop())
+    try:
+        await bot.start(TOKEN)
+    finally:
+        await async_http.close()
\ No newline at end of file
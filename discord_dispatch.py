@@ -0,0 +1,303 @@
+"""
+Outbound Discord Dispatch Queue
+Every scanner-generated Discord call goes through one queue: alerts before reactions before
+follow-ups, each route paced by its own token bucket that Discord's rate-limit headers and
+429s feed back into. When alerts back up, pending alerts for the same route are merged into
+one message; stale reactions and follow-ups are dropped.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Dict, List, Optional
+
+import discord
+
+import async_http
+from rate_limiter import TokenBucket, parse_retry_after
+
+ALERT, REACTION, FOLLOWUP = 0, 1, 2  # lower sends first
+PRIORITY_NAMES = {ALERT: 'alert', REACTION: 'reaction', FOLLOWUP: 'followup'}
+
+# route kind -> (tokens per second, burst) from Discord's documented per-route limits
+ROUTE_LIMITS = {
+    'messages': (1.0, 5),   # 5 messages per 5s per channel
+    'reactions': (4.0, 1),  # 1 reaction per 0.25s per channel
+    'webhook': (2.5, 5),    # 5 executions per 2s per webhook
+    'edits': (1.0, 5),      # message edits per channel
+}
+MESSAGE_LIMIT = 2000  # Discord's maximum message length
+EMBED_LIMIT = 10      # embeds per message
+STALE_AFTER = float(os.getenv("DISPATCH_STALE_AFTER", "120"))       # seconds before reactions / follow-ups are dropped
+MAX_QUEUE = int(os.getenv("DISPATCH_MAX_QUEUE", "500"))
+MAX_ATTEMPTS = 3
+MERGE_SEPARATOR = "\n\n━━━━━━━━━━\n\n"
+
+class _Job:
+    __slots__ = ("priority", "seq", "route", "kind", "target", "payload", "embeds", "future", "queued_at", "attempts")
+
+    def __init__(self, priority: int, seq: int, route: str, kind: str, target, payload, embeds, future):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.kind = kind
+        self.target = target
+        self.payload = payload
+        self.embeds = list(embeds or ())
+        self.future = future
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class DiscordDispatcher:
+    """Priority queue of outbound Discord calls drained by one task on the bot's event loop"""
+
+    def __init__(self):
+        self._heap: List[_Job] = []
+        self._seq = itertools.count()
+        self._routes: Dict[str, TokenBucket] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task = None
+        self._busy: Dict[str, asyncio.Task] = {}  # route -> its call in flight; one per route keeps it in order
+        self.sent = {'alert': 0, 'reaction': 0, 'followup': 0, 'edit': 0}
+        self.merged = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried = 0
+        self.rate_limited = 0
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Start draining the queue on loop; later calls (gateway reconnects) reuse the task"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._drain(), name="discord_dispatch")
+
+    # --- enqueueing -------------------------------------------------------------------
+
+    def _route(self, route: str) -> TokenBucket:
+        bucket = self._routes.get(route)
+        if bucket is None:
+            bucket = self._routes[route] = TokenBucket(*ROUTE_LIMITS[route.split(':', 1)[0]])
+        return bucket
+
+    def _enqueue(self, priority: int, route: str, kind: str, target, payload,
+                 embeds=None) -> Optional[asyncio.Future]:
+        """Queue one call; returns a future for its result when called on the loop thread"""
+        if self._loop is None:
+            raise RuntimeError("discord dispatcher not started")
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if not on_loop:  # Flask / worker threads: fire and forget
+            self._loop.call_soon_threadsafe(self._push, priority, route, kind, target, payload, embeds, None)
+            return None
+        future = self._loop.create_future()
+        self._push(priority, route, kind, target, payload, embeds, future)
+        return future
+
+    def _push(self, priority, route, kind, target, payload, embeds, future):
+        heapq.heappush(self._heap, _Job(priority, next(self._seq), route, kind, target, payload, embeds, future))
+        if len(self._heap) > MAX_QUEUE:
+            # Shed the newest job of the lowest priority; alerts are never shed
+            victim = max(self._heap)
+            if victim.priority != ALERT:
+                self._heap.remove(victim)
+                heapq.heapify(self._heap)
+                self._drop(victim)
+        self._wakeup.set()
+
+    def send_alert(self, channel, text: str, embeds=None) -> Optional[asyncio.Future]:
+        """Alert message; the future resolves to the Message, or None if merged into another alert"""
+        return self._enqueue(ALERT, f"messages:{channel.id}", 'alert', channel, text, embeds)
+
+    def add_reactions(self, message, emojis) -> List[asyncio.Future]:
+        futures = [self._enqueue(REACTION, f"reactions:{message.channel.id}", 'reaction', message, emoji)
+                   for emoji in emojis]
+        return [f for f in futures if f is not None]
+
+    def send_followup(self, channel, text: str, embeds=None) -> Optional[asyncio.Future]:
+        return self._enqueue(FOLLOWUP, f"messages:{channel.id}", 'followup', channel, text, embeds)
+
+    def edit_embeds(self, message, embeds) -> Optional[asyncio.Future]:
+        """Replace a posted message's embeds (late enrichment)"""
+        return self._enqueue(FOLLOWUP, f"edits:{message.channel.id}", 'edit', message, None, embeds)
+
+    def send_webhook(self, url: str, text: str, embeds=None) -> Optional[asyncio.Future]:
+        """Webhook copy of an alert; merged like channel alerts when the webhook backs up"""
+        webhook_id = url.rstrip('/').split('/')[-2] if url.count('/') > 1 else url  # never the token
+        return self._enqueue(ALERT, f"webhook:{webhook_id}", 'alert', url, text, embeds)
+
+    # --- draining ---------------------------------------------------------------------
+
+    def _next_ready(self):
+        """Highest-priority job whose route has budget now, else the shortest wait"""
+        now = time.monotonic()
+        stale = [job for job in self._heap if job.priority != ALERT and now - job.queued_at > STALE_AFTER]
+        if stale:
+            for job in stale:
+                self._heap.remove(job)
+                self._drop(job)
+            heapq.heapify(self._heap)
+        soonest = None
+        blocked = set()
+        for job in sorted(self._heap):
+            if job.route in blocked or job.route in self._busy:
+                continue
+            wait = self._route(job.route).ready_in()
+            if wait <= 0:
+                return job, 0.0
+            blocked.add(job.route)  # keep priority order within a route
+            soonest = wait if soonest is None else min(soonest, wait)
+        return None, soonest
+
+    def _coalesce(self, job: _Job) -> _Job:
+        """
+        Merge the route's other pending alerts into job (while they fit in one message)
+        when the route has no budget to send them all separately right now
+        """
+        pending = [j for j in self._heap if j.kind == 'alert' and j.route == job.route]
+        if not pending or self._route(job.route).ready_in(len(pending) + 1) <= 0:
+            return job
+        texts, merged = [job.payload], []
+        length = len(job.payload) + 40  # room for the batch header
+        for other in sorted(pending):
+            if length + len(MERGE_SEPARATOR) + len(other.payload) > MESSAGE_LIMIT:
+                break
+            if len(job.embeds) + len(other.embeds) > EMBED_LIMIT:
+                break
+            texts.append(other.payload)
+            job.embeds.extend(other.embeds)
+            merged.append(other)
+            length += len(MERGE_SEPARATOR) + len(other.payload)
+        if not merged:
+            return job
+        for other in merged:
+            self._heap.remove(other)
+            if other.future is not None and not other.future.done():
+                other.future.set_result(None)
+        heapq.heapify(self._heap)
+        self.merged += len(merged)
+        job.payload = f"📦 **{len(texts)} alerts batched**\n\n" + MERGE_SEPARATOR.join(texts)
+        return job
+
+    async def _drain(self):
+        while True:
+            job, wait = self._next_ready()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._heap.remove(job)
+            heapq.heapify(self._heap)
+            if job.kind == 'alert':
+                job = self._coalesce(job)
+            # Each call runs as its own task so a slow route never holds up the others
+            self._busy[job.route] = self._loop.create_task(self._run(job))
+
+    async def _run(self, job: _Job):
+        try:
+            await self._send(job)
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            self._busy.pop(job.route, None)
+            self._wakeup.set()
+
+    async def _send(self, job: _Job):
+        bucket = self._route(job.route)
+        bucket.reserve(1)
+        job.attempts += 1
+        try:
+            if job.kind == 'reaction':
+                result = await job.target.add_reaction(job.payload)
+            elif job.kind == 'edit':
+                result = await job.target.edit(embeds=job.embeds)
+            elif job.route.startswith('webhook:'):
+                body = {"content": job.payload}
+                if job.embeds:
+                    body["embeds"] = [embed.to_dict() for embed in job.embeds]
+                # One unpaced attempt: the route bucket is the only pacing and 429s come back here
+                result = await async_http.request_once("POST", job.target, json=body)
+                self._observe(bucket, result.status_code, result.headers)
+                if result.status_code == 429:
+                    return self._retry(job)
+                if result.status_code >= 300:
+                    return self._fail(job, RuntimeError(f"webhook HTTP {result.status_code}"))
+            else:
+                result = await job.target.send(job.payload, embeds=job.embeds) if job.embeds else \
+                    await job.target.send(job.payload)
+                bucket.success()
+        except discord.RateLimited as e:  # discord.py gave up waiting (max_ratelimit_timeout)
+            bucket.throttle(e.retry_after)
+            self.rate_limited += 1
+            return self._retry(job)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                self._observe(bucket, 429, e.response.headers)
+                return self._retry(job)
+            return self._fail(job, e)
+        except Exception as e:
+            return self._fail(job, e)
+        self.sent[job.kind] += 1
+        if job.future is not None and not job.future.done():
+            job.future.set_result(result)
+
+    def _observe(self, bucket: TokenBucket, status_code: int, headers):
+        """Feed Discord's rate-limit headers back into the route bucket"""
+        if status_code == 429:
+            self.rate_limited += 1
+            bucket.throttle(parse_retry_after(headers))
+            return
+        bucket.success()
+        if headers.get("X-RateLimit-Remaining") == "0":  # bucket exhausted: wait for its reset
+            reset_after = parse_retry_after(headers)
+            if reset_after:
+                bucket.block(reset_after)
+
+    def _retry(self, job: _Job):
+        if job.attempts >= MAX_ATTEMPTS:
+            return self._fail(job, RuntimeError(f"rate limited {job.attempts} times on {job.route}"))
+        self.retried += 1
+        heapq.heappush(self._heap, job)
+
+    def _fail(self, job: _Job, error: Exception):
+        self.failed += 1
+        print(f"[dispatch] {job.kind} on {job.route.split(':', 1)[0]} failed: {error}")
+        if job.future is not None and not job.future.done():
+            job.future.set_exception(error)
+
+    def _drop(self, job: _Job):
+        self.dropped += 1
+        if job.future is not None and not job.future.done():
+            job.future.cancel()
+
+    def stats(self) -> Dict:
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for job in list(self._heap):
+            depth[PRIORITY_NAMES[job.priority]] += 1
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'queued': depth,
+            'in_flight': len(self._busy),
+            'sent': dict(self.sent),
+            'merged': self.merged,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'retried': self.retried,
+            'rate_limited': self.rate_limited,
+            'routes': {route: bucket.snapshot() for route, bucket in list(self._routes.items())},
+        }
+
+# Global dispatcher shared by the scan loop and the webhook handlers
+discord_dispatch = DiscordDispatcher()
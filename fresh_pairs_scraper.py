@@ -1,6 +1,8 @@
 # fresh_pairs_scraper.py
 import trafilatura
-import requests
+import copy
+import dex_lookup
+import http_client
 from bs4 import BeautifulSoup
 import json
 import time
@@ -18,7 +20,7 @@ def scrape_fresh_pairs(max_pairs=50):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http_client.get(url, headers=headers, timeout=15)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -123,24 +125,28 @@ def get_fresh_pairs_enhanced():
     fresh_pairs = scrape_fresh_pairs(30)
     enhanced_pairs = []
     
+    # Fetch full data for every real pair address in batched /pairs calls (30 per request)
+    api_keys = [
+        (pair.get('chainId', 'solana'), pair.get('pairAddress'))
+        for pair in fresh_pairs
+        if pair.get('pairAddress') and not pair['pairAddress'].startswith('scraped_')
+    ]
+    try:
+        api_pairs = dex_lookup.get_pairs_many(api_keys)
+    except Exception as e:
+        print(f"[scraper] Batched pair lookup failed: {e}")
+        api_pairs = {}
+    
     for pair in fresh_pairs:
         try:
             # Try to get full data from API using pair address
             pair_address = pair.get('pairAddress')
             chain_id = pair.get('chainId', 'solana')
             
-            if pair_address and not pair_address.startswith('scraped_'):
-                api_url = f"https://api.dexscreener.com/latest/dex/pairs/{chain_id}/{pair_address}"
-                
-                try:
-                    response = requests.get(api_url, timeout=10)
-                    if response.status_code == 200:
-                        api_data = response.json()
-                        if api_data.get('pairs'):
-                            enhanced_pairs.extend(api_data['pairs'])
-                            continue
-                except:
-                    pass
+            full_pairs = api_pairs.get((chain_id, pair_address))
+            if full_pairs:
+                enhanced_pairs.extend(copy.deepcopy(full_pairs))
+                continue
             
             # If API call fails, use scraped data
             enhanced_pairs.append(pair)
@@ -3,40 +3,147 @@ Helius API Integration for Enhanced Solana Data
 Provides faster, more reliable Solana token data with additional metrics
 """
 
-import requests
+import async_http
+import heapq
+import http_client
 import os
 import time
-from typing import Dict, List, Optional
+from jsonrpc_batch import as_call, call_many, call_many_async, run_steps, run_steps_async
+from typing import Callable, Dict, Generator, List, Optional
 from datetime import datetime, timedelta
 
+HELIUS_BATCH_LIMIT = int(os.getenv("HELIUS_BATCH_LIMIT", "100"))  # JSON-RPC calls per batched POST
+HOLDER_PAGE_SIZE = 1000  # getTokenAccounts maximum
+MAX_HOLDER_PAGES = int(os.getenv("HELIUS_MAX_HOLDER_PAGES", "500"))  # full scans (!analyze) stop after this many accounts / 1000
+TOP_HOLDERS = 10
+WHALE_CONCENTRATION_LIMIT = 80.0  # % of supply in the top holders -> HIGH_WHALE_CONCENTRATION
+LOW_HOLDER_LIMIT = 10             # fewer holders -> LOW_HOLDER_COUNT
+
+class HolderScan:
+    """
+    Running aggregates of a paginated holder scan: account count, summed balances and a
+    TOP_HOLDERS min-heap, so memory stays O(k) however many holders the token has.
+    With the token's supply known, the scan can stop as soon as the risk flags are decided.
+    """
+
+    __slots__ = ("token_address", "supply", "holder_count", "seen_supply", "top", "cursor", "pages",
+                 "complete", "failed", "max_pages")
+
+    def __init__(self, token_address: str, supply: Optional[int] = None, max_pages: int = MAX_HOLDER_PAGES):
+        self.token_address = token_address
+        self.supply = supply       # total supply from getAsset, in raw units like the balances
+        self.holder_count = 0      # accounts with a non-zero balance
+        self.seen_supply = 0
+        self.top: List[int] = []   # min-heap of the largest balances
+        self.cursor = None
+        self.pages = 0
+        self.complete = False      # every page was read
+        self.failed = False
+        self.max_pages = max_pages  # undecided scans stop here and report a partial holder count
+
+    def add_page(self, page: Optional[Dict]):
+        if page is None:
+            self.failed = True
+            return
+        self.pages += 1
+        accounts = page.get('token_accounts') or []
+        for account in accounts:
+            amount = int(account.get('amount') or 0)
+            if amount <= 0:
+                continue
+            self.holder_count += 1
+            self.seen_supply += amount
+            if len(self.top) < TOP_HOLDERS:
+                heapq.heappush(self.top, amount)
+            elif amount > self.top[0]:
+                heapq.heapreplace(self.top, amount)
+        self.cursor = page.get('cursor')
+        if not self.cursor or len(accounts) < HOLDER_PAGE_SIZE:
+            self.complete = True
+
+    def concentration(self) -> float:
+        """% of supply held by the top holders (of the full supply while the scan is partial)"""
+        total = self.seen_supply if self.complete or not self.supply else self.supply
+        return sum(self.top) / total * 100 if total > 0 else 0.0
+
+    def _concentration_bounds(self) -> Optional[tuple]:
+        """Lowest and highest final concentration given what is unseen, if the supply is known"""
+        if not self.supply:
+            return None
+        top = sum(self.top)
+        unseen = max(0, self.supply - self.seen_supply)
+        return top / self.supply * 100, min(100.0, (top + unseen) / self.supply * 100)
+
+    def decided(self) -> bool:
+        """Whether more pages could still change the risk flags"""
+        if self.complete:
+            return True
+        bounds = self._concentration_bounds()
+        if self.holder_count < LOW_HOLDER_LIMIT or bounds is None:
+            return False
+        low, high = bounds
+        return low > WHALE_CONCENTRATION_LIMIT or high <= WHALE_CONCENTRATION_LIMIT
+
+    @property
+    def done(self) -> bool:
+        return self.failed or self.complete or self.decided() or self.pages >= self.max_pages
+
+def _asset_supply(metadata: Optional[Dict]) -> Optional[int]:
+    try:
+        return int(metadata['token_info']['supply'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
 class HeliusClient:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("HELIUS_API_KEY")
         self.base_url = f"https://mainnet.helius-rpc.com/?api-key={self.api_key}"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'AlphaSniper/1.0'
-        })
+    
+    def _post(self, payload: Dict):
+        """Send one JSON-RPC request through the shared rate-limited client"""
+        return http_client.post(self.base_url, json=payload, timeout=10)
+    
+    def _post_batch(self, chunk: List[Dict]):
+        """Send one JSON-RPC batch array; every call in it counts against the request rate"""
+        return http_client.post(self.base_url, json=chunk, timeout=10, cost=len(chunk))
+    
+    @staticmethod
+    def _metadata_payload(token_address: str) -> Dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": "helius-test",
+            "method": "getAsset",
+            "params": {
+                "id": token_address,
+                "displayOptions": {
+                    "showUnverifiedCollections": True,
+                    "showCollectionMetadata": True,
+                    "showFungibleTokens": True
+                }
+            }
+        }
+    
+    @staticmethod
+    def _holders_payload(token_address: str, limit: int, cursor: Optional[str] = None) -> Dict:
+        payload = {
+            "jsonrpc": "2.0",
+            "id": "helius-holders",
+            "method": "getTokenAccounts",
+            "params": {
+                "mint": token_address,
+                "limit": limit
+            }
+        }
+        if cursor:
+            payload["params"]["cursor"] = cursor
+        return payload
     
     def get_token_metadata(self, token_address: str) -> Optional[Dict]:
         """Get comprehensive token metadata from Helius"""
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": "helius-test",
-                "method": "getAsset",
-                "params": {
-                    "id": token_address,
-                    "displayOptions": {
-                        "showUnverifiedCollections": True,
-                        "showCollectionMetadata": True,
-                        "showFungibleTokens": True
-                    }
-                }
-            }
+            payload = self._metadata_payload(token_address)
             
-            response = self.session.post(self.base_url, json=payload, timeout=10)
+            response = self._post(payload)
             if response.status_code == 200:
                 data = response.json()
                 if 'result' in data and data['result']:
@@ -47,21 +154,12 @@ class HeliusClient:
         
         return None
     
-    def get_token_holders(self, token_address: str, limit: int = 1000) -> Optional[Dict]:
-        """Get token holder information"""
+    def get_token_holders(self, token_address: str, limit: int = 1000, cursor: Optional[str] = None) -> Optional[Dict]:
+        """Get one page of token holder information"""
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": "helius-holders",
-                "method": "getTokenAccounts",
-                "params": {
-                    "mint": token_address,
-                    "limit": limit,
-                    "cursor": None
-                }
-            }
+            payload = self._holders_payload(token_address, limit, cursor)
             
-            response = self.session.post(self.base_url, json=payload, timeout=10)
+            response = self._post(payload)
             if response.status_code == 200:
                 data = response.json()
                 if 'result' in data:
@@ -72,6 +170,13 @@ class HeliusClient:
         
         return None
     
+    def get_token_metadata_many(self, token_addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        """Token metadata for many tokens, HELIUS_BATCH_LIMIT calls per POST"""
+        tokens = list(dict.fromkeys(token_addresses))
+        results = call_many(self._post_batch, [as_call(self._metadata_payload(token)) for token in tokens],
+                            HELIUS_BATCH_LIMIT, "helius-metadata")
+        return {token: result or None for token, result in zip(tokens, results)}
+    
     def get_token_transactions(self, token_address: str, limit: int = 100) -> Optional[List]:
         """Get recent token transactions for volume/activity analysis"""
         try:
@@ -86,7 +191,7 @@ class HeliusClient:
                 }
             }
             
-            response = self.session.post(self.base_url, json=payload, timeout=10)
+            response = self._post(payload)
             if response.status_code == 200:
                 data = response.json()
                 if 'result' in data:
@@ -97,8 +202,51 @@ class HeliusClient:
         
         return None
     
-    def enhanced_token_analysis(self, token_address: str) -> Dict:
+    def enhanced_token_analysis(self, token_address: str, progress: Callable = None) -> Dict:
         """Get enhanced token analysis combining multiple Helius endpoints"""
+        return self.enhanced_token_analysis_many([token_address], progress)[token_address]
+    
+    def enhanced_token_analysis_many(self, token_addresses: List[str], progress: Callable = None,
+                                     max_pages: int = MAX_HOLDER_PAGES) -> Dict[str, Dict]:
+        """
+        enhanced_token_analysis for many tokens: metadata and first holder pages in one batch,
+        then each round batches the next holder page of every token still undecided (up to max_pages)
+        """
+        tokens = list(dict.fromkeys(token_addresses))
+        return run_steps(self._analysis_steps(tokens, progress, max_pages),
+                         lambda calls: call_many(self._post_batch, calls, HELIUS_BATCH_LIMIT, "helius-analysis"))
+    
+    @staticmethod
+    def _analysis_steps(tokens: List[str], progress: Callable = None,
+                        max_pages: int = MAX_HOLDER_PAGES) -> Generator[List[tuple], List, Dict]:
+        """
+        Yields batches of calls and is sent their results; progress(scan) runs after every page.
+        Returns token -> analysis.
+        """
+        scans = {token: HolderScan(token, max_pages=max_pages) for token in tokens}
+        results = yield ([as_call(HeliusClient._metadata_payload(token)) for token in tokens] +
+                         [as_call(HeliusClient._holders_payload(token, HOLDER_PAGE_SIZE)) for token in tokens])
+        metadata = {token: results[i] or None for i, token in enumerate(tokens)}
+        for i, token in enumerate(tokens):
+            scans[token].supply = _asset_supply(metadata[token])
+            scans[token].add_page(results[len(tokens) + i])
+            if progress:
+                progress(scans[token])
+        while True:
+            active = [scan for scan in scans.values() if not scan.done]
+            if not active:
+                break
+            results = yield [as_call(HeliusClient._holders_payload(scan.token_address, HOLDER_PAGE_SIZE, scan.cursor))
+                             for scan in active]
+            for scan, page in zip(active, results):
+                scan.add_page(page)
+                if progress:
+                    progress(scan)
+        return {token: HeliusClient._analysis(token, metadata[token], scans[token]) for token in tokens}
+    
+    @staticmethod
+    def _analysis(token_address: str, metadata: Optional[Dict], holders: Optional[HolderScan]) -> Dict:
+        """Combine the metadata and holder scan into one analysis (shared by the async client)"""
         result = {
             'token_address': token_address,
             'metadata': None,
@@ -112,8 +260,7 @@ class HeliusClient:
             'risk_flags': []
         }
         
-        # Get basic metadata
-        metadata = self.get_token_metadata(token_address)
+        # Basic metadata
         if metadata:
             result['metadata'] = metadata
             result['verified'] = metadata.get('burnt', False) == False
@@ -124,33 +271,73 @@ class HeliusClient:
                 result['name'] = content.get('metadata', {}).get('name', 'Unknown')
                 result['symbol'] = content.get('metadata', {}).get('symbol', 'UNK')
         
-        # Get holder analysis
-        holders_data = self.get_token_holders(token_address)
-        if holders_data and 'token_accounts' in holders_data:
-            accounts = holders_data['token_accounts']
-            result['holder_count'] = len(accounts)
-            
-            # Calculate holder distribution
-            if accounts:
-                balances = [float(acc.get('amount', 0)) for acc in accounts if acc.get('amount')]
-                if balances:
-                    total_supply = sum(balances)
-                    balances.sort(reverse=True)
-                    
-                    # Top holder concentration
-                    top_10_supply = sum(balances[:10]) if len(balances) >= 10 else sum(balances)
-                    result['whale_concentration'] = (top_10_supply / total_supply * 100) if total_supply > 0 else 0
-                    
-                    # Risk flags
-                    if result['whale_concentration'] > 80:
-                        result['risk_flags'].append('HIGH_WHALE_CONCENTRATION')
-                    if result['holder_count'] < 10:
-                        result['risk_flags'].append('LOW_HOLDER_COUNT')
+        # Holder analysis from the streamed scan
+        if holders and holders.pages:
+            result['holder_count'] = holders.holder_count
+            result['holders_complete'] = holders.complete
+            result['holder_pages'] = holders.pages
+            if holders.holder_count:
+                result['whale_concentration'] = holders.concentration()
+                
+                # Risk flags
+                if result['whale_concentration'] > WHALE_CONCENTRATION_LIMIT:
+                    result['risk_flags'].append('HIGH_WHALE_CONCENTRATION')
+                if result['holder_count'] < LOW_HOLDER_LIMIT:
+                    result['risk_flags'].append('LOW_HOLDER_COUNT')
         
         return result
 
-# Global Helius client
+class AsyncHeliusClient:
+    """
+    Awaitable Helius client for the bot's event loop, on the pooled aiohttp session.
+    Request payloads and the analysis are shared with the sync HeliusClient.
+    """
+
+    def __init__(self, client: HeliusClient):
+        self.client = client
+    
+    async def _rpc(self, payload: Dict, what: str, token_address: str, require_value: bool) -> Optional:
+        try:
+            response = await async_http.post(self.client.base_url, json=payload, timeout=10)
+            if response.status_code == 200:
+                data = response.json()
+                if 'result' in data and (data['result'] or not require_value):
+                    return data['result']
+        except Exception as e:
+            print(f"[helius] Error getting {what} for {token_address}: {e}")
+        return None
+    
+    async def _post_batch(self, chunk: List[Dict]):
+        return await async_http.post(self.client.base_url, json=chunk, timeout=10, cost=len(chunk))
+    
+    async def get_token_metadata(self, token_address: str) -> Optional[Dict]:
+        return await self._rpc(HeliusClient._metadata_payload(token_address), "token metadata", token_address, True)
+    
+    async def get_token_holders(self, token_address: str, limit: int = 1000, cursor: Optional[str] = None) -> Optional[Dict]:
+        return await self._rpc(HeliusClient._holders_payload(token_address, limit, cursor), "holders",
+                               token_address, False)
+    
+    async def enhanced_token_analysis(self, token_address: str, progress: Callable = None) -> Dict:
+        """Same rounds as the sync client, awaited on the pooled session"""
+        return (await self.enhanced_token_analysis_many([token_address], progress))[token_address]
+    
+    async def get_token_metadata_many(self, token_addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        tokens = list(dict.fromkeys(token_addresses))
+        results = await call_many_async(self._post_batch,
+                                        [as_call(HeliusClient._metadata_payload(token)) for token in tokens],
+                                        HELIUS_BATCH_LIMIT, "helius-metadata")
+        return {token: result or None for token, result in zip(tokens, results)}
+    
+    async def enhanced_token_analysis_many(self, token_addresses: List[str], progress: Callable = None,
+                                           max_pages: int = MAX_HOLDER_PAGES) -> Dict[str, Dict]:
+        tokens = list(dict.fromkeys(token_addresses))
+        return await run_steps_async(HeliusClient._analysis_steps(tokens, progress, max_pages),
+                                     lambda calls: call_many_async(self._post_batch, calls, HELIUS_BATCH_LIMIT,
+                                                                   "helius-analysis"))
+
+# Global Helius clients: sync for Flask and worker threads, async for the bot loop
 helius_client = HeliusClient()
+async_helius_client = AsyncHeliusClient(helius_client)
 
 def get_enhanced_solana_data(token_address: str) -> Dict:
     """Get enhanced Solana token data using Helius API"""
@@ -160,6 +347,26 @@ def get_enhanced_solana_data(token_address: str) -> Dict:
     
     return helius_client.enhanced_token_analysis(token_address)
 
+async def get_enhanced_solana_data_async(token_address: str, progress: Callable = None) -> Dict:
+    """Awaitable get_enhanced_solana_data for code on the event loop; progress(scan) runs per holder page"""
+    if not helius_client.api_key:
+        print("[helius] No API key configured, using fallback data")
+        return {}
+    
+    return await async_helius_client.enhanced_token_analysis(token_address, progress)
+
+async def get_enhanced_solana_data_many_async(token_addresses: List[str],
+                                              max_pages: int = MAX_HOLDER_PAGES) -> Dict[str, Dict]:
+    """
+    get_enhanced_solana_data_async for many tokens in shared batched rounds, keyed by token;
+    max_pages bounds the holder pages read per token (alert enrichment passes a small cap)
+    """
+    if not helius_client.api_key:
+        print("[helius] No API key configured, using fallback data")
+        return {}
+    
+    return await async_helius_client.enhanced_token_analysis_many(token_addresses, max_pages=max_pages)
+
 def is_helius_available() -> bool:
     """Check if Helius API is available and configured"""
     return helius_client.api_key is not None
\ No newline at end of file
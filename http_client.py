@@ -0,0 +1,159 @@
+"""
+Shared HTTP Client for Upstream APIs
+One pooled keep-alive session with per-host pool sizes, default timeouts and a common User-Agent
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from rate_limiter import rate_limiter
+from response_cache import CoalescingCache
+
+USER_AGENT = os.getenv("HTTP_USER_AGENT", "Mozilla/5.0 (compatible; AlphaSniper/1.0)")
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+DEFAULT_POOL_SIZE = 4
+RESPONSE_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", "5"))  # seconds
+RESPONSE_CACHE_SIZE = int(os.getenv("HTTP_CACHE_SIZE", "256"))
+MAX_429_RETRIES = int(os.getenv("HTTP_MAX_429_RETRIES", "3"))
+
+# Keep-alive connections held per upstream host
+HOST_POOL_SIZES = {
+    "api.dexscreener.com": 16,
+    "mainnet.helius-rpc.com": 8,
+    "eth-mainnet.g.alchemy.com": 8,
+    "discord.com": 4,
+    "public-api.birdeye.so": 2,
+    "api.solscan.io": 2,
+    "api.coingecko.com": 2,
+    "dexscreener.com": 2,
+}
+
+class _PoolStats:
+    """Thread-safe per-host request and connection counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.new_connections: Dict[str, int] = {}
+
+    def request_sent(self, host: str):
+        with self._lock:
+            self.requests[host] = self.requests.get(host, 0) + 1
+
+    def connection_opened(self, host: str):
+        with self._lock:
+            self.new_connections[host] = self.new_connections.get(host, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            hosts = {}
+            for host, count in self.requests.items():
+                opened = self.new_connections.get(host, 0)
+                hosts[host] = {
+                    'requests': count,
+                    'new_connections': opened,
+                    'reused_connections': max(0, count - opened),
+                }
+            return hosts
+
+_stats = _PoolStats()
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _stats.connection_opened(self.host)
+        return super()._new_conn()
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _stats.connection_opened(self.host)
+        return super()._new_conn()
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter that applies the default timeout and counts connection reuse"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        _stats.request_sent(urlsplit(request.url).hostname or "")
+        return super().send(request, timeout=timeout, **kwargs)
+
+def _build_session() -> requests.Session:
+    s = requests.Session()
+    s.headers.update({'User-Agent': USER_AGENT})
+
+    default_adapter = PooledAdapter(pool_connections=16, pool_maxsize=DEFAULT_POOL_SIZE)
+    s.mount("http://", default_adapter)
+    s.mount("https://", default_adapter)
+    for host, size in HOST_POOL_SIZES.items():
+        s.mount(f"https://{host}/", PooledAdapter(pool_connections=1, pool_maxsize=size))
+    return s
+
+# Global pooled session shared by every module
+session = _build_session()
+
+# Raw JSON bodies keyed by URL; each caller parses its own copy so callers can mutate freely
+response_cache = CoalescingCache(ttl=RESPONSE_CACHE_TTL, maxsize=RESPONSE_CACHE_SIZE)
+
+def request(method: str, url: str, cost: float = 1, **kwargs) -> requests.Response:
+    """
+    Send through the shared pooled session, waiting for the host's rate budget first.
+    429 responses back the host off and the request is queued again instead of failing.
+    """
+    host = urlsplit(url).hostname or ""
+    for attempt in range(MAX_429_RETRIES + 1):
+        rate_limiter.acquire(host, cost)
+        response = session.request(method, url, **kwargs)
+        backoff = rate_limiter.record_response(host, response.status_code, response.headers)
+        if backoff is None or attempt == MAX_429_RETRIES:
+            return response
+        print(f"[http_client] {host} throttled (429), retrying in {backoff:.1f}s")
+    return response
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared pooled session"""
+    return request("GET", url, **kwargs)
+
+def post(url: str, **kwargs) -> requests.Response:
+    """POST through the shared pooled session"""
+    return request("POST", url, **kwargs)
+
+def get_json(url: str, ttl: Optional[float] = None, **kwargs):
+    """
+    GET url and parse its JSON body, sharing one fetch between concurrent callers
+    and reusing the body for ttl seconds. Returns None for non-200 responses.
+    """
+    def load():
+        response = get(url, **kwargs)
+        if response.status_code != 200:
+            print(f"[http_client] {url} HTTP {response.status_code}")
+            return None
+        return response.content
+
+    body = response_cache.get_or_load(url, load, ttl)
+    return json.loads(body) if body is not None else None
+
+def get_stats() -> Dict:
+    """Per-host request counts and how many of them reused a pooled connection"""
+    return _stats.snapshot()
+
+def get_rate_limit_stats() -> Dict:
+    """Per-host token budget, waits and 429 counts"""
+    return rate_limiter.get_stats()
+
+def get_cache_stats() -> Dict:
+    """Hit/miss counters for the URL response cache"""
+    return response_cache.stats()
@@ -0,0 +1,200 @@
+"""
+JSON-RPC Batch Requests
+Packs many JSON-RPC calls into as few POSTs as the provider's batch limit allows, matches
+responses to calls by unique id and sends only the failed calls again. Shared by the sync
+and async Helius / Alchemy clients.
+"""
+
+import asyncio
+import itertools
+import re
+import threading
+import time
+from typing import Callable, Dict, Generator, List, Optional, Sequence, Tuple
+
+MAX_ATTEMPTS = 3  # sends per call before its result is given up as None
+RETRYABLE_CODES = {-32005, -32603, 429}  # limit exceeded, internal error, per-call throttling
+# eth_getLogs errors that mean "too many results / too wide a range": resending the same range
+# cannot succeed, so they go straight back to the caller (the log scanner splits the range)
+RESULT_CAP = re.compile(r"response size|more than \d+ results|range.*(too|exceed)|limit exceeded", re.I)
+CALLER_HANDLED = {"eth_getLogs": RESULT_CAP}  # method -> error messages returned instead of retried
+BATCH_TOO_LARGE = {413}  # HTTP statuses that mean "split the batch", not "retry it"
+RETRY_BACKOFF = 0.5      # seconds before the first retry round, doubled per round
+MAX_RETRY_BACKOFF = 8.0
+
+_ids = itertools.count(1)
+_stats_lock = threading.Lock()
+_stats = {'batches': 0, 'calls': 0, 'retried': 0, 'failed': 0, 'splits': 0}
+
+def as_call(payload: Dict) -> Tuple[str, object]:
+    """(method, params) of a single-request payload, for batching it"""
+    return payload["method"], payload["params"]
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+class BatchPlan:
+    """Pending calls of one batch request, chunked to the provider limit, and their results"""
+
+    def __init__(self, calls: Sequence[Tuple[str, object]], limit: int, prefix: str):
+        self.payloads = [{"jsonrpc": "2.0", "id": f"{prefix}-{next(_ids)}", "method": method, "params": params}
+                         for method, params in calls]
+        self._index = {payload["id"]: i for i, payload in enumerate(self.payloads)}
+        self.results: List[Optional[object]] = [None] * len(self.payloads)
+        self.errors: List[Optional[Dict]] = [None] * len(self.payloads)  # last error of calls that gave up
+        self._attempts = [0] * len(self.payloads)
+        self.pending = list(range(len(self.payloads)))
+        self.limit = max(1, limit)
+        self._retry_rounds = 0
+        self._retrying = False  # a call was queued again since the last delay()
+        _count(calls=len(self.payloads))
+
+    def take(self) -> List[List[Dict]]:
+        """Chunks of at most limit pending payloads; the calls stay unsettled until settle()"""
+        pending, self.pending = self.pending, []
+        chunks = [[self.payloads[i] for i in pending[start:start + self.limit]]
+                  for start in range(0, len(pending), self.limit)]
+        _count(batches=len(chunks))
+        return chunks
+
+    def delay(self) -> float:
+        """Seconds to wait before sending the next round: exponential backoff once calls are retried"""
+        if not self._retrying:
+            return 0.0
+        self._retrying = False
+        self._retry_rounds += 1
+        return min(MAX_RETRY_BACKOFF, RETRY_BACKOFF * 2 ** (self._retry_rounds - 1))
+
+    def settle(self, chunk: List[Dict], status_code: int, body):
+        """Store the results of one answered chunk and queue its failed calls again"""
+        if isinstance(body, dict) and body.get("id") is None and isinstance(body.get("error"), dict):
+            # One error for the whole batch (bad key, auth, throttled): splitting would not help
+            error = body["error"]
+            if error.get("code") in RETRYABLE_CODES:
+                self.fail(chunk, error.get("message"))
+            else:
+                self._give_up(chunk, error)
+            return
+        if 400 <= status_code < 500 and status_code not in BATCH_TOO_LARGE and status_code != 429:
+            self._give_up(chunk, {"message": f"HTTP {status_code}"})
+            return
+        if status_code in BATCH_TOO_LARGE or (status_code == 200 and not isinstance(body, list)):
+            if len(chunk) > 1:  # the provider rejected the batch as a whole: halve it, no attempt used
+                self.limit = max(1, len(chunk) // 2)
+                self.pending.extend(self._index[payload["id"]] for payload in chunk)
+                _count(splits=1)
+                return
+            body = [body] if isinstance(body, dict) else None
+        if status_code != 200 or body is None:
+            self.fail(chunk, f"HTTP {status_code}")
+            return
+        answered = set()
+        for item in body:
+            i = self._index.get(item.get("id")) if isinstance(item, dict) else None
+            if i is None or i in answered:
+                continue
+            answered.add(i)
+            error = item.get("error")
+            if error is None:
+                self.results[i] = item.get("result")
+            elif error.get("code") in RETRYABLE_CODES and not self._caller_handled(i, error):
+                self._retry(i, error)
+            else:
+                self.errors[i] = error
+                _count(failed=1)
+                print(f"[jsonrpc] {self.payloads[i]['method']} failed: {error.get('message')}")
+        # Calls the provider dropped from the response are sent again
+        for payload in chunk:
+            i = self._index[payload["id"]]
+            if i not in answered:
+                self._retry(i, {"message": "missing from batch response"})
+
+    def _caller_handled(self, i: int, error: Dict) -> bool:
+        pattern = CALLER_HANDLED.get(self.payloads[i]["method"])
+        return pattern is not None and bool(pattern.search(str(error.get("message", ""))))
+
+    def fail(self, chunk: List[Dict], reason):
+        """The whole chunk failed (transport error, 5xx, 429 after retries)"""
+        for payload in chunk:
+            self._retry(self._index[payload["id"]], {"message": str(reason)})
+
+    def _give_up(self, chunk: List[Dict], error: Dict):
+        """Fail every call of the chunk without retrying (client errors)"""
+        for payload in chunk:
+            self.errors[self._index[payload["id"]]] = error
+        _count(failed=len(chunk))
+        print(f"[jsonrpc] batch of {len(chunk)} {chunk[0]['method']} calls failed: {error.get('message')}")
+
+    def _retry(self, i: int, error: Dict):
+        self._attempts[i] += 1
+        if self._attempts[i] < MAX_ATTEMPTS:
+            self.pending.append(i)
+            self._retrying = True
+            _count(retried=1)
+            return
+        self.errors[i] = error
+        _count(failed=1)
+        print(f"[jsonrpc] {self.payloads[i]['method']} gave up after {self._attempts[i]} attempts: "
+              f"{error.get('message')}")
+
+def call_many(post: Callable, calls: Sequence[Tuple[str, object]], limit: int, prefix: str,
+              return_errors: bool = False):
+    """
+    Results of (method, params) calls in order, None for calls that failed.
+    post(chunk) sends one batch array and returns the response. With return_errors,
+    returns (results, errors) where errors holds each failed call's last error object.
+    """
+    plan = BatchPlan(calls, limit, prefix)
+    while plan.pending:
+        time.sleep(plan.delay())
+        for chunk in plan.take():
+            try:
+                response = post(chunk)
+                plan.settle(chunk, response.status_code, response.json() if response.status_code == 200 else None)
+            except Exception as e:
+                plan.fail(chunk, e)
+    return (plan.results, plan.errors) if return_errors else plan.results
+
+async def call_many_async(post: Callable, calls: Sequence[Tuple[str, object]], limit: int, prefix: str,
+                          return_errors: bool = False):
+    """call_many for the event loop; the chunks of one round are sent concurrently"""
+    plan = BatchPlan(calls, limit, prefix)
+
+    async def send(chunk):
+        try:
+            response = await post(chunk)
+            plan.settle(chunk, response.status_code, response.json() if response.status_code == 200 else None)
+        except Exception as e:
+            plan.fail(chunk, e)
+
+    while plan.pending:
+        await asyncio.sleep(plan.delay())
+        await asyncio.gather(*(send(chunk) for chunk in plan.take()))
+    return (plan.results, plan.errors) if return_errors else plan.results
+
+def run_steps(steps: Generator, send: Callable):
+    """
+    Drive a multi-round scan written as a generator: it yields lists of calls, send(calls)
+    answers them and the answer is sent back in. Returns the generator's return value.
+    """
+    try:
+        calls = next(steps)
+        while True:
+            calls = steps.send(send(calls))
+    except StopIteration as done:
+        return done.value
+
+async def run_steps_async(steps: Generator, send: Callable):
+    """run_steps with an awaitable send"""
+    try:
+        calls = next(steps)
+        while True:
+            calls = steps.send(await send(calls))
+    except StopIteration as done:
+        return done.value
+
+def get_stats() -> Dict:
+    with _stats_lock:
+        return dict(_stats)
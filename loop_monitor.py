@@ -0,0 +1,142 @@
+"""
+Event-loop Lag Monitor
+A heartbeat callback on the bot's event loop measures how late it runs (loop lag) and a
+watchdog thread samples the loop thread's stack while a callback overruns, so every stall
+is attributed to the command, event or task that caused it.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Dict, Optional
+
+SAMPLE_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))    # seconds between heartbeats
+SLOW_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.05"))   # lag that counts as a blocking call
+SAMPLE_WINDOW = int(os.getenv("LOOP_LAG_WINDOW", "3000"))         # heartbeats kept for percentiles (~5 min)
+RING_SIZE = int(os.getenv("LOOP_LAG_RING_SIZE", "100"))           # slow-call events kept with their stacks
+STACK_DEPTH = 12  # innermost frames kept per event
+
+def _percentile(ordered, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class LoopMonitor:
+    """Loop lag percentiles, a ring buffer of slow calls with stacks and per-offender totals"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, threshold: float = SLOW_THRESHOLD,
+                 window: int = SAMPLE_WINDOW, ring_size: int = RING_SIZE):
+        self.interval = interval
+        self.threshold = threshold
+        self._samples = deque(maxlen=window)
+        self.events = deque(maxlen=ring_size)
+        self._offenders: Dict[str, Dict] = {}
+        self._labels = weakref.WeakKeyDictionary()  # task -> command label
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = None
+        self._expected = None  # monotonic time the next heartbeat is due
+        self._pending = None   # stall captured by the watchdog, completed by the next heartbeat
+        self._stop = threading.Event()
+        self.slow_calls = 0
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Monitor loop; must be called from the loop's own thread"""
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._expected = None
+        loop.call_soon(self._beat)
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def label_current_task(self, label: Optional[str]):
+        """Attribute stalls in the calling task to label (e.g. '!pnl'); None clears it"""
+        task = asyncio.current_task()
+        if task is None:
+            return
+        if label is None:
+            self._labels.pop(task, None)
+        else:
+            self._labels[task] = label
+
+    def _beat(self):
+        now = time.monotonic()
+        if self._expected is not None:
+            lag = max(0.0, now - self._expected)
+            with self._lock:
+                self._samples.append(lag)
+            if lag >= self.threshold:
+                self._record(lag, self._expected)
+        self._expected = now + self.interval
+        if not self._stop.is_set():
+            self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            expected = self._expected
+            if expected is None or self._pending is not None:
+                continue
+            if time.monotonic() - expected >= self.threshold:
+                self._pending = dict(self._capture(), expected=expected)
+
+    def _capture(self) -> Dict:
+        """Stack and task of the loop thread while it is blocked"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame)[-STACK_DEPTH:] if frame is not None else []
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        label = self._labels.get(task) if task is not None else None
+        if label is None and task is not None:
+            label = task.get_name()
+        if label is None and frame is not None:
+            label = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+        return {'label': label or 'unknown', 'stack': [line.rstrip() for line in stack]}
+
+    def _record(self, lag: float, expected: float):
+        event, self._pending = self._pending, None
+        if event is None or event.pop('expected') != expected:
+            event = {'label': 'unattributed', 'stack': []}  # stall shorter than a watchdog tick
+        event['lag_ms'] = round(lag * 1000, 1)
+        event['at'] = time.time()
+        with self._lock:
+            self.slow_calls += 1
+            self.events.append(event)
+            offender = self._offenders.setdefault(event['label'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            offender['count'] += 1
+            offender['total_ms'] += event['lag_ms']
+            offender['max_ms'] = max(offender['max_ms'], event['lag_ms'])
+        where = event['stack'][-1].strip().splitlines()[0] if event['stack'] else "no stack"
+        print(f"[loop_monitor] event loop blocked {event['lag_ms']:.0f}ms by {event['label']} ({where})")
+
+    def stats(self, top: int = 5, recent: int = 10) -> Dict:
+        """p50/p99/max lag over the sample window, top offenders by total stall and recent slow calls"""
+        with self._lock:
+            ordered = sorted(self._samples)
+            offenders = sorted(self._offenders.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+            events = list(self.events)[-recent:]
+        return {
+            'running': self._loop is not None and not self._stop.is_set(),
+            'samples': len(ordered),
+            'p50_ms': round(_percentile(ordered, 0.50) * 1000, 1),
+            'p99_ms': round(_percentile(ordered, 0.99) * 1000, 1),
+            'max_ms': round(ordered[-1] * 1000, 1) if ordered else 0.0,
+            'threshold_ms': round(self.threshold * 1000, 1),
+            'slow_calls': self.slow_calls,
+            'top_offenders': [dict(stats, label=label, total_ms=round(stats['total_ms'], 1))
+                              for label, stats in offenders[:top]],
+            'recent': events,
+        }
+
+# Global monitor for the Discord bot's event loop
+loop_monitor = LoopMonitor()
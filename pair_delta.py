@@ -0,0 +1,189 @@
+"""
+Incremental Delta Scanning
+Keeps the last evaluated snapshot of every pair (keyed by pairAddress) so scoring and
+filtering only run for new pairs or pairs whose metrics moved beyond a threshold.
+Works on pair_record.Pair records; fingerprints are taken from each record's raw payload.
+"""
+
+import bisect
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+DELTA_THRESHOLD = float(os.getenv("DELTA_THRESHOLD", "0.02"))  # relative change that counts as "changed"
+MAX_IDLE_CYCLES = int(os.getenv("DELTA_MAX_IDLE_CYCLES", "180"))  # forget pairs unseen for ~1h of cycles
+
+# Every age threshold (minutes) used by the default runner scores and scanner filters; crossing
+# one can change a score or a verdict even when the market data is identical. Reloaded scoring
+# rules pass their own bands to begin_cycle.
+AGE_BANDS_MIN = [15, 30, 60, 120, 180, 360, 480, 1440, 2880, 4320]
+
+NEW, CHANGED, UNCHANGED = "new", "changed", "unchanged"
+
+def _num(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _sub(pair: Dict, key: str) -> Dict:
+    value = pair.get(key)
+    return value if isinstance(value, dict) else {}
+
+def fingerprint(pair: Dict, age_min: float, age_bands: List[float] = AGE_BANDS_MIN) -> tuple:
+    """Fields the scores and filters depend on: liquidity, volume, price change, txns, MC and age band"""
+    liquidity = _sub(pair, 'liquidity')
+    volume = _sub(pair, 'volume')
+    price_change = _sub(pair, 'priceChange')
+    h1_txns = _sub(_sub(pair, 'txns'), 'h1')
+    return (
+        _num(liquidity.get('usd')),
+        _num(volume.get('h24')),
+        _num(volume.get('h6')),
+        _num(price_change.get('m5')),
+        _num(price_change.get('h1')),
+        _num(price_change.get('h6')),
+        _num(price_change.get('h24')),
+        _num(h1_txns.get('buys')),
+        _num(h1_txns.get('sells')),
+        _num(pair.get('fdv') or pair.get('marketCap')),
+        bisect.bisect_left(age_bands, age_min),
+    )
+
+def _moved(old: tuple, new: tuple, threshold: float) -> bool:
+    if old[-1] != new[-1]:  # age band crossed
+        return True
+    for a, b in zip(old[:-1], new[:-1]):
+        if abs(a - b) > threshold * max(abs(a), abs(b), 1.0):
+            return True
+    return False
+
+class _Snapshot:
+    __slots__ = ("fingerprint", "scores", "passed", "state", "cycle")
+
+    def __init__(self, fp: tuple, cycle: int):
+        self.fingerprint = fp
+        self.scores: Dict[str, float] = {}  # Pair.score_variant -> score; sources may score a pair differently
+        self.passed = None
+        self.state = NEW
+        self.cycle = cycle
+
+class PairDeltaIndex:
+    """Per-pair snapshots plus new/changed/unchanged counters for the current scan cycle"""
+
+    def __init__(self, threshold: float = DELTA_THRESHOLD, max_idle_cycles: int = MAX_IDLE_CYCLES):
+        self.threshold = threshold
+        self.max_idle_cycles = max_idle_cycles
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._lock = threading.Lock()
+        self.cycle = 0
+        self.rules_version = None
+        self.age_bands = AGE_BANDS_MIN
+        self.counts = {NEW: 0, CHANGED: 0, UNCHANGED: 0}
+        self.last_cycle_stats: Dict = {}
+
+    def begin_cycle(self, rules_version: Optional[int] = None, age_bands: Optional[List[float]] = None):
+        """
+        Start a scan cycle; each pair is classified once per cycle. A new scoring rules
+        version drops every cached score and verdict.
+        """
+        with self._lock:
+            if rules_version is not None and rules_version != self.rules_version:
+                if self.rules_version is not None:
+                    self._snapshots.clear()
+                self.rules_version = rules_version
+                self.age_bands = list(age_bands) if age_bands else AGE_BANDS_MIN
+            self.cycle += 1
+            self.counts = {NEW: 0, CHANGED: 0, UNCHANGED: 0}
+
+    def end_cycle(self) -> Dict:
+        """Drop long-unseen pairs and return this cycle's delta stats"""
+        with self._lock:
+            stale = [k for k, s in self._snapshots.items() if self.cycle - s.cycle > self.max_idle_cycles]
+            for key in stale:
+                del self._snapshots[key]
+            self.last_cycle_stats = dict(self.counts, cycle=self.cycle, tracked=len(self._snapshots))
+        print(f"[delta] cycle {self.cycle}: {self.counts[NEW]} new, {self.counts[CHANGED]} changed, "
+              f"{self.counts[UNCHANGED]} unchanged ({len(self._snapshots)} tracked)")
+        return self.last_cycle_stats
+
+    def _observe(self, key: str, pair) -> _Snapshot:
+        snap = self._snapshots.get(key)
+        if snap is not None and snap.cycle == self.cycle:
+            return snap  # already classified this cycle (pair seen by another source)
+        fp = fingerprint(pair.raw, pair.age_minutes, self.age_bands)
+        if snap is None:
+            snap = _Snapshot(fp, self.cycle)
+            self._snapshots[key] = snap
+        elif _moved(snap.fingerprint, fp, self.threshold):
+            snap.fingerprint = fp
+            snap.scores.clear()
+            snap.passed = None
+            snap.state = CHANGED
+        else:
+            snap.state = UNCHANGED
+        snap.cycle = self.cycle
+        self.counts[snap.state] += 1
+        return snap
+
+    def observe(self, pair) -> str:
+        """Classify a pair as new, changed or unchanged for this cycle"""
+        key = pair.pair_address
+        if not key:
+            return NEW
+        with self._lock:
+            return self._observe(key, pair).state
+
+    def score(self, pair, scorer: Callable) -> float:
+        """Runner score for the pair, reusing the last score when nothing relevant changed"""
+        key = pair.pair_address
+        if not key:
+            return scorer(pair)
+        with self._lock:
+            snap = self._observe(key, pair)
+            cached = snap.scores.get(pair.score_variant)
+            if cached is not None:
+                return cached
+        value = scorer(pair)
+        with self._lock:
+            snap.scores[pair.score_variant] = value
+        return value
+
+    def score_many(self, pairs: List, batch_scorer: Callable[[List], List[float]]) -> List[float]:
+        """Scores for a batch of pairs; batch_scorer only sees pairs without a reusable score"""
+        scores = [None] * len(pairs)
+        todo, snaps = [], []
+        with self._lock:
+            for i, pair in enumerate(pairs):
+                key = pair.pair_address
+                snap = self._observe(key, pair) if key else None
+                cached = snap.scores.get(pair.score_variant) if snap is not None else None
+                if cached is not None:
+                    scores[i] = cached
+                else:
+                    todo.append(i)
+                    snaps.append(snap)
+        if todo:
+            fresh = batch_scorer([pairs[i] for i in todo])
+            with self._lock:
+                for i, snap, value in zip(todo, snaps, fresh):
+                    scores[i] = value
+                    if snap is not None:
+                        snap.scores[pair.score_variant] = value
+        return scores
+
+    def needs_filter(self, pair_id: str) -> bool:
+        """False only for unchanged pairs the filters already rejected"""
+        with self._lock:
+            snap = self._snapshots.get(pair_id)
+            return snap is None or snap.state != UNCHANGED or snap.passed is not False
+
+    def record_verdict(self, pair_id: str, passed: bool):
+        """Remember the filter verdict for an evaluated pair"""
+        with self._lock:
+            snap = self._snapshots.get(pair_id)
+            if snap is not None:
+                snap.passed = passed
+
+# Global delta index shared by the chain scanners and pick_new_pairs
+pair_delta = PairDeltaIndex()
@@ -0,0 +1,173 @@
+"""
+Compact Pair Record for the Scan Pipeline
+Each DexScreener-shaped pair is parsed once per scan cycle (with the cycle's single timestamp)
+into a slotted Pair that scoring, filtering and alert formatting all read directly.
+
+    python pair_record.py              # memory / allocation benchmark against the dict pipeline
+"""
+
+import time
+from array import array
+from typing import Callable, Dict, Optional
+
+import scoring_rules
+from dex_lookup import normalize_address
+
+AGE_UNKNOWN_MIN = 999_999  # pairs without a creation time never pass an age filter (as before: age from 0)
+
+def _sub(raw: Dict, key: str) -> Dict:
+    value = raw.get(key)
+    return value if isinstance(value, dict) else {}
+
+def _num(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+class Pair:
+    """One candidate pair; raw keeps the untouched API payload for fingerprinting"""
+
+    __slots__ = ("chain", "pair_address", "base_address", "name", "symbol", "url", "created_at",
+                 "age_minutes", "fdv", "market_cap", "liquidity", "volume_24h", "price_change_1h", "price_change_24h",
+                 "holders", "source", "runner_score", "features", "score_variant", "raw")
+
+    def __init__(self, raw: Dict, now_ms: float, source: str = "", holders: Optional[int] = None,
+                 score_age_min: Optional[float] = None, score_txns: bool = True):
+        """score_age_min / score_txns=False reproduce sources whose scores used their own age or no txns"""
+        base = _sub(raw, "baseToken")
+        price_change = _sub(raw, "priceChange")
+        self.raw = raw
+        self.chain = (raw.get("chainId") or "").lower()
+        self.pair_address = raw.get("pairAddress") or ""
+        self.base_address = base.get("address") or ""
+        self.name = base.get("name") or ""
+        self.symbol = base.get("symbol") or ""
+        self.url = raw.get("url") or raw.get("pairUrl") or ""
+        self.created_at = raw.get("pairCreatedAt") or 0
+        self.age_minutes = max(0.0, (now_ms - self.created_at) / 60000) if self.created_at else AGE_UNKNOWN_MIN
+        self.fdv = _num(raw.get("fdv"))  # proxy for MC in filters and alerts
+        self.market_cap = _num(raw.get("fdv") or raw.get("marketCap"))  # source pre-filters
+        self.liquidity = _num(_sub(raw, "liquidity").get("usd"))
+        self.volume_24h = _sub(raw, "volume").get("h24", 0)
+        self.price_change_1h = price_change.get("h1", 0)
+        self.price_change_24h = price_change.get("h24", 0)
+        if holders is None:
+            holders = raw.get("holders", 0)
+            holders = int(holders) if isinstance(holders, (int, float)) else 0
+        self.holders = holders
+        self.source = source
+        self.runner_score = 0
+        # Sources with their own scoring inputs keep their own cached scores (pair_delta)
+        self.score_variant = source if score_age_min is not None or not score_txns else ""
+        try:
+            scored = raw if score_txns else {k: v for k, v in raw.items() if k != "txns"}
+            age_min = self.age_minutes if score_age_min is None else score_age_min
+            self.features = array('d', scoring_rules.dex_features(scored, age_min / 60))
+        except Exception:
+            self.features = None  # malformed for scoring; scores 0
+
+    @property
+    def key(self) -> str:
+        """Identity used for in-cycle dedupe and delta snapshots"""
+        return self.pair_address or str(self.created_at or "")
+
+    @property
+    def token(self) -> str:
+        """Token address shown in alerts (falls back to the pair address)"""
+        return self.base_address or self.pair_address
+
+    @property
+    def dedupe_key(self) -> str:
+        """Canonical chain:token address, stable across sources and renames"""
+        return f"{self.chain}:{normalize_address(self.token) or self.key}"
+
+    @property
+    def title(self) -> str:
+        return self.name or self.symbol
+
+    @property
+    def ticker(self) -> str:
+        return self.symbol or self.name
+
+    def __repr__(self):
+        return f"Pair({self.chain}:{self.ticker} {self.pair_address[:8]} score={self.runner_score})"
+
+def parse_pairs(raws, now_ms: float, source: str = "", chain: Optional[str] = None, holders: Optional[int] = None,
+                score_age: Optional[Callable[[Dict, float], float]] = None, score_txns: bool = True):
+    """
+    Pairs for raw API dicts, optionally only those on one chain. score_age(raw, now_ms) gives
+    the age in minutes a source's runner score uses when it differs from the filter age.
+    """
+    return [Pair(raw, now_ms, source, holders, score_age(raw, now_ms) if score_age else None, score_txns)
+            for raw in raws if isinstance(raw, dict) and (chain is None or raw.get("chainId") == chain)]
+
+# --- memory / allocation benchmark ------------------------------------------------
+
+def _legacy_pipeline(raws, chain: str):
+    """The previous path: reshaped token dict, mutated keys, per-call timestamps, 20-key result dict"""
+    results = []
+    for pair in raws:
+        created_timestamp = pair.get('pairCreatedAt', 0)
+        age_min = max(0, int((time.time() * 1000 - created_timestamp) / 60000))
+        token = {
+            'chainId': chain, 'pairAddress': pair.get('pairAddress', ''), 'pairCreatedAt': created_timestamp,
+            'baseToken': pair.get('baseToken', {}), 'liquidity': pair.get('liquidity', {}),
+            'fdv': pair.get('fdv', 0), 'marketCap': pair.get('marketCap', 0), 'url': pair.get('url', ''),
+            'priceChange': pair.get('priceChange', {}), 'volume': pair.get('volume', {}),
+            'holders': 100, 'age_minutes': age_min,
+        }
+        try:
+            token['runner_score'] = scoring_rules.current().score(pair, chain)
+        except Exception:
+            token['runner_score'] = 0
+        token['source'] = 'bench'
+        age_min = max(0, int((time.time() * 1000 - (token.get("pairCreatedAt") or 0)) / 60000))
+        liquidity_usd = _num(token.get("liquidity", {}).get("usd", 0))
+        fdv = _num(token.get("fdv"))
+        name = (token.get("baseToken", {}) or {}).get("name", "")
+        symbol = (token.get("baseToken", {}) or {}).get("symbol", "") or name
+        base_token = token.get("baseToken", {}) or {}
+        results.append({
+            "chain": token.get("chainId", "").title(), "name": name or symbol, "symbol": symbol,
+            "mc": f"${int(fdv):,}", "lp": f"${int(liquidity_usd):,}", "holders": token['holders'],
+            "chart": token.get("url"), "token": base_token.get("address", "") or token['pairAddress'],
+            "pair_address": token['pairAddress'], "age_minutes": age_min, "runner_score": token['runner_score'],
+            "market_cap": fdv, "liquidity": liquidity_usd,
+            "price_change_1h": token.get("priceChange", {}).get("h1", 0),
+            "price_change_24h": token.get("priceChange", {}).get("h24", 0),
+            "volume_24h": token.get("volume", {}).get("h24", 0), "dex_url": token.get("url", ""),
+            "source": token['source'],
+        })
+    return results
+
+def _record_pipeline(raws, chain: str):
+    now_ms = time.time() * 1000
+    rules = scoring_rules.current()
+    pairs = parse_pairs(raws, now_ms, 'bench', holders=100)
+    for pair in pairs:
+        pair.runner_score = rules.score_features(pair.features, chain) if pair.features else 0
+    return pairs
+
+def benchmark(n: int = 20_000, chain: str = 'solana'):
+    import tracemalloc
+    from batch_scoring import synthetic_pairs
+
+    raws = [r for r in synthetic_pairs(n, time.time() * 1000) if isinstance(r.get('liquidity'), dict)]
+    for label, pipeline in (("dict pipeline", _legacy_pipeline), ("Pair records", _record_pipeline)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        kept = pipeline(raws, chain)
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = snapshot.statistics('filename')
+        retained = sum(s.size for s in stats)
+        blocks = sum(s.count for s in stats)
+        print(f"{label:14} n={len(raws):,}: retained {retained / len(raws):7.0f} B/pair in {blocks / len(raws):5.1f} "
+              f"blocks/pair | peak {peak / 2**20:6.1f} MiB | {len(raws) / elapsed:10,.0f} pairs/s")
+        del kept
+
+if __name__ == "__main__":
+    benchmark()
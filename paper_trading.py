@@ -5,7 +5,8 @@ Tracks positions, P/L, and trading performance on runner alerts
 
 import time
 import json
-import requests
+import threading
+import dex_lookup
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from typing import Dict, List, Optional
@@ -30,6 +31,9 @@ class PaperTradingEngine:
         self.storage_file = storage_file
         self.positions: Dict[str, Position] = {}
         self.closed_positions: List[Position] = []
+        # Discord commands run the engine on worker threads; guards the positions and the
+        # storage file (price lookups happen outside it)
+        self._lock = threading.RLock()
         self.load_positions()
     
     def load_positions(self):
@@ -60,6 +64,10 @@ class PaperTradingEngine:
     
     def save_positions(self):
         """Save positions to storage file"""
+        with self._lock:
+            self._save_positions()
+
+    def _save_positions(self):
         try:
             data = {
                 'open_positions': [],
@@ -88,33 +96,44 @@ class PaperTradingEngine:
         except Exception as e:
             print(f"[paper_trading] Error saving positions: {e}")
     
+    def _best_price(self, pairs: Optional[List]) -> Optional[float]:
+        """Price of the highest-liquidity pair"""
+        if pairs:
+            # Get the pair with highest liquidity
+            best_pair = max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0) or 0))
+            price = float(best_pair.get('priceUsd', 0))
+            return price if price > 0 else None
+        return None
+    
     def get_current_price(self, token_address: str, chain: str) -> Optional[float]:
         """Get current token price from DexScreener"""
         try:
-            if chain.lower() == "solana":
-                url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            else:  # ethereum
-                url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                pairs = data.get('pairs', [])
-                if pairs:
-                    # Get the pair with highest liquidity
-                    best_pair = max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0) or 0))
-                    price = float(best_pair.get('priceUsd', 0))
-                    return price if price > 0 else None
-            
+            # Same /tokens endpoint for Solana and Ethereum, batched with concurrent lookups
+            return self._best_price(dex_lookup.get_token_pairs(token_address))
         except Exception as e:
             print(f"[paper_trading] Error getting price for {token_address}: {e}")
         
         return None
     
+    def get_current_prices(self, token_addresses: List[str]) -> Dict[str, Optional[float]]:
+        """Get current prices for many tokens in one or two batched DexScreener calls"""
+        prices = {}
+        try:
+            for token_address, pairs in dex_lookup.get_token_pairs_many(token_addresses).items():
+                try:
+                    prices[token_address] = self._best_price(pairs)
+                except Exception as e:
+                    print(f"[paper_trading] Error getting price for {token_address}: {e}")
+        except Exception as e:
+            print(f"[paper_trading] Error getting prices: {e}")
+        return prices
+    
     def enter_position(self, token_address: str, token_symbol: str, chain: str, size_usd: float) -> dict:
         """Enter a new position"""
         # Check if position already exists
-        if token_address in self.positions:
+        with self._lock:
+            exists = token_address in self.positions
+        if exists:
             return {
                 "success": False,
                 "message": f"Position already exists for {token_symbol}"
@@ -138,8 +157,15 @@ class PaperTradingEngine:
             entry_time=datetime.now()
         )
         
-        self.positions[token_address] = position
-        self.save_positions()
+        with self._lock:
+            # Another !enter may have opened it while the price was fetched
+            if token_address in self.positions:
+                return {
+                    "success": False,
+                    "message": f"Position already exists for {token_symbol}"
+                }
+            self.positions[token_address] = position
+            self.save_positions()
         
         return {
             "success": True,
@@ -153,11 +179,12 @@ class PaperTradingEngine:
         position = None
         token_key = None
         
-        for key, pos in self.positions.items():
-            if key == token_identifier or pos.token_symbol.lower() == token_identifier.lower():
-                position = pos
-                token_key = key
-                break
+        with self._lock:
+            for key, pos in self.positions.items():
+                if key == token_identifier or pos.token_symbol.lower() == token_identifier.lower():
+                    position = pos
+                    token_key = key
+                    break
         
         if not position:
             return {
@@ -177,18 +204,25 @@ class PaperTradingEngine:
         pnl_percent = ((current_price - position.entry_price) / position.entry_price) * 100
         pnl_usd = (pnl_percent / 100) * position.size_usd
         
-        # Update position
-        position.exit_price = current_price
-        position.exit_time = datetime.now()
-        position.pnl_usd = pnl_usd
-        position.pnl_percent = pnl_percent
-        position.status = "CLOSED"
-        
-        # Move to closed positions
-        self.closed_positions.append(position)
-        if token_key is not None:
+        with self._lock:
+            # Another !exit may have closed it while the price was fetched
+            if self.positions.get(token_key) is not position:
+                return {
+                    "success": False,
+                    "message": f"No open position found for {token_identifier}"
+                }
+            
+            # Update position
+            position.exit_price = current_price
+            position.exit_time = datetime.now()
+            position.pnl_usd = pnl_usd
+            position.pnl_percent = pnl_percent
+            position.status = "CLOSED"
+            
+            # Move to closed positions
+            self.closed_positions.append(position)
             del self.positions[token_key]
-        self.save_positions()
+            self.save_positions()
         
         return {
             "success": True,
@@ -201,9 +235,13 @@ class PaperTradingEngine:
         # Calculate open P/L
         open_pnl = 0
         open_positions_data = []
+        with self._lock:
+            open_positions = list(self.positions.values())
+            closed_positions = list(self.closed_positions)
+        prices = self.get_current_prices([p.token_address for p in open_positions])
         
-        for position in self.positions.values():
-            current_price = self.get_current_price(position.token_address, position.chain)
+        for position in open_positions:
+            current_price = prices.get(position.token_address)
             if current_price:
                 pnl_percent = ((current_price - position.entry_price) / position.entry_price) * 100
                 pnl_usd = (pnl_percent / 100) * position.size_usd
@@ -221,26 +259,26 @@ class PaperTradingEngine:
                 })
         
         # Calculate closed P/L
-        closed_pnl = sum(pos.pnl_usd for pos in self.closed_positions if pos.pnl_usd)
+        closed_pnl = sum(pos.pnl_usd for pos in closed_positions if pos.pnl_usd)
         
         # Calculate stats
-        total_trades = len(self.closed_positions)
-        winning_trades = len([pos for pos in self.closed_positions if pos.pnl_usd and pos.pnl_usd > 0])
+        total_trades = len(closed_positions)
+        winning_trades = len([pos for pos in closed_positions if pos.pnl_usd and pos.pnl_usd > 0])
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
         
         # Get best and worst performers
-        best_trade = max(self.closed_positions, key=lambda x: x.pnl_percent or 0) if self.closed_positions else None
-        worst_trade = min(self.closed_positions, key=lambda x: x.pnl_percent or 0) if self.closed_positions else None
+        best_trade = max(closed_positions, key=lambda x: x.pnl_percent or 0) if closed_positions else None
+        worst_trade = min(closed_positions, key=lambda x: x.pnl_percent or 0) if closed_positions else None
         
         return {
             "open_pnl": open_pnl,
             "closed_pnl": closed_pnl,
             "total_pnl": open_pnl + closed_pnl,
-            "open_positions": len(self.positions),
+            "open_positions": len(open_positions),
             "closed_positions": total_trades,
             "win_rate": win_rate,
             "open_positions_data": open_positions_data,
-            "recent_closed": self.closed_positions[-5:] if self.closed_positions else [],
+            "recent_closed": closed_positions[-5:] if closed_positions else [],
             "best_trade": best_trade,
             "worst_trade": worst_trade
         }
@@ -0,0 +1,192 @@
+"""
+Per-host Rate Limiting for Upstream APIs
+Token buckets sized to each provider's published limits, with adaptive backoff on 429 / Retry-After
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+# host -> (tokens per second, burst capacity); cost units are requests unless noted
+HOST_LIMITS = {
+    "api.dexscreener.com": (5.0, 10),          # 300 requests/min on search, tokens and pairs
+    "mainnet.helius-rpc.com": (10.0, 10),      # 10 RPC requests/s on the free plan
+    "eth-mainnet.g.alchemy.com": (330.0, 660), # compute units/s; callers pass each method's CU cost
+    "discord.com": (2.5, 5),                   # 5 webhook executions per 2 seconds
+    "discordapp.com": (2.5, 5),
+    "public-api.birdeye.so": (1.0, 2),
+    "api.solscan.io": (1.0, 2),
+    "api.coingecko.com": (0.5, 3),             # ~30 calls/min on the public API
+}
+
+# Alchemy compute-unit cost per JSON-RPC method
+ALCHEMY_CU_COSTS = {
+    "alchemy_getTokenMetadata": 10,
+    "alchemy_getTokenBalances": 26,
+    "eth_getLogs": 75,
+    "eth_blockNumber": 10,
+}
+
+MAX_BACKOFF = 60.0  # seconds
+MIN_RATE_FRACTION = 0.1  # adaptive rate never drops below 10% of the published limit
+
+class TokenBucket:
+    """Token bucket that hands out wait times instead of rejecting callers"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_429 = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        start = max(self.updated, self.blocked_until)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated = now
+
+    def reserve(self, cost: float) -> float:
+        """Take cost tokens (possibly going into debt) and return how long to wait first"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= cost
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 0:
+            wait += -self.tokens / self.rate
+        if wait > 0:
+            self.waits += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        return wait
+
+    def ready_in(self, cost: float = 1) -> float:
+        """Seconds until cost tokens are available, without taking them"""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < cost:
+            wait += (cost - self.tokens) / self.rate
+        return wait
+
+    def block(self, seconds: float):
+        """Stop handing out tokens for the given number of seconds"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def throttle(self, retry_after: Optional[float]):
+        """Provider returned 429: honour Retry-After and halve the sending rate"""
+        self.throttled += 1
+        self.consecutive_429 += 1
+        self.rate = max(self.base_rate * MIN_RATE_FRACTION, self.rate * 0.5)
+        if retry_after is None:
+            retry_after = min(MAX_BACKOFF, 2 ** self.consecutive_429)
+        self.block(min(MAX_BACKOFF, retry_after))
+
+    def success(self):
+        """Recover towards the published rate after successful responses"""
+        self.consecutive_429 = 0
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+
+    def snapshot(self) -> Dict:
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            'rate': round(self.rate, 3),
+            'base_rate': self.base_rate,
+            'capacity': self.capacity,
+            'tokens': round(self.tokens, 2),
+            'blocked_for': round(max(0.0, self.blocked_until - now), 2),
+            'waits': self.waits,
+            'total_wait': round(self.total_wait, 2),
+            'max_wait': round(self.max_wait, 2),
+            'throttled': self.throttled,
+        }
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from Retry-After (seconds or HTTP date) or Discord's reset header"""
+    value = headers.get("Retry-After") or headers.get("X-RateLimit-Reset-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RateLimiter:
+    """Process-wide registry of per-host token buckets"""
+
+    def __init__(self, limits: Dict[str, tuple]):
+        self._lock = threading.Lock()
+        self._buckets = {host: TokenBucket(rate, capacity) for host, (rate, capacity) in limits.items()}
+
+    def reserve(self, host: str, cost: float = 1) -> float:
+        """Seconds the caller must wait before sending to host (0 for unlimited hosts)"""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            return 0.0
+        with self._lock:
+            return bucket.reserve(cost)
+
+    def acquire(self, host: str, cost: float = 1):
+        """Block the calling thread until host has budget for this request"""
+        wait = self.reserve(host, cost)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, host: str, cost: float = 1):
+        """Wait on the event loop (never blocking it) until host has budget for this request"""
+        wait = self.reserve(host, cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_response(self, host: str, status_code: int, headers) -> Optional[float]:
+        """Feed a response back into the host bucket; returns the backoff applied on 429"""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            return None
+        with self._lock:
+            if status_code == 429:
+                retry_after = parse_retry_after(headers)
+                bucket.throttle(retry_after)
+                return max(0.0, bucket.blocked_until - time.monotonic())
+            bucket.success()
+            # Discord tells us up front when a bucket is exhausted
+            if headers.get("X-RateLimit-Remaining") == "0":
+                reset_after = parse_retry_after(headers)
+                if reset_after:
+                    bucket.block(reset_after)
+        return None
+
+    def throttle_count(self, host: str) -> int:
+        """How many 429s host has returned so far"""
+        bucket = self._buckets.get(host)
+        return bucket.throttled if bucket else 0
+
+    def blocked_for(self, host: str) -> float:
+        """Seconds until host accepts requests again after a 429 / Retry-After"""
+        bucket = self._buckets.get(host)
+        return max(0.0, bucket.blocked_until - time.monotonic()) if bucket else 0.0
+
+    def get_stats(self) -> Dict:
+        """Current budget and wait-time stats per host"""
+        with self._lock:
+            return {host: bucket.snapshot() for host, bucket in self._buckets.items()}
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(HOST_LIMITS)
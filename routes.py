@@ -5,6 +5,21 @@ from flask import render_template, request, redirect, url_for, flash, jsonify
 from app import app, db
 from models import Alert, BotConfig, ActivityLog, BotStatus
 from discord_bot import send_alert, get_bot_instance
+import http_client
+import async_http
+import jsonrpc_batch
+from alchemy_integration import alchemy_client
+import dex_lookup
+from pair_delta import pair_delta
+import scoring_rules
+from scanner import sent_tokens
+from source_scheduler import source_scheduler
+from scan_worker import scan_worker
+from loop_monitor import loop_monitor
+from discord_dispatch import discord_dispatch
+import alert_enrichment
+from webhook_queue import webhook_queue, webhook_events
+import whale_tracker
 
 @app.route('/')
 def dashboard():
@@ -164,6 +179,7 @@ def update_config():
                     db.session.add(config)
         
         db.session.commit()
+        scoring_rules.refresh(force=True)  # apply scoring rule edits without waiting for the next poll
         flash('Configuration updated successfully!', 'success')
         
     except Exception as e:
@@ -209,6 +225,26 @@ def api_status():
             'uptime': str(datetime.utcnow() - bot_status.uptime_start) if bot_status.uptime_start else None
         })
     
+    # Upstream connection pool reuse
+    status_data['http_pools'] = http_client.get_stats()
+    status_data['http_cache'] = http_client.get_cache_stats()
+    status_data['rate_limits'] = http_client.get_rate_limit_stats()
+    status_data['dex_batching'] = dex_lookup.get_stats()
+    status_data['scan_delta'] = pair_delta.last_cycle_stats
+    status_data['scoring_rules'] = scoring_rules.get_stats()
+    status_data['alert_dedupe'] = sent_tokens.stats()
+    status_data['source_schedule'] = source_scheduler.stats()
+    status_data['scan_worker'] = scan_worker.stats()
+    status_data['loop_lag'] = loop_monitor.stats()
+    status_data['discord_dispatch'] = discord_dispatch.stats()
+    status_data['alert_enrichment'] = alert_enrichment.get_stats()
+    status_data['async_http'] = async_http.get_stats()
+    status_data['jsonrpc_batch'] = jsonrpc_batch.get_stats()
+    status_data['transfer_scanner'] = alchemy_client.transfers.get_stats()
+    status_data['webhook_queue'] = webhook_queue.stats()
+    status_data['webhook_dedupe'] = webhook_events.stats()
+    status_data['whales'] = whale_tracker.get_stats()
+    
     return jsonify(status_data)
 
 @app.route('/api/alerts/pending')
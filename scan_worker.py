@@ -0,0 +1,97 @@
+"""
+Background Scan Worker
+Runs scan cycles in a dedicated thread so scanner I/O never blocks the Discord event loop.
+Hits are handed to the loop through an asyncio queue; posting the hits of one cycle
+overlaps fetching the next.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import AsyncIterator, Dict, Optional
+
+from scanner import iter_new_pairs
+from source_scheduler import source_scheduler
+
+HIT_QUEUE_SIZE = int(os.getenv("SCAN_HIT_QUEUE_SIZE", "100"))  # the scan thread waits when posting falls this far behind
+
+class ScanWorker:
+    """Scan thread producing Pair hits into an asyncio.Queue owned by the bot's event loop"""
+
+    def __init__(self, queue_size: int = HIT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.cycles = 0
+        self.hits = 0
+        self.errors = 0
+        self.last_cycle_seconds = 0.0
+        self.last_cycle_at = None
+        self.producer_wait = 0.0  # seconds the scan thread spent waiting on a full queue
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Start the scan thread for loop; later calls (gateway reconnects) reuse it"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._loop = loop
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scan-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _put(self, hit) -> bool:
+        """Hand one hit to the event loop, waiting while the queue is full; False once the loop is gone"""
+        started = time.monotonic()
+        try:
+            asyncio.run_coroutine_threadsafe(self.queue.put(hit), self._loop).result()
+        except RuntimeError:  # event loop closed
+            self._stop.set()
+            return False
+        self.producer_wait += time.monotonic() - started
+        return True
+
+    def _run(self):
+        print("[scan_worker] scan thread started")
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                for hit in iter_new_pairs():  # each hit as soon as its source batch is filtered
+                    self.hits += 1
+                    if not self._put(hit):
+                        break
+            except Exception as e:
+                self.errors += 1
+                print("[scan_worker]", e)
+            self.cycles += 1
+            self.last_cycle_seconds = time.monotonic() - started
+            self.last_cycle_at = time.time()
+            # Sleep until the next source is due; intervals adapt per source within the request budget
+            self._stop.wait(source_scheduler.seconds_until_due())
+        print("[scan_worker] scan thread stopped")
+
+    async def iter_hits(self) -> AsyncIterator:
+        """Hits in arrival order; awaiting the queue never blocks the event loop"""
+        while not self._stop.is_set():
+            yield await self.queue.get()
+
+    def stats(self) -> Dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'cycles': self.cycles,
+            'hits': self.hits,
+            'errors': self.errors,
+            'queued': self.queue.qsize() if self.queue is not None else 0,
+            'queue_size': self.queue_size,
+            'last_cycle_seconds': round(self.last_cycle_seconds, 2),
+            'last_cycle_at': self.last_cycle_at,
+            'producer_wait_seconds': round(self.producer_wait, 2),
+        }
+
+# Global worker shared by the Discord scan loop and the status API
+scan_worker = ScanWorker()
@@ -1,197 +1,265 @@
 # scanner.py
-import time, requests, os, re
+import time, os, re
+import http_client
 from fresh_pairs_scraper import scrape_fresh_pairs, get_fresh_pairs_enhanced
-from birdeye_scraper import get_combined_fresh_tokens
-from solana_scanner import get_runner_candidates
-from ethereum_scanner import get_ethereum_runner_candidates
+from birdeye_scraper import FRESH_SOURCES, unique_fresh_tokens
+from solana_scanner import merge_runner_candidates, SOURCES as SOLANA_SOURCES
+from ethereum_scanner import merge_eth_candidates, SOURCES as ETHEREUM_SOURCES
+from pair_delta import pair_delta
+import scoring_rules
+from pair_record import Pair, parse_pairs
+from dedupe_index import DedupeIndex
+from source_fanout import SCAN_FANOUT, SCAN_DEADLINE, fan_out_calls, iter_sources
+from source_scheduler import source_scheduler
 
 DEX_API = "https://api.dexscreener.com/latest/dex/search"
+DEX_HOST = "api.dexscreener.com"
+SCAN_STREAM = os.getenv("SCAN_STREAM", "1") != "0"  # filter each source batch as soon as it arrives
 CHAINS = ["solana", "ethereum"]  # Temporary, will be updated to use token profiles
-MIN_LP = 2000       # USD - Lowered to catch earlier opportunities
-MAX_MC = 2_500_000  # Increased for potential runners (sync with discord_bot.py)
-MAX_AGE_MIN = 120   # Extended to 2 hours for early detection (sync with discord_bot.py)
-MIN_HOLDERS = 0     # (sync with discord_bot.py)
+# Filter limits (age / LP / MC / holders) live in scoring_rules and can be tuned via BotConfig
 
 NARRATIVE = re.compile(r".*", re.I)  # Temporarily match all tokens for testing
 
-# Global storage for already seen tokens (persists across scans)
-sent_tokens = set()
-last_reset = time.time()
+ALERT_DEDUPE_TTL = float(os.getenv("ALERT_DEDUPE_TTL", "3600"))  # seconds before a token may alert again
+ALERT_DEDUPE_SIZE = int(os.getenv("ALERT_DEDUPE_SIZE", "10000"))
+ALERT_DEDUPE_FILE = os.getenv("ALERT_DEDUPE_FILE", "")  # optional JSON file to survive restarts
+REALERT_SCORE_DELTA = float(os.getenv("REALERT_SCORE_DELTA", "1"))  # re-alert when the score improves this much
+
+# Alerted tokens keyed by chain:address with their alerted runner score (persists across scans)
+sent_tokens = DedupeIndex("alerts", ALERT_DEDUPE_TTL, ALERT_DEDUPE_SIZE, ALERT_DEDUPE_FILE,
+                          realert=lambda old, new: new >= old + REALERT_SCORE_DELTA)
+
+# Poll intervals as (start, fastest, slowest) seconds; each source adapts within its range
+RUNNER_POLL = (float(os.getenv("RUNNER_POLL_INTERVAL", "20")), 10.0, 300.0)
+FALLBACK_POLL = (float(os.getenv("FALLBACK_POLL_INTERVAL", "60")), 30.0, 600.0)
+RUNNER_SOURCES = {"solana": SOLANA_SOURCES, "ethereum": ETHEREUM_SOURCES}
+
+for _source_name, _, _ in SOLANA_SOURCES + ETHEREUM_SOURCES:
+    source_scheduler.register(_source_name, *RUNNER_POLL, host=DEX_HOST)
+for _source_name, _, _host in FRESH_SOURCES:
+    source_scheduler.register(f"fresh/{_source_name}", *FALLBACK_POLL, host=_host, standby=True)
+for _chain in CHAINS:
+    source_scheduler.register(f"search/{_chain}", *FALLBACK_POLL, host=DEX_HOST, standby=True)
 
 def _pairs(chain):
     # Dexscreener “latest pairs” by chain
     url = f"{DEX_API}?q={chain}"
     try:
-        r = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-        r.raise_for_status()
-        return r.json().get("pairs", [])[:50]  # reduced to be API-friendly
+        data = http_client.get_json(url)
+        if data is None:
+            return []
+        return data.get("pairs", [])[:50]  # reduced to be API-friendly
     except Exception as e:
         print("[scanner] fetch error:", e)
         return []
 
-def pick_new_pairs():
-    global sent_tokens, last_reset
-    results = []
-    total_pairs = 0
-    filtered_pairs = 0
-    seen = set()  # Prevent duplicates within this single scan
+def _due_runner_sources():
+    """Runner sources whose poll interval has elapsed, by chain"""
+    due = {}
+    for chain, sources in RUNNER_SOURCES.items():
+        names = set(source_scheduler.claim_due(name for name, _, _ in sources))
+        if names:
+            due[chain] = [source for source in sources if source[0] in names]
+    return due
+
+def _scheduled_runner_sources(due, now_ms):
+    """(chain, source_name, tokens) for each due runner source, fed back to the scheduler"""
+    for chain, source_name, tokens in iter_sources(due, SCAN_DEADLINE, now_ms, serial=not SCAN_FANOUT):
+        source_scheduler.record(source_name, None if tokens is None else [t.key for t in tokens])
+        if tokens is not None:
+            yield chain, source_name, tokens
+
+def _merged_runner_batches(due, now_ms):
+    """One batch of every runner candidate, after all due sources have finished"""
+    all_candidates = []
+    by_chain = {chain: [] for chain in RUNNER_SOURCES}
+    for chain, source_name, tokens in _scheduled_runner_sources(due, now_ms):
+        by_chain[chain].append((source_name, tokens))
+    sol_candidates = merge_runner_candidates(by_chain["solana"], 15)
+    eth_candidates = merge_eth_candidates(by_chain["ethereum"])
     
-    # Reset sent tokens every hour to allow fresh alerts
-    current_time = time.time()
-    if current_time - last_reset > 3600:  # 1 hour
-        sent_tokens.clear()
-        last_reset = current_time
-        print("[scanner] Cleared sent tokens cache (1 hour passed)")
+    # Get Solana runner candidates
+    if sol_candidates:
+        all_candidates.extend(sol_candidates)
+        print(f"[scanner] Got {len(sol_candidates)} Solana runner candidates")
     
-    # Try multi-chain runner candidates (Solana + Ethereum)
-    try:
-        all_candidates = []
-        
-        # Get Solana runner candidates
-        sol_candidates = get_runner_candidates(15)
-        if sol_candidates:
-            all_candidates.extend(sol_candidates)
-            print(f"[scanner] Got {len(sol_candidates)} Solana runner candidates")
-        
-        # Get Ethereum runner candidates
-        eth_candidates = get_ethereum_runner_candidates(15)
-        if eth_candidates:
-            all_candidates.extend(eth_candidates)
-            print(f"[scanner] Got {len(eth_candidates)} Ethereum runner candidates")
-        
-        if all_candidates:
-            print(f"[scanner] Using multi-chain runner scanner: {len(all_candidates)} total candidates")
-            pairs_to_process = [('multi_chain_runners', all_candidates)]
-        else:
-            # Fallback to combined alternative sources
-            fresh_pairs = get_combined_fresh_tokens(15)
-            if fresh_pairs:
-                print(f"[scanner] Using alternative sources: {len(fresh_pairs)} pairs")
-                pairs_to_process = [('fresh', fresh_pairs)]
-            else:
-                print("[scanner] All fresh sources failed, using API")
-                pairs_to_process = [(chain, _pairs(chain)) for chain in CHAINS]
-    except Exception as e:
-        print(f"[scanner] Multi-chain runner scanner failed: {e}, trying alternatives")
-        try:
-            fresh_pairs = get_combined_fresh_tokens(15)
-            if fresh_pairs:
-                pairs_to_process = [('fresh', fresh_pairs)]
-            else:
-                pairs_to_process = [(chain, _pairs(chain)) for chain in CHAINS]
-        except:
-            pairs_to_process = [(chain, _pairs(chain)) for chain in CHAINS]
+    # Get Ethereum runner candidates
+    if eth_candidates:
+        all_candidates.extend(eth_candidates)
+        print(f"[scanner] Got {len(eth_candidates)} Ethereum runner candidates")
     
-    for source, pairs in pairs_to_process:
-        total_pairs += len(pairs)
+    if all_candidates:
+        print(f"[scanner] Using multi-chain runner scanner: {len(all_candidates)} total candidates")
+        yield 'multi_chain_runners', all_candidates
+
+def _streamed_runner_batches(due, now_ms):
+    """Each due runner source's candidates as soon as that source finishes, deduped across sources"""
+    remaining = {"solana": 15}  # same cap as merge_runner_candidates
+    seen_tokens = {"solana": set(), "ethereum": set()}
+    for chain, source_name, tokens in _scheduled_runner_sources(due, now_ms):
+        if chain == "solana":
+            candidates = merge_runner_candidates([(source_name, tokens)], remaining["solana"])
+        else:
+            candidates = merge_eth_candidates([(source_name, tokens)])
+        candidates = [c for c in candidates if c.dedupe_key not in seen_tokens[chain]]
+        seen_tokens[chain].update(c.dedupe_key for c in candidates)
+        if chain in remaining:
+            remaining[chain] -= len(candidates)
+        if candidates:
+            yield source_name, candidates
+
+def _fetch_scheduled(calls):
+    """Run the due calls {source_name: (func, args)} and feed each result back to the scheduler"""
+    calls = {name: calls[name] for name in source_scheduler.claim_due(calls)}
+    if not calls:
+        return {}
+    if SCAN_FANOUT:
+        fetched = fan_out_calls(calls, SCAN_DEADLINE)
+    else:
+        fetched = {}
+        for name, (func, args) in calls.items():
+            try:
+                fetched[name] = func(*args)
+            except Exception as e:
+                print(f"[{name}] Failed: {e}")
+    for name in calls:
+        raws = fetched.get(name)
+        keys = None if raws is None else [r.get('pairAddress') or (r.get('baseToken') or {}).get('address', '')
+                                          for r in raws if isinstance(r, dict)]
+        source_scheduler.record(name, keys)
+    return fetched
+
+def _fallback_batches():
+    """Due alternative sources, then the due DexScreener search API chains"""
+    fetched = _fetch_scheduled({f"fresh/{name}": (func, (10,)) for name, func, _ in FRESH_SOURCES})
+    fresh_pairs = unique_fresh_tokens([t for name, _, _ in FRESH_SOURCES for t in fetched.get(f"fresh/{name}") or []], 15)
+    if fresh_pairs:
+        print(f"[scanner] Using alternative sources: {len(fresh_pairs)} pairs")
+        return [('fresh', fresh_pairs)]
+    print("[scanner] No fresh source pairs, using API")
+    fetched = _fetch_scheduled({f"search/{chain}": (_pairs, (chain,)) for chain in CHAINS})
+    return [(chain, fetched[f"search/{chain}"]) for chain in CHAINS if fetched.get(f"search/{chain}")]
+
+class ScanCycle:
+    """Filter state for one scan cycle; source batches are filtered as they arrive"""
+
+    def __init__(self):
+        self.rules = scoring_rules.refresh()  # the only rules reload point; pairs read the cached version
+        pair_delta.begin_cycle(self.rules.version, self.rules.age_bands_min)
+        # One timestamp for the whole cycle: ages, scores and filters all agree
+        self.now_ms = time.time() * 1000
+        self.started = time.monotonic()
+        self.first_hit_after = None
+        self.seen = set()  # Prevent duplicates within this single scan
+        self.total_pairs = 0
+        self.filtered_pairs = 0
+        self.skipped_unchanged = 0
+
+    def filter_batch(self, source, pairs):
+        """Yield the pairs of one source batch that pass the filters"""
+        rules, seen = self.rules, self.seen
+        self.total_pairs += len(pairs)
         print(f"[scanner] {source}: fetched {len(pairs)} pairs")
+        if pairs and not isinstance(pairs[0], Pair):
+            pairs = parse_pairs(pairs, self.now_ms, source)  # fallback sources return raw API dicts
         
         for p in pairs:
-            pair_addr = p.get("pairAddress", "")
-            pair_id = pair_addr or p.get("pairCreatedAt")
+            pair_id = p.key
             if not pair_id or pair_id in seen:
                 continue
+            seen.add(pair_id)
             
-            # Create unique identifier for this token
-            token_name = (p.get("baseToken", {}) or {}).get("name", "")
-            token_symbol = (p.get("baseToken", {}) or {}).get("symbol", "")
-            token_id = f"{token_name}_{token_symbol}".lower().replace(" ", "_")
+            # Skip tokens alerted recently unless their score has improved enough to re-alert
+            token_id = p.dedupe_key
+            if token_id in seen or not sent_tokens.allows(token_id, p.runner_score):
+                sent_tokens.suppress()
+                continue
             
-            # Skip if we've already sent this token recently
-            if token_id in sent_tokens:
+            # Skip pairs the filters already rejected whose metrics haven't moved since
+            pair_delta.observe(p)
+            if not pair_delta.needs_filter(pair_id):
+                self.skipped_unchanged += 1
                 continue
 
-            age_min = max(0, int((time.time()*1000 - (p.get("pairCreatedAt") or 0)) / 60000))
-            liquidity_usd = float(p.get("liquidity", {}).get("usd", 0))
-            fdv = float(p.get("fdv") or 0)  # proxy for MC
-            holders = int(p.get("holders", 0)) if isinstance(p.get("holders", 0), (int,float)) else 0
-            base_symbol = (p.get("baseToken", {}) or {}).get("symbol", "")
-            name = (p.get("baseToken", {}) or {}).get("name", "")
-            symbol = base_symbol or name
-
-            # Runner score bonus for prioritization
-            runner_score = p.get('runner_score', 0)
+            age_min = int(p.age_minutes)
+            name, symbol = p.name, p.ticker
+            runner_score = p.runner_score  # bonus for prioritization
             
             # Debug: show first few pairs with runner scores
-            if filtered_pairs < 3:
-                print(f"[scanner] pair: {name} {symbol}, age: {age_min}min, lp: ${liquidity_usd}, mc: ${fdv}, runner_score: {runner_score}")
+            if self.filtered_pairs < 3:
+                print(f"[scanner] pair: {name} {symbol}, age: {age_min}min, lp: ${p.liquidity}, mc: ${p.fdv}, runner_score: {runner_score}")
 
-            # Chain-specific filtering for different networks
-            chain_id = p.get('chainId', '').lower()
-            
-            # Enhanced filters for runner potential with chain-specific adjustments
-            if chain_id == 'ethereum':
-                # Ethereum has higher costs, so different thresholds
-                base_age_limit = 180  # 3 hours for ETH (faster initial moves)
-                base_lp_limit = 10000  # $10K minimum liquidity for ETH
-                base_mc_limit = 10000000  # $10M max market cap for ETH
-                
-                if runner_score >= 3:
-                    age_limit = 1440  # 24 hours for high-score ETH tokens
-                    lp_limit = 5000  # Lower liquidity for runners
-                    mc_limit = 20000000  # Higher market cap for ETH runners
-                else:
-                    age_limit = base_age_limit
-                    lp_limit = base_lp_limit
-                    mc_limit = base_mc_limit
-            else:
-                # Solana (default) - original thresholds
-                if runner_score >= 3:
-                    age_limit = 2880  # 48 hours for high-score tokens
-                    lp_limit = 1000  # Lower liquidity requirement
-                    mc_limit = 5000000  # Higher market cap allowed for runners
-                else:
-                    age_limit = MAX_AGE_MIN
-                    lp_limit = MIN_LP
-                    mc_limit = MAX_MC
+            # Chain-specific limits from the scoring rules; runners get looser limits
+            age_limit, lp_limit, mc_limit = rules.filter_limits(p.chain, runner_score)
+            min_holders = rules.min_holders(p.chain)
             
             age_ok = age_min <= age_limit
-            lp_ok = liquidity_usd >= lp_limit
-            mc_ok = fdv <= mc_limit
+            lp_ok = p.liquidity >= lp_limit
+            mc_ok = p.fdv <= mc_limit
             
-            print(f"[scanner] checking {name}: age={age_min}≤{age_limit}? {age_ok}, lp=${liquidity_usd}≥{lp_limit}? {lp_ok}, mc=${fdv}≤{mc_limit}? {mc_ok}, score={runner_score}")
+            print(f"[scanner] checking {name}: age={age_min}≤{age_limit}? {age_ok}, lp=${p.liquidity}≥{lp_limit}? {lp_ok}, mc=${p.fdv}≤{mc_limit}? {mc_ok}, score={runner_score}")
             
             if age_ok and lp_ok and mc_ok:
-                if holders < MIN_HOLDERS:
-                    print(f"[scanner] ❌ {name}: holders {holders} < {MIN_HOLDERS}")
+                if p.holders < min_holders:
+                    print(f"[scanner] ❌ {name}: holders {p.holders} < {min_holders}")
+                    pair_delta.record_verdict(pair_id, False)
                     continue
                 text = f"{name} {symbol}"
                 if not NARRATIVE.search(text):
                     print(f"[scanner] ❌ {name}: narrative filter failed")
+                    pair_delta.record_verdict(pair_id, False)
                     continue
 
-                seen.add(pair_id)
-                sent_tokens.add(token_id)  # Mark as sent
-                filtered_pairs += 1
+                seen.add(token_id)
+                sent_tokens.add(token_id, p.runner_score)  # Mark as sent
+                pair_delta.record_verdict(pair_id, True)
+                self.filtered_pairs += 1
                 print(f"[scanner] ✅ MATCH: {name} {symbol}")
                 
-                # craft enhanced alert data with detailed information
-                base_token = p.get("baseToken", {}) or {}
-                token_address = base_token.get("address", "") or pair_addr
-                
-                res = {
-                    "chain": p.get("chainId", source).title(),
-                    "name": name or symbol,
-                    "symbol": symbol,
-                    "mc": f"${int(fdv):,}",
-                    "lp": f"${int(liquidity_usd):,}",
-                    "holders": holders,
-                    "chart": p.get("url") or p.get("pairUrl"),
-                    "token": token_address,
-                    "pair_address": pair_addr,
-                    "age_minutes": age_min,
-                    "runner_score": runner_score,
-                    "market_cap": fdv,
-                    "liquidity": liquidity_usd,
-                    "price_change_1h": p.get("priceChange", {}).get("h1", 0) if isinstance(p.get("priceChange"), dict) else 0,
-                    "price_change_24h": p.get("priceChange", {}).get("h24", 0) if isinstance(p.get("priceChange"), dict) else 0,
-                    "volume_24h": p.get("volume", {}).get("h24", 0) if isinstance(p.get("volume"), dict) else 0,
-                    "dex_url": p.get("url", ""),
-                    "source": p.get("source", source),
-                }
-                results.append(res)
+                if not p.chain:
+                    p.chain = source.lower()
+                if not p.source:
+                    p.source = source
+                if self.first_hit_after is None:
+                    self.first_hit_after = time.monotonic() - self.started
+                yield p
             else:
                 print(f"[scanner] ❌ {name}: basic filters failed")
-    
-    print(f"[scanner] Summary: {total_pairs} total pairs, {filtered_pairs} passed filters, {len(results)} new alerts")
-    return results
\ No newline at end of file
+                pair_delta.record_verdict(pair_id, False)
+
+    def finish(self):
+        pair_delta.end_cycle()
+        first_hit = f", first alert after {self.first_hit_after:.2f}s" if self.first_hit_after is not None else ""
+        print(f"[scanner] Summary: {self.total_pairs} total pairs, {self.filtered_pairs} passed filters, "
+              f"{self.filtered_pairs} new alerts, {self.skipped_unchanged} unchanged skipped "
+              f"in {time.monotonic() - self.started:.2f}s{first_hit}")
+
+def iter_new_pairs(stream=None):
+    """
+    Yield each Pair that passes the filters as soon as its source batch arrives, so the first
+    alert waits only for the fastest source. stream=False (or SCAN_STREAM=0) filters one merged
+    batch after every source has finished, as pick_new_pairs always did.
+    Only sources whose poll interval has elapsed run; the fallbacks run when the runner
+    sources that ran this cycle produced no candidates.
+    """
+    stream = SCAN_STREAM if stream is None else stream
+    cycle = ScanCycle()
+    got_candidates = False
+    try:
+        due = _due_runner_sources()
+        try:
+            batches = _streamed_runner_batches(due, cycle.now_ms) if stream else _merged_runner_batches(due, cycle.now_ms)
+            for source, candidates in batches:
+                got_candidates = True
+                yield from cycle.filter_batch(source, candidates)
+        except Exception as e:
+            print(f"[scanner] Multi-chain runner scanner failed: {e}, trying alternatives")
+        if due and not got_candidates:
+            for source, pairs in _fallback_batches():
+                yield from cycle.filter_batch(source, pairs)
+    finally:
+        cycle.finish()
+
+def pick_new_pairs():
+    """Pair records that passed the filters this cycle, ready for alert formatting"""
+    return list(iter_new_pairs())
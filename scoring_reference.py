@@ -0,0 +1,256 @@
+"""
+Frozen Runner Scorers (parity reference)
+The if-ladder calculate_runner_score_dex / calculate_eth_runner_score exactly as they were
+before the scoring_rules engine replaced them. Nothing in the bot calls these; they are the
+golden reference that batch_scoring.check_parity holds the default rules table to. Do not
+edit them when the rules change. Only change: the Solana scorer takes now_ms so time can be frozen.
+"""
+
+import time
+
+def calculate_runner_score_dex(pair, now_ms=None):
+    """
+    Enhanced runner score with momentum, volume, and timing analysis
+    """
+    score = 0
+    
+    try:
+        # Core metrics
+        fdv = float(pair.get('fdv', 0) or pair.get('marketCap', 0))
+        liquidity_usd = float(pair.get('liquidity', {}).get('usd', 0))
+        volume_24h = float(pair.get('volume', {}).get('h24', 0))
+        volume_6h = float(pair.get('volume', {}).get('h6', 0))
+        
+        # Price change analysis (enhanced)
+        price_change = pair.get('priceChange', {})
+        change_5m = float(price_change.get('m5', 0) or 0)
+        change_1h = float(price_change.get('h1', 0) or 0)
+        change_6h = float(price_change.get('h6', 0) or 0)
+        change_24h = float(price_change.get('h24', 0) or 0)
+        
+        # Age calculation
+        created_timestamp = pair.get('pairCreatedAt', 0)
+        current_time = now_ms if now_ms is not None else time.time() * 1000
+        age_hours = (current_time - created_timestamp) / 3600000 if created_timestamp else 999
+        
+        # 1. Market Cap Scoring (optimized for runners)
+        if 5000 <= fdv <= 300000:  # $5K-$300K prime runner zone
+            score += 2.5
+        elif 300000 < fdv <= 1000000:  # $300K-$1M good potential
+            score += 2
+        elif 1000000 < fdv <= 3000000:  # $1M-$3M still viable
+            score += 1
+        
+        # 2. Liquidity Scoring (enhanced standards)
+        if liquidity_usd >= 50000:  # $50K+ excellent liquidity
+            score += 2
+        elif liquidity_usd >= 20000:  # $20K+ good liquidity
+            score += 1.5
+        elif liquidity_usd >= 5000:  # $5K+ decent liquidity
+            score += 1
+        
+        # 3. Fresh Token Age Bonus (critical for early detection)
+        if age_hours <= 0.25:  # 15 minutes - ULTRA FRESH
+            score += 2.5
+        elif age_hours <= 1:  # 1 hour - VERY FRESH
+            score += 2
+        elif age_hours <= 6:  # 6 hours - FRESH
+            score += 1.5
+        elif age_hours <= 24:  # 24 hours - Recent
+            score += 1
+        
+        # 4. Momentum Analysis (price action)
+        momentum_score = 0
+        if change_5m > 10:  # 10%+ in 5 minutes
+            momentum_score += 1.5
+        elif change_5m > 5:  # 5%+ in 5 minutes
+            momentum_score += 1
+        
+        if change_1h > 25:  # 25%+ in 1 hour
+            momentum_score += 1.5
+        elif change_1h > 10:  # 10%+ in 1 hour
+            momentum_score += 1
+        
+        if change_6h > 50:  # 50%+ in 6 hours
+            momentum_score += 1
+        elif change_6h > 20:  # 20%+ in 6 hours
+            momentum_score += 0.5
+        
+        score += min(momentum_score, 2)  # Cap momentum bonus
+        
+        # 5. Volume Analysis
+        if volume_24h > 0 and liquidity_usd > 0:
+            vol_liq_ratio = volume_24h / liquidity_usd
+            if vol_liq_ratio > 3:  # Very high activity
+                score += 1.5
+            elif vol_liq_ratio > 1:  # Good activity
+                score += 1
+            elif vol_liq_ratio > 0.3:  # Decent activity
+                score += 0.5
+        
+        # 6. Volume Acceleration (6h trend vs 24h average)
+        if volume_6h > 0 and volume_24h > 0:
+            vol_acceleration = (volume_6h * 4) / volume_24h
+            if vol_acceleration > 2:  # Accelerating volume
+                score += 1
+            elif vol_acceleration > 1.3:  # Growing volume
+                score += 0.5
+        
+        # 7. Transaction Activity
+        txns = pair.get('txns', {})
+        if isinstance(txns, dict):
+            h1_data = txns.get('h1', {})
+            h6_data = txns.get('h6', {})
+            
+            h1_buys = h1_data.get('buys', 0) or 0
+            h1_sells = h1_data.get('sells', 0) or 0
+            
+            # Buy pressure analysis
+            if h1_buys > 0 and h1_sells > 0:
+                buy_ratio = h1_buys / (h1_buys + h1_sells)
+                if buy_ratio > 0.7:  # Strong buy pressure
+                    score += 1
+                elif buy_ratio > 0.6:  # Good buy pressure
+                    score += 0.5
+            
+            # Transaction volume
+            if h1_buys > 150:
+                score += 1.5
+            elif h1_buys > 75:
+                score += 1
+            elif h1_buys > 25:
+                score += 0.5
+        
+        # Cap at 5
+        score = min(5, score)
+        
+    except Exception as e:
+        print(f"[enhanced_runner_score] Error: {e}")
+        score = 0
+    
+    return round(score, 1)
+
+def calculate_eth_runner_score(token_data):
+    """
+    Enhanced Ethereum runner scoring with momentum and gas efficiency analysis
+    """
+    score = 0
+    
+    try:
+        # Get token metrics
+        fdv = float(token_data.get('fdv', 0) or token_data.get('marketCap', 0))
+        liquidity_usd = float(token_data.get('liquidity', {}).get('usd', 0))
+        age_min = token_data.get('age_minutes', 0)
+        volume_24h = float(token_data.get('volume', {}).get('h24', 0))
+        volume_6h = float(token_data.get('volume', {}).get('h6', 0))
+        
+        # Price change analysis for ETH
+        price_change = token_data.get('priceChange', {})
+        change_5m = float(price_change.get('m5', 0) or 0)
+        change_1h = float(price_change.get('h1', 0) or 0)
+        change_6h = float(price_change.get('h6', 0) or 0)
+        change_24h = float(price_change.get('h24', 0) or 0)
+        
+        # 1. Market Cap Scoring (adjusted for ETH gas costs)
+        if 25000 <= fdv <= 1000000:  # $25K-$1M prime ETH runner zone
+            score += 2.5
+        elif 1000000 < fdv <= 3000000:  # $1M-$3M good potential
+            score += 2
+        elif 3000000 < fdv <= 8000000:  # $3M-$8M still viable for ETH
+            score += 1
+        
+        # 2. Enhanced Liquidity Scoring (ETH requires higher liquidity)
+        if liquidity_usd >= 100000:  # $100K+ excellent for ETH
+            score += 2.5
+        elif liquidity_usd >= 50000:  # $50K+ very good
+            score += 2
+        elif liquidity_usd >= 20000:  # $20K+ decent
+            score += 1.5
+        elif liquidity_usd >= 10000:  # $10K+ minimum viable
+            score += 1
+        
+        # 3. Age Scoring (ETH tokens need more time due to gas costs)
+        age_hours = age_min / 60
+        if age_hours <= 0.5:  # 30 minutes - ULTRA FRESH
+            score += 2
+        elif age_hours <= 2:  # 2 hours - VERY FRESH
+            score += 1.5
+        elif age_hours <= 8:  # 8 hours - FRESH
+            score += 1.2
+        elif age_hours <= 24:  # 24 hours - Recent
+            score += 0.8
+        elif age_hours <= 72:  # 72 hours - Still relevant for ETH
+            score += 0.3
+        
+        # 4. Momentum Analysis (ETH-specific thresholds)
+        momentum_score = 0
+        if change_5m > 8:  # 8%+ in 5 minutes (conservative for ETH)
+            momentum_score += 1.5
+        elif change_5m > 3:  # 3%+ in 5 minutes
+            momentum_score += 1
+        
+        if change_1h > 20:  # 20%+ in 1 hour
+            momentum_score += 1.5
+        elif change_1h > 8:  # 8%+ in 1 hour
+            momentum_score += 1
+        
+        if change_6h > 40:  # 40%+ in 6 hours
+            momentum_score += 1
+        elif change_6h > 15:  # 15%+ in 6 hours
+            momentum_score += 0.5
+        
+        score += min(momentum_score, 2)
+        
+        # 5. Volume Analysis (ETH-specific)
+        if volume_24h > 0 and liquidity_usd > 0:
+            vol_liq_ratio = volume_24h / liquidity_usd
+            if vol_liq_ratio > 1.5:  # High activity for ETH
+                score += 1.5
+            elif vol_liq_ratio > 0.8:  # Good activity
+                score += 1
+            elif vol_liq_ratio > 0.3:  # Decent activity
+                score += 0.5
+        
+        # 6. Volume Acceleration
+        if volume_6h > 0 and volume_24h > 0:
+            vol_acceleration = (volume_6h * 4) / volume_24h
+            if vol_acceleration > 1.8:  # Accelerating
+                score += 1
+            elif vol_acceleration > 1.2:  # Growing
+                score += 0.5
+        
+        # 7. ETH-specific: Higher volume threshold bonus
+        if volume_24h > 100000:  # $100K+ daily volume is significant for ETH
+            score += 0.5
+        elif volume_24h > 500000:  # $500K+ is very strong
+            score += 1
+        
+        # 8. Transaction activity (if available)
+        txns = token_data.get('txns', {})
+        if isinstance(txns, dict):
+            h1_data = txns.get('h1', {})
+            h1_buys = h1_data.get('buys', 0) or 0
+            h1_sells = h1_data.get('sells', 0) or 0
+            
+            # Lower transaction thresholds for ETH due to gas costs
+            if h1_buys > 50:  # 50+ buys in 1h is good for ETH
+                score += 1
+            elif h1_buys > 20:  # 20+ buys is decent
+                score += 0.5
+            
+            # Buy pressure
+            if h1_buys > 0 and h1_sells > 0:
+                buy_ratio = h1_buys / (h1_buys + h1_sells)
+                if buy_ratio > 0.65:  # Strong buy pressure
+                    score += 0.8
+                elif buy_ratio > 0.55:  # Good buy pressure
+                    score += 0.4
+        
+        # Cap at 5
+        score = min(5, score)
+        
+    except Exception as e:
+        print(f"[eth_enhanced_runner_score] Error: {e}")
+        score = 0
+    
+    return round(score, 1)
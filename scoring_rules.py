@@ -0,0 +1,449 @@
+"""
+Table-driven Scoring Rules
+Runner-score bands, scanner filter limits and whale-runner limits live in one declarative table.
+The table is compiled once into fast scalar and NumPy evaluators and hot-reloaded from the
+BotConfig row 'scoring_rules' (a JSON override of DEFAULT_RULES) through a versioned cache.
+
+A score profile is a list of components summed in order, then capped and rounded:
+    {"field": "fdv", "bands": [{"gte": 5000, "lte": 300000, "points": 2.5}, ...]}
+        first matching band wins; a band matches when every gt/gte/lt/lte bound holds
+    {"cap": 2, "parts": [<component>, ...]}
+        sum of the parts, capped
+"""
+
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the vector evaluator needs it
+    np = None
+
+RULES_CONFIG_KEY = "scoring_rules"
+RELOAD_INTERVAL = float(os.getenv("SCORING_RULES_RELOAD", "30"))  # seconds between BotConfig checks
+
+NAN = float("nan")
+BOUNDS = ("gt", "gte", "lt", "lte")
+
+DEFAULT_RULES = {
+    "scores": {
+        # calculate_runner_score_dex
+        "solana": {"cap": 5, "round": 1, "components": [
+            {"field": "fdv", "bands": [  # market cap, $5K-$300K prime runner zone
+                {"gte": 5000, "lte": 300000, "points": 2.5},
+                {"gt": 300000, "lte": 1000000, "points": 2},
+                {"gt": 1000000, "lte": 3000000, "points": 1}]},
+            {"field": "liquidity", "bands": [
+                {"gte": 50000, "points": 2}, {"gte": 20000, "points": 1.5}, {"gte": 5000, "points": 1}]},
+            {"field": "age_hours", "bands": [  # 15 minutes is ultra fresh
+                {"lte": 0.25, "points": 2.5}, {"lte": 1, "points": 2}, {"lte": 6, "points": 1.5},
+                {"lte": 24, "points": 1}]},
+            {"cap": 2, "parts": [  # momentum
+                {"field": "change_5m", "bands": [{"gt": 10, "points": 1.5}, {"gt": 5, "points": 1}]},
+                {"field": "change_1h", "bands": [{"gt": 25, "points": 1.5}, {"gt": 10, "points": 1}]},
+                {"field": "change_6h", "bands": [{"gt": 50, "points": 1}, {"gt": 20, "points": 0.5}]}]},
+            {"field": "vol_liq_ratio", "bands": [
+                {"gt": 3, "points": 1.5}, {"gt": 1, "points": 1}, {"gt": 0.3, "points": 0.5}]},
+            {"field": "vol_accel", "bands": [{"gt": 2, "points": 1}, {"gt": 1.3, "points": 0.5}]},
+            {"field": "buy_ratio", "bands": [{"gt": 0.7, "points": 1}, {"gt": 0.6, "points": 0.5}]},
+            {"field": "h1_buys", "bands": [
+                {"gt": 150, "points": 1.5}, {"gt": 75, "points": 1}, {"gt": 25, "points": 0.5}]},
+        ]},
+        # calculate_eth_runner_score; thresholds allow for ETH gas costs
+        "ethereum": {"cap": 5, "round": 1, "components": [
+            {"field": "fdv", "bands": [
+                {"gte": 25000, "lte": 1000000, "points": 2.5},
+                {"gt": 1000000, "lte": 3000000, "points": 2},
+                {"gt": 3000000, "lte": 8000000, "points": 1}]},
+            {"field": "liquidity", "bands": [
+                {"gte": 100000, "points": 2.5}, {"gte": 50000, "points": 2}, {"gte": 20000, "points": 1.5},
+                {"gte": 10000, "points": 1}]},
+            {"field": "age_hours", "bands": [
+                {"lte": 0.5, "points": 2}, {"lte": 2, "points": 1.5}, {"lte": 8, "points": 1.2},
+                {"lte": 24, "points": 0.8}, {"lte": 72, "points": 0.3}]},
+            {"cap": 2, "parts": [
+                {"field": "change_5m", "bands": [{"gt": 8, "points": 1.5}, {"gt": 3, "points": 1}]},
+                {"field": "change_1h", "bands": [{"gt": 20, "points": 1.5}, {"gt": 8, "points": 1}]},
+                {"field": "change_6h", "bands": [{"gt": 40, "points": 1}, {"gt": 15, "points": 0.5}]}]},
+            {"field": "vol_liq_ratio", "bands": [
+                {"gt": 1.5, "points": 1.5}, {"gt": 0.8, "points": 1}, {"gt": 0.3, "points": 0.5}]},
+            {"field": "vol_accel", "bands": [{"gt": 1.8, "points": 1}, {"gt": 1.2, "points": 0.5}]},
+            {"field": "volume_24h", "bands": [{"gt": 100000, "points": 0.5}]},
+            {"field": "h1_buys", "bands": [{"gt": 50, "points": 1}, {"gt": 20, "points": 0.5}]},
+            {"field": "buy_ratio", "bands": [{"gt": 0.65, "points": 0.8}, {"gt": 0.55, "points": 0.4}]},
+        ]},
+        # calculate_runner_score (pump.fun coins)
+        "pumpfun": {"cap": None, "round": None, "components": [
+            {"field": "usd_market_cap", "bands": [
+                {"gt": 10000, "lt": 100000, "points": 3}, {"gt": 100000, "lt": 500000, "points": 2},
+                {"lt": 10000, "points": 1}]},
+            {"field": "reply_count", "bands": [{"gt": 50, "points": 2}, {"gt": 20, "points": 1}]},
+            {"field": "age_hours", "bands": [{"lt": 1, "points": 3}, {"lt": 6, "points": 2}, {"lt": 24, "points": 1}]},
+        ]},
+        # calculate_runner_score_birdeye
+        "birdeye": {"cap": None, "round": None, "components": [
+            {"field": "change_24h", "bands": [{"gt": 100, "points": 3}, {"gt": 50, "points": 2}, {"gt": 20, "points": 1}]},
+            {"field": "vol_mc_ratio", "bands": [{"gt": 2, "points": 2}, {"gt": 1, "points": 1}]},
+        ]},
+    },
+    # pick_new_pairs limits; pairs scoring >= runner_score get the looser runner limits
+    "filters": {
+        "solana": {
+            "runner_score": 3,
+            "min_holders": 0,
+            "base": {"max_age_min": 120, "min_lp": 2000, "max_mc": 2_500_000},
+            "runner": {"max_age_min": 2880, "min_lp": 1000, "max_mc": 5_000_000},
+        },
+        "ethereum": {
+            "runner_score": 3,
+            "min_holders": 0,
+            "base": {"max_age_min": 180, "min_lp": 10000, "max_mc": 10_000_000},
+            "runner": {"max_age_min": 1440, "min_lp": 5000, "max_mc": 20_000_000},
+        },
+    },
+    # Whale-buy runner check in the Alchemy/Helius webhooks
+    "whale_runner": {"max_age_min": 24 * 60, "min_lp": 15_000, "max_mc": 500_000},
+}
+
+# --- field extraction ------------------------------------------------------------
+
+DEX_FIELDS = ("fdv", "liquidity", "volume_24h", "volume_6h", "change_5m", "change_1h", "change_6h",
+              "age_hours", "h1_buys", "vol_liq_ratio", "vol_accel", "buy_ratio")
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float))
+
+def dex_features(pair: Dict, age_hours: float) -> tuple:
+    """
+    Scoring inputs of a DexScreener pair in DEX_FIELDS order, read the way the runner scores
+    always have; raises on malformed pairs (scored 0). Ratios whose guard fails are NaN,
+    which matches no band.
+    """
+    fdv = float(pair.get('fdv', 0) or pair.get('marketCap', 0))
+    liquidity_usd = float(pair.get('liquidity', {}).get('usd', 0))
+    volume_24h = float(pair.get('volume', {}).get('h24', 0))
+    volume_6h = float(pair.get('volume', {}).get('h6', 0))
+
+    price_change = pair.get('priceChange', {})
+    change_5m = float(price_change.get('m5', 0) or 0)
+    change_1h = float(price_change.get('h1', 0) or 0)
+    change_6h = float(price_change.get('h6', 0) or 0)
+    float(price_change.get('h24', 0) or 0)  # validated, not scored
+
+    h1_buys = buy_ratio = NAN
+    txns = pair.get('txns', {})
+    if isinstance(txns, dict):
+        h1_data = txns.get('h1', {})
+        buys = h1_data.get('buys', 0) or 0
+        sells = h1_data.get('sells', 0) or 0
+        if not (_is_number(buys) and _is_number(sells)):
+            raise TypeError("non-numeric txn counts")
+        h1_buys = float(buys)
+        if buys > 0 and sells > 0:
+            buy_ratio = buys / (buys + sells)
+
+    vol_liq_ratio = volume_24h / liquidity_usd if volume_24h > 0 and liquidity_usd > 0 else NAN
+    vol_accel = (volume_6h * 4) / volume_24h if volume_6h > 0 and volume_24h > 0 else NAN
+
+    return (fdv, liquidity_usd, volume_24h, volume_6h, change_5m, change_1h, change_6h,
+            float(age_hours), h1_buys, vol_liq_ratio, vol_accel, buy_ratio)
+
+def _dex_extractor(chain: str) -> Callable[[Dict, float], tuple]:
+    """Features of a raw pair dict; ETH pairs carry age_minutes, Solana pairs pairCreatedAt"""
+    def extract(pair: Dict, now_ms: float) -> tuple:
+        if chain == 'ethereum':
+            age_hours = pair.get('age_minutes', 0) / 60
+        else:
+            created_timestamp = pair.get('pairCreatedAt', 0)
+            age_hours = (now_ms - created_timestamp) / 3600000 if created_timestamp else 999
+        return dex_features(pair, age_hours)
+    return extract
+
+def _pumpfun_fields(token: Dict, now_ms: float) -> tuple:
+    created_timestamp = token.get('created_timestamp', 0)
+    age_hours = (now_ms / 1000 - created_timestamp / 1000) / 3600
+    return (token.get('usd_market_cap', 0), token.get('reply_count', 0), age_hours)
+
+def _birdeye_fields(token: Dict, now_ms: float) -> tuple:
+    volume = token.get('v24hUSD', 0)
+    mc = token.get('mc', 1)
+    return (token.get('v24hChangePercent', 0), volume / mc)
+
+# profile -> (field names, extractor)
+EXTRACTORS = {
+    'solana': (DEX_FIELDS, _dex_extractor('solana')),
+    'ethereum': (DEX_FIELDS, _dex_extractor('ethereum')),
+    'pumpfun': (("usd_market_cap", "reply_count", "age_hours"), _pumpfun_fields),
+    'birdeye': (("change_24h", "vol_mc_ratio"), _birdeye_fields),
+}
+
+# --- compilation -------------------------------------------------------------------
+
+def _compile_band(band: Dict) -> tuple:
+    unknown = set(band) - set(BOUNDS) - {"points"}
+    if unknown or not _is_number(band.get("points")):
+        raise ValueError(f"bad band {band}")
+    return tuple(band.get(bound) for bound in BOUNDS) + (band["points"],)
+
+def _compile_component(component: Dict, fields: tuple):
+    """Nested tuples: ('bands', field index, field name, bands) or ('cap', cap, parts)"""
+    if "parts" in component:
+        parts = tuple(_compile_component(part, fields) for part in component["parts"])
+        return ("cap", component.get("cap"), parts)
+    field = component.get("field")
+    if field not in fields:
+        raise ValueError(f"unknown field {field!r}")
+    return ("bands", fields.index(field), field, tuple(_compile_band(b) for b in component["bands"]))
+
+def _scalar_component(compiled) -> Callable[[tuple], float]:
+    if compiled[0] == "cap":
+        _, cap, parts = compiled
+        part_fns = tuple(_scalar_component(part) for part in parts)
+
+        def capped(row):
+            total = 0
+            for fn in part_fns:
+                total += fn(row)
+            return total if cap is None else min(total, cap)
+        return capped
+
+    _, index, _, bands = compiled
+
+    def banded(row):
+        value = row[index]
+        for gt, gte, lt, lte, points in bands:
+            if ((gt is None or value > gt) and (gte is None or value >= gte)
+                    and (lt is None or value < lt) and (lte is None or value <= lte)):
+                return points
+        return 0
+    return banded
+
+def _vector_component(compiled):
+    if compiled[0] == "cap":
+        _, cap, parts = compiled
+        part_fns = tuple(_vector_component(part) for part in parts)
+
+        def capped(cols):
+            total = part_fns[0](cols)
+            for fn in part_fns[1:]:
+                total = total + fn(cols)
+            return total if cap is None else np.minimum(total, cap)
+        return capped
+
+    _, _, field, bands = compiled
+
+    def banded(cols):
+        value = cols[field]
+        conditions = []
+        for gt, gte, lt, lte, _ in bands:
+            cond = np.ones(value.shape, dtype=bool)
+            if gt is not None:
+                cond &= value > gt
+            if gte is not None:
+                cond &= value >= gte
+            if lt is not None:
+                cond &= value < lt
+            if lte is not None:
+                cond &= value <= lte
+            conditions.append(cond)
+        return np.select(conditions, [band[-1] for band in bands], 0)
+    return banded
+
+class _Profile:
+    """One compiled score profile"""
+
+    def __init__(self, name: str, spec: Dict):
+        self.fields, self.extract = EXTRACTORS[name]
+        compiled = tuple(_compile_component(c, self.fields) for c in spec["components"])
+        self.cap = spec.get("cap")
+        self.digits = spec.get("round")
+        self.scalar = tuple(_scalar_component(c) for c in compiled)
+        self.vector = tuple(_vector_component(c) for c in compiled) if np is not None else None
+        self.thresholds = {}
+        for component in compiled:
+            for leaf in (component[2] if component[0] == "cap" else (component,)):
+                values = self.thresholds.setdefault(leaf[2], set())
+                for band in leaf[3]:
+                    values.update(b for b in band[:4] if b is not None)
+
+    def score_row(self, row: tuple):
+        score = 0
+        for fn in self.scalar:
+            score += fn(row)
+        if self.cap is not None:
+            score = min(self.cap, score)
+        return score if self.digits is None else round(score, self.digits)
+
+    def score_columns(self, cols: Dict):
+        score = self.vector[0](cols)
+        for fn in self.vector[1:]:
+            score = score + fn(cols)
+        if self.cap is not None:
+            score = np.minimum(self.cap, score)
+        if self.digits is not None:
+            score = np.round(score, self.digits)
+        if 'error' in cols:
+            score[cols['error']] = 0.0
+        return score
+
+class RuleSet:
+    """An immutable, compiled version of the rules table"""
+
+    def __init__(self, rules: Dict, version: int = 0):
+        self.rules = rules
+        self.version = version
+        self.profiles = {name: _Profile(name, spec) for name, spec in rules["scores"].items()}
+        self.filters = rules["filters"]
+        self.whale_runner = rules["whale_runner"]
+        for chain, limits in self.filters.items():
+            for tier in ("base", "runner"):
+                missing = {"max_age_min", "min_lp", "max_mc"} - set(limits[tier])
+                if missing:
+                    raise ValueError(f"filters.{chain}.{tier} missing {sorted(missing)}")
+
+        # Every age edge (minutes) a score or filter depends on, for the delta scanner
+        bands = set()
+        for chain in ("solana", "ethereum"):
+            if chain in self.profiles:
+                bands.update(h * 60 for h in self.profiles[chain].thresholds.get("age_hours", ()))
+        for limits in self.filters.values():
+            bands.update(limits[tier]["max_age_min"] for tier in ("base", "runner"))
+        self.age_bands_min = sorted(bands)
+
+    def fields(self, profile: str) -> tuple:
+        return self.profiles[profile].fields
+
+    def extract(self, item: Dict, profile: str, now_ms: float) -> tuple:
+        return self.profiles[profile].extract(item, now_ms)
+
+    def score(self, item: Dict, profile: str, now_ms: Optional[float] = None):
+        """Score one pair/token; raises on malformed input"""
+        p = self.profiles[profile]
+        return p.score_row(p.extract(item, now_ms if now_ms is not None else time.time() * 1000))
+
+    def score_features(self, features: tuple, profile: str):
+        """Score an already-extracted feature row (see Pair.features)"""
+        return self.profiles[profile].score_row(features)
+
+    def score_columns(self, cols: Dict, profile: str):
+        """Vector scores for columns named after the profile's fields (plus an optional error mask)"""
+        return self.profiles[profile].score_columns(cols)
+
+    def filter_limits(self, chain: str, runner_score: float) -> tuple:
+        """(max_age_min, min_lp, max_mc) for a pair with this runner score"""
+        limits = self.filters.get(chain) or self.filters["solana"]
+        tier = limits["runner"] if runner_score >= limits["runner_score"] else limits["base"]
+        return tier["max_age_min"], tier["min_lp"], tier["max_mc"]
+
+    def min_holders(self, chain: str) -> int:
+        return (self.filters.get(chain) or self.filters["solana"]).get("min_holders", 0)
+
+def merge_rules(override: Dict) -> Dict:
+    """DEFAULT_RULES with whole score profiles / filter chains / whale limits replaced by the override"""
+    if not isinstance(override, dict):
+        raise ValueError("scoring rules must be a JSON object")
+    rules = copy.deepcopy(DEFAULT_RULES)
+    for section in ("scores", "filters"):
+        rules[section].update(override.get(section) or {})
+    rules["whale_runner"].update(override.get("whale_runner") or {})
+    return rules
+
+# --- hot reload ----------------------------------------------------------------------
+
+_UNAVAILABLE = object()
+
+def _load_config_value():
+    """Raw BotConfig value, None when the row is absent, _UNAVAILABLE without a database"""
+    app_module = sys.modules.get("app")
+    if app_module is None or not hasattr(app_module, "app"):
+        return _UNAVAILABLE  # standalone scripts and benchmarks run on the defaults
+    try:
+        from models import BotConfig
+        with app_module.app.app_context():
+            row = BotConfig.query.filter_by(key=RULES_CONFIG_KEY).first()
+            return row.value if row else None
+    except Exception as e:
+        print(f"[scoring_rules] Could not read BotConfig: {e}")
+        return _UNAVAILABLE
+
+class RuleCache:
+    """
+    Versioned in-memory rules: readers take the current RuleSet without locking or I/O;
+    refresh() polls BotConfig at most every RELOAD_INTERVAL and recompiles on change.
+    """
+
+    def __init__(self, reload_interval: float = RELOAD_INTERVAL):
+        self.reload_interval = reload_interval
+        self._ruleset = RuleSet(DEFAULT_RULES)
+        self._source = None    # raw override of the active rules
+        self._rejected = None  # last invalid raw override, not re-parsed until it changes
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.loaded_at = time.time()
+        self.last_error = None
+
+    def current(self) -> RuleSet:
+        return self._ruleset
+
+    def apply(self, raw: Optional[str]) -> bool:
+        """Compile a raw JSON override (None/empty = defaults); keeps the old rules if it is invalid"""
+        with self._lock:
+            if raw == self._source:
+                self._rejected = self.last_error = None  # back to the active override
+                return False
+            if raw == self._rejected:
+                return False
+            try:
+                rules = merge_rules(json.loads(raw)) if raw and raw.strip() else DEFAULT_RULES
+                ruleset = RuleSet(rules, self._ruleset.version + 1)
+            except Exception as e:
+                self._rejected = raw
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"[scoring_rules] Ignoring invalid '{RULES_CONFIG_KEY}' config: {self.last_error}")
+                return False
+            self._ruleset = ruleset
+            self._source = raw
+            self._rejected = None
+            self.loaded_at = time.time()
+            self.last_error = None
+        print(f"[scoring_rules] Loaded rules v{ruleset.version} ({'BotConfig' if raw else 'defaults'})")
+        return True
+
+    def refresh(self, force: bool = False) -> RuleSet:
+        """Reload from BotConfig when due (or forced) and return the current rules"""
+        now = time.monotonic()
+        if not force and now - self._checked < self.reload_interval:
+            return self._ruleset
+        self._checked = now
+        raw = _load_config_value()
+        if raw is not _UNAVAILABLE:
+            self.apply(raw)
+        return self._ruleset
+
+    def stats(self) -> Dict:
+        return {
+            'version': self._ruleset.version,
+            'source': 'BotConfig' if self._source else 'defaults',
+            'loaded_at': self.loaded_at,
+            'last_error': self.last_error,
+            'reload_interval': self.reload_interval,
+        }
+
+# Global rules cache shared by the scanners, scorers and webhooks
+rule_cache = RuleCache()
+
+def current() -> RuleSet:
+    """The rules in effect; never touches the database"""
+    return rule_cache.current()
+
+def refresh(force: bool = False) -> RuleSet:
+    """Pick up BotConfig changes (at most every RELOAD_INTERVAL unless forced)"""
+    return rule_cache.refresh(force)
+
+def get_stats() -> Dict:
+    return rule_cache.stats()
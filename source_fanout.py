@@ -0,0 +1,130 @@
+"""
+Concurrent Source Fan-out for the Runner Scanners
+Runs every scanner source for every chain at once under one scan-wide deadline
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Tuple
+
+SCAN_FANOUT = os.getenv("SCAN_FANOUT", "1") != "0"
+SCAN_DEADLINE = float(os.getenv("SCAN_DEADLINE", "12"))  # seconds for the whole fan-out
+FANOUT_WORKERS = int(os.getenv("SCAN_FANOUT_WORKERS", "8"))
+
+# Shared pool so source threads are reused across scan cycles
+_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="scan-source")
+
+# (name, fetcher, limit) as declared by each chain module
+Source = Tuple[str, Callable, int]
+
+def _run_source(source_name: str, source_func: Callable, limit: int, *args) -> List:
+    """Run one source and tag its Pair records, mirroring the serial scanners"""
+    tokens = source_func(limit, *args) or []
+    for token in tokens:
+        token.source = source_name
+    return tokens
+
+def fan_out_sources(sources_by_chain: Dict[str, List[Source]], deadline: float = SCAN_DEADLINE,
+                    *args) -> Dict[str, List[Tuple[str, List]]]:
+    """
+    Run all sources of all chains concurrently; extra args (the cycle timestamp) go to every fetcher.
+    Returns {chain: [(source_name, tokens), ...]} for every source that finished
+    before the deadline; failing or late sources are logged and left out.
+    """
+    started = time.time()
+    futures = {}
+    for chain, sources in sources_by_chain.items():
+        for source_name, source_func, limit in sources:
+            future = _executor.submit(_run_source, source_name, source_func, limit, *args)
+            futures[future] = (chain, source_name)
+
+    done, not_done = wait(futures, timeout=deadline)
+
+    results = {chain: [] for chain in sources_by_chain}
+    for future, (chain, source_name) in futures.items():
+        if future in not_done:
+            future.cancel()
+            print(f"[fanout] {chain}/{source_name} missed the {deadline:.0f}s scan deadline")
+            continue
+        try:
+            tokens = future.result()
+            results[chain].append((source_name, tokens))
+            print(f"[{source_name}] Added {len(tokens)} tokens")
+        except Exception as e:
+            print(f"[{source_name}] Failed: {e}")
+
+    print(f"[fanout] {len(done)}/{len(futures)} sources finished in {time.time() - started:.2f}s")
+    return results
+
+def iter_sources(sources_by_chain: Dict[str, List[Source]], deadline: float = SCAN_DEADLINE, *args,
+                 serial: bool = False) -> Iterator[Tuple[str, str, List]]:
+    """
+    Yield (chain, source_name, tokens) as each source finishes, fastest first, so callers can
+    act on early results. Failing sources and sources still running at the deadline are logged
+    and yielded with tokens=None. serial=True runs the sources one after another in the calling
+    thread instead.
+    """
+    started = time.time()
+    if serial:
+        for chain, sources in sources_by_chain.items():
+            for source_name, source_func, limit in sources:
+                try:
+                    tokens = _run_source(source_name, source_func, limit, *args)
+                except Exception as e:
+                    print(f"[{source_name}] Failed: {e}")
+                    yield chain, source_name, None
+                    continue
+                print(f"[{source_name}] Added {len(tokens)} tokens")
+                yield chain, source_name, tokens
+        return
+
+    futures = {}
+    for chain, sources in sources_by_chain.items():
+        for source_name, source_func, limit in sources:
+            future = _executor.submit(_run_source, source_name, source_func, limit, *args)
+            futures[future] = (chain, source_name)
+
+    # The deadline only counts time spent waiting on the sources, not time the consumer spends
+    # on a yielded batch; sources that finish meanwhile are picked up by the next wait
+    remaining = deadline
+    pending = set(futures)
+    finished = 0
+    while pending and remaining > 0:
+        waited = time.time()
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        remaining -= time.time() - waited
+        for future in done:
+            chain, source_name = futures[future]
+            finished += 1
+            try:
+                tokens = future.result()
+            except Exception as e:
+                print(f"[{source_name}] Failed: {e}")
+                yield chain, source_name, None
+                continue
+            print(f"[{source_name}] Added {len(tokens)} tokens after {time.time() - started:.2f}s")
+            yield chain, source_name, tokens
+    for future in pending:
+        chain, source_name = futures[future]
+        future.cancel()
+        print(f"[fanout] {chain}/{source_name} missed the {deadline:.0f}s scan deadline")
+        yield chain, source_name, None
+    print(f"[fanout] {finished}/{len(futures)} sources finished in {time.time() - started:.2f}s")
+
+def fan_out_calls(calls: Dict[str, Tuple[Callable, tuple]], deadline: float = SCAN_DEADLINE) -> Dict:
+    """Run independent calls {key: (func, args)} concurrently; late or failed keys are omitted"""
+    futures = {_executor.submit(func, *args): key for key, (func, args) in calls.items()}
+    done, not_done = wait(futures, timeout=deadline)
+
+    results = {}
+    for future, key in futures.items():
+        if future in not_done:
+            future.cancel()
+            print(f"[fanout] {key} missed the {deadline:.0f}s scan deadline")
+            continue
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            print(f"[fanout] {key} failed: {e}")
+    return results
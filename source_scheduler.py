@@ -0,0 +1,152 @@
+"""
+Adaptive Per-source Poll Scheduler
+Each scanner source gets its own poll interval: it tightens while the source keeps returning
+new pairs and backs off when results repeat, the source fails or its host answers 429.
+All intervals are stretched together whenever the schedule would exceed the request budget.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from rate_limiter import rate_limiter
+
+SCAN_REQUEST_BUDGET = float(os.getenv("SCAN_REQUEST_BUDGET", "40"))  # source requests per minute, all sources
+TIGHTEN_FACTOR = 0.75  # interval multiplier after a run with new pairs
+RELAX_FACTOR = 1.25    # after a run that only repeated known pairs
+FAILURE_FACTOR = 2.0   # after a failed, late or throttled run
+MIN_WAIT = 1.0         # never spin faster than this
+
+class _SourceState:
+    __slots__ = ("name", "interval", "min_interval", "max_interval", "cost", "host", "next_run",
+                 "last_keys", "runs", "failures", "throttled", "pairs", "new_pairs", "last_new",
+                 "host_throttles", "standby")
+
+    def __init__(self, name: str, interval: float, min_interval: float, max_interval: float,
+                 cost: float, host: Optional[str], standby: bool):
+        self.name = name
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cost = cost
+        self.host = host
+        self.next_run = 0.0  # due immediately
+        self.last_keys = frozenset()
+        self.runs = 0
+        self.failures = 0
+        self.throttled = 0
+        self.pairs = 0
+        self.new_pairs = 0
+        self.last_new = 0
+        self.host_throttles = rate_limiter.throttle_count(host) if host else 0
+        self.standby = standby
+
+class SourceScheduler:
+    """Decides which sources are due each cycle and adapts their intervals from the results"""
+
+    def __init__(self, budget_per_min: float = SCAN_REQUEST_BUDGET):
+        self.budget_per_min = budget_per_min
+        self._sources: Dict[str, _SourceState] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, interval: float, min_interval: float, max_interval: float,
+                 cost: float = 1, host: Optional[str] = None, standby: bool = False):
+        """
+        Add a source; cost is the number of upstream requests one run makes. Standby sources
+        (fallbacks) only run when the caller asks for them, so they never set the wake-up time.
+        """
+        with self._lock:
+            if name not in self._sources:
+                self._sources[name] = _SourceState(name, interval, min_interval, max_interval, cost, host, standby)
+
+    def _budget_factor(self) -> float:
+        """How much every interval must stretch to keep the schedule within the request budget"""
+        demand = sum(s.cost * 60.0 / s.interval for s in self._sources.values())
+        return max(1.0, demand / self.budget_per_min) if self.budget_per_min > 0 else 1.0
+
+    def claim_due(self, names: Iterable[str]) -> List[str]:
+        """The given sources that are due now; each is rescheduled as if its run succeeds"""
+        now = time.monotonic()
+        with self._lock:
+            factor = self._budget_factor()
+            due = []
+            for name in names:
+                state = self._sources.get(name)
+                if state is None:
+                    due.append(name)  # unscheduled sources always run
+                elif state.next_run <= now:
+                    state.next_run = now + state.interval * factor
+                    due.append(name)
+            return due
+
+    def record(self, name: str, keys: Optional[Iterable[str]]):
+        """Feed back one run: the pair keys it returned, or None if it failed or missed the deadline"""
+        with self._lock:
+            state = self._sources.get(name)
+            if state is None:
+                return
+            state.runs += 1
+            throttles = rate_limiter.throttle_count(state.host) if state.host else 0
+            blocked_for = rate_limiter.blocked_for(state.host) if state.host else 0.0
+            throttled = throttles > state.host_throttles or blocked_for > 0
+            state.host_throttles = throttles
+
+            if keys is None or throttled:
+                state.failures += keys is None
+                state.throttled += throttled
+                state.last_new = 0
+                state.interval = min(state.max_interval, state.interval * FAILURE_FACTOR)
+                state.interval = max(state.interval, min(state.max_interval, blocked_for))
+            else:
+                keys = frozenset(keys)
+                new = len(keys - state.last_keys)
+                state.last_keys = keys
+                state.pairs += len(keys)
+                state.new_pairs += new
+                state.last_new = new
+                factor = TIGHTEN_FACTOR if new else RELAX_FACTOR
+                state.interval = min(state.max_interval, max(state.min_interval, state.interval * factor))
+            # Re-base the provisional slot set by claim_due on the adapted interval
+            state.next_run = time.monotonic() + state.interval * self._budget_factor()
+
+    def seconds_until_due(self) -> float:
+        """How long the scan loop can sleep before any source is due"""
+        with self._lock:
+            polled = [s.next_run for s in self._sources.values() if not s.standby]
+            if not polled:
+                return MIN_WAIT
+            soonest = min(polled)
+        return max(MIN_WAIT, soonest - time.monotonic())
+
+    def stats(self) -> Dict:
+        """Interval, yield and request share per source, plus the budget in effect"""
+        now = time.monotonic()
+        with self._lock:
+            factor = self._budget_factor()
+            sources = {}
+            for s in self._sources.values():
+                effective = s.interval * factor
+                sources[s.name] = {
+                    'interval': round(s.interval, 1),
+                    'effective_interval': round(effective, 1),
+                    'next_run_in': round(max(0.0, s.next_run - now), 1),
+                    'requests_per_min': round(s.cost * 60.0 / effective, 2),
+                    'runs': s.runs,
+                    'pairs': s.pairs,
+                    'new_pairs': s.new_pairs,
+                    'last_new': s.last_new,
+                    'yield_per_run': round(s.new_pairs / s.runs, 2) if s.runs else 0,
+                    'failures': s.failures,
+                    'throttled': s.throttled,
+                    'standby': s.standby,
+                }
+            return {
+                'budget_per_min': self.budget_per_min,
+                'budget_factor': round(factor, 2),
+                'planned_requests_per_min': round(sum(v['requests_per_min'] for v in sources.values()), 2),
+                'sources': sources,
+            }
+
+# Global scheduler shared by the scanner and the Discord scan loop
+source_scheduler = SourceScheduler()
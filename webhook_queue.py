@@ -0,0 +1,128 @@
+"""
+Webhook Ingestion Queue
+The /helius and /alchemy handlers only validate and enqueue; a bounded pool of worker
+threads does the DexScreener lookups, formatting and Discord posts. Providers get their
+200 within milliseconds, and a full queue answers 503 so they redeliver later.
+Redelivered events are recognised by provider, transaction and log index and skipped.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict
+
+from dedupe_index import DedupeIndex
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "200"))  # payloads waiting before we answer 503
+TIMING_WINDOW = 500  # recent payloads kept for lag / processing-time percentiles
+
+WEBHOOK_DEDUPE_TTL = float(os.getenv("WEBHOOK_DEDUPE_TTL", "86400"))  # providers retry for well under a day
+WEBHOOK_DEDUPE_SIZE = int(os.getenv("WEBHOOK_DEDUPE_SIZE", "50000"))
+WEBHOOK_DEDUPE_FILE = os.getenv("WEBHOOK_DEDUPE_FILE", "")  # optional JSON file so restarts don't replay alerts
+
+# Processed webhook events keyed by provider:tx:log index, so redeliveries never alert twice
+webhook_events = DedupeIndex("webhook_events", WEBHOOK_DEDUPE_TTL, WEBHOOK_DEDUPE_SIZE, WEBHOOK_DEDUPE_FILE)
+
+def first_delivery(provider: str, tx: str, index) -> bool:
+    """Admit one event of a delivery; False for a redelivery. Events without a tx id always pass."""
+    if not tx:
+        return True
+    return webhook_events.admit(f"{provider}:{tx}:{index}")
+
+def _percentiles(samples) -> Dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'p50_ms': round(pick(0.50) * 1000, 1), 'p99_ms': round(pick(0.99) * 1000, 1),
+            'max_ms': round(ordered[-1] * 1000, 1)}
+
+class WebhookQueue:
+    """Bounded payload queue drained by worker threads, one processing function per provider"""
+
+    def __init__(self, workers: int = WEBHOOK_WORKERS, size: int = WEBHOOK_QUEUE_SIZE):
+        self.workers = workers
+        self._queue: "queue.Queue" = queue.Queue(maxsize=size)
+        self._handlers: Dict[str, Callable] = {}
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._lag = deque(maxlen=TIMING_WINDOW)  # seconds from enqueue to processing start
+        self._processing: Dict[str, deque] = {}
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.max_depth = 0
+
+    def register(self, provider: str, handler: Callable):
+        """handler(payload) processes one delivery from provider on a worker thread"""
+        self._handlers[provider] = handler
+        self._processing.setdefault(provider, deque(maxlen=TIMING_WINDOW))
+
+    def _ensure_workers(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"webhook-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, provider: str, payload) -> bool:
+        """Queue a validated payload; False when the queue is full"""
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait((provider, payload, time.monotonic()))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            print(f"[webhook_queue] queue full, rejecting {provider} payload")
+            return False
+        with self._stats_lock:
+            self.accepted += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    def _work(self):
+        while True:
+            provider, payload, queued_at = self._queue.get()
+            started = time.monotonic()
+            ok = True
+            try:
+                self._handlers[provider](payload)
+            except Exception as e:
+                import traceback
+                ok = False
+                print(f"[webhook_queue] {provider} payload failed: {e}")
+                print(traceback.format_exc())
+            finally:
+                finished = time.monotonic()
+                with self._stats_lock:
+                    self._lag.append(started - queued_at)
+                    self._processing[provider].append(finished - started)
+                    self.processed += 1
+                    self.failed += 0 if ok else 1
+                self._queue.task_done()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                'workers': len(self._threads),
+                'depth': self._queue.qsize(),
+                'max_depth': self.max_depth,
+                'capacity': self._queue.maxsize,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'processed': self.processed,
+                'failed': self.failed,
+                'lag': _percentiles(self._lag),
+                'processing': {provider: dict(_percentiles(samples), count=len(samples))
+                               for provider, samples in self._processing.items()},
+            }
+
+# Global queue shared by the webhook routes and the status API
+webhook_queue = WebhookQueue()
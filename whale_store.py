@@ -0,0 +1,579 @@
+"""
+Compact Whale Address Store
+Whale addresses decoded to raw keys (20-byte EVM, 32-byte Solana) in one sorted byte array,
+with a Bloom prefilter so the webhook hot path rejects most non-whales without a search.
+Edits go to an append-only log next to the sorted snapshot and are merged in on compaction,
+so adding a wallet never rewrites a 100k+ address file. Other processes pick up changes by
+replaying the log tail or reloading a new snapshot.
+
+    python whale_store.py                                  # shared-writer check, then membership throughput
+                                                           # and resident memory at 1M addresses
+    python whale_store.py import ethereum wallets.csv      # bulk import into whales_eth.bin
+    python whale_store.py export solana whales_sol.jsonl   # bulk export
+"""
+
+import bisect
+import csv
+import heapq
+import json
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; cross-process log locking is skipped there
+    fcntl = None
+
+RELOAD_CHECK_INTERVAL = 2.0  # seconds between stat() checks for edits by other processes
+COMPACT_AFTER = int(os.getenv("WHALE_COMPACT_AFTER", "10000"))  # log entries before the snapshot is rewritten
+BLOOM_ENABLED = os.getenv("WHALE_BLOOM", "1") != "0"
+BLOOM_ERROR_RATE = 0.01
+BLOOM_HASHES = 3  # fewer probes than the optimal 7 for ~30% more bits (12.4 per key at 1%)
+
+PREFIXES = 1 << 16  # search-narrowing table entries (256 KB)
+SNAPSHOT_MAGIC = b"WHL1"
+SNAPSHOT_HEADER = struct.Struct("<4sBQ")  # magic, key size, key count
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(B58_ALPHABET)}
+
+# --- address codecs ------------------------------------------------------------------
+
+def decode_evm(address: str) -> bytes:
+    address = address.strip()
+    if len(address) != 42 or address[:2].lower() != "0x":
+        raise ValueError(f"not an EVM address: {address!r}")
+    return bytes.fromhex(address[2:])
+
+def encode_evm(key: bytes) -> str:
+    return "0x" + key.hex()
+
+def decode_solana(address: str) -> bytes:
+    address = address.strip()
+    n = 0
+    try:
+        for digit in map(_B58_INDEX.__getitem__, address):
+            n = n * 58 + digit
+    except KeyError:
+        raise ValueError(f"not a base58 address: {address!r}")
+    zeros = len(address) - len(address.lstrip("1"))
+    key = b"\0" * zeros + n.to_bytes((n.bit_length() + 7) // 8, "big")
+    if len(key) != 32:
+        raise ValueError(f"not a 32-byte Solana address: {address!r}")
+    return key
+
+def encode_solana(key: bytes) -> str:
+    n = int.from_bytes(key, "big")
+    chars = []
+    while n:
+        n, r = divmod(n, 58)
+        chars.append(B58_ALPHABET[r])
+    zeros = len(key) - len(key.lstrip(b"\0"))
+    return "1" * zeros + "".join(reversed(chars))
+
+# chain -> (key size, decode, encode)
+CODECS = {
+    "ethereum": (20, decode_evm, encode_evm),
+    "solana": (32, decode_solana, encode_solana),
+}
+
+# --- building blocks -----------------------------------------------------------------
+
+class BloomFilter:
+    """
+    Bit array probed at BLOOM_HASHES positions derived from one hash() of the key: no false
+    negatives, ~BLOOM_ERROR_RATE false positives. In-memory only (hash() is salted per process).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE, hashes: int = BLOOM_HASHES):
+        bits_per_key = -hashes / math.log(1 - error_rate ** (1 / hashes))
+        self.size = max(1024, int(capacity * bits_per_key))
+        self.hashes = hashes
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: bytes) -> Iterator[int]:
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        size = self.size
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % size
+
+    def add(self, key: bytes):
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+class _SortedKeys:
+    """
+    Sequence view of fixed-size keys in a sorted bytes blob. A table of where each 16-bit
+    key prefix starts narrows every search to a few dozen keys (addresses are uniform hashes).
+    """
+
+    __slots__ = ("blob", "size", "_starts")
+
+    def __init__(self, blob: bytes, size: int):
+        self.blob = blob
+        self.size = size
+        count = len(blob) // size
+        self._starts = array("I", (bisect.bisect_left(self, p.to_bytes(2, "big")) for p in range(PREFIXES)))
+        self._starts.append(count)
+
+    def __len__(self) -> int:
+        return len(self.blob) // self.size
+
+    def __getitem__(self, i: int) -> bytes:
+        start = i * self.size
+        return self.blob[start:start + self.size]
+
+    def __contains__(self, key: bytes) -> bool:
+        p = (key[0] << 8) | key[1]
+        hi = self._starts[p + 1]
+        i = bisect.bisect_left(self, key, self._starts[p], hi)
+        return i < hi and self[i] == key
+
+    def __iter__(self) -> Iterator[bytes]:
+        blob, size = self.blob, self.size
+        return (blob[i:i + size] for i in range(0, len(blob), size))
+
+# --- the store -------------------------------------------------------------------------
+
+class WhaleStore:
+    """
+    One chain's whale addresses: a sorted snapshot (prefix.bin) plus an append log
+    (prefix.log) of '+address' / '-address' lines. In memory the snapshot stays one bytes
+    blob; logged edits live in small added / removed sets until the next compaction.
+    """
+
+    def __init__(self, prefix: str, chain: str, legacy_json: Optional[str] = None,
+                 compact_after: int = COMPACT_AFTER):
+        self.chain = chain
+        self.compact_after = compact_after
+        self.key_size, self._decode, self._encode = CODECS[chain]
+        self.snapshot_path = f"{prefix}.bin"
+        self.log_path = f"{prefix}.log"
+        self._base = _SortedKeys(b"", self.key_size)
+        self._added = set()    # keys not in the snapshot
+        self._removed = set()  # snapshot keys deleted since
+        self._bloom: Optional[BloomFilter] = None
+        self._lock = threading.RLock()
+        self._snapshot_stamp = None
+        self._log_offset = 0   # bytes of the log already applied
+        self._log_entries = 0
+        self._checked_at = 0.0
+        self.version = 0       # bumped on every change, local or reloaded
+        self.reloads = 0
+        self.compactions = 0
+        self._load()
+        if legacy_json and not self._snapshot_stamp and not self._log_offset and os.path.exists(legacy_json):
+            imported = self.import_file(legacy_json)
+            print(f"[whale_store] {chain}: migrated {imported} addresses from {legacy_json}")
+
+    # --- loading / reloading ----------------------------------------------------------
+
+    @staticmethod
+    def _stamp(path: str):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _load(self):
+        """Read the snapshot and replay the whole log"""
+        with self._lock:
+            self._snapshot_stamp = self._stamp(self.snapshot_path)
+            blob = b""
+            if self._snapshot_stamp:
+                try:
+                    with open(self.snapshot_path, "rb") as f:
+                        data = f.read()
+                    magic, key_size, count = SNAPSHOT_HEADER.unpack_from(data)
+                    blob = data[SNAPSHOT_HEADER.size:]
+                    if magic != SNAPSHOT_MAGIC or key_size != self.key_size or len(blob) != count * key_size:
+                        raise ValueError("bad header")
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"[whale_store] {self.chain}: ignoring unreadable {self.snapshot_path}: {e}")
+                    blob = b""
+            self._base = _SortedKeys(blob, self.key_size)
+            self._added, self._removed = set(), set()
+            self._log_offset = self._log_entries = 0
+            self._rebuild_bloom()
+            self._replay_log()
+            self.version += 1
+            self.reloads += 1
+
+    def _replay_log(self):
+        """Apply log lines written since _log_offset (by this or another process)"""
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1  # a line still being appended is read next time
+        for line in data[:end].decode("utf-8", "replace").splitlines():
+            op, address = line[:1], line[1:]
+            try:
+                key = self._decode(address)
+            except ValueError:
+                continue
+            if op == "+":
+                self._add_key(key)
+            elif op == "-":
+                self._remove_key(key)
+            self._log_entries += 1
+        self._log_offset += end
+
+    def _catch_up(self):
+        """
+        Under the log lock, before any write: adopt a snapshot another process compacted, or
+        replay its log tail. Appending or compacting from a stale view would drop their edits.
+        """
+        log_stamp = self._stamp(self.log_path)
+        log_size = log_stamp[1] if log_stamp else 0
+        if self._stamp(self.snapshot_path) != self._snapshot_stamp or log_size < self._log_offset:
+            self._load()
+        else:
+            self._replay_log()
+
+    def _refresh(self):
+        """Pick up other processes' edits (at most one pair of stat() calls per interval)"""
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if self._stamp(self.snapshot_path) != self._snapshot_stamp:
+            self._load()
+            return
+        log_stamp = self._stamp(self.log_path)
+        log_size = log_stamp[1] if log_stamp else 0
+        if log_size < self._log_offset:
+            self._load()  # log truncated by a compaction elsewhere
+        elif log_size > self._log_offset:
+            with self._lock:
+                self._replay_log()
+                self.version += 1
+
+    def _rebuild_bloom(self):
+        if not BLOOM_ENABLED:
+            self._bloom = None
+            return
+        bloom = BloomFilter(int((len(self._base) + len(self._added)) * 1.25) + self.compact_after)
+        for key in self._base:
+            bloom.add(key)
+        for key in self._added:
+            bloom.add(key)
+        self._bloom = bloom
+
+    # --- membership -----------------------------------------------------------------
+
+    def contains_key(self, key: bytes) -> bool:
+        bloom = self._bloom
+        if bloom is not None and key not in bloom:
+            return False
+        if key in self._added:
+            return True
+        return key not in self._removed and key in self._base
+
+    def __contains__(self, address) -> bool:
+        if not address:
+            return False
+        try:
+            key = self._decode(address)
+        except ValueError:
+            return False
+        self._refresh()
+        return self.contains_key(key)
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._base) - len(self._removed) + len(self._added)
+
+    def keys(self) -> Iterator[bytes]:
+        """All keys in sorted order"""
+        self._refresh()
+        with self._lock:
+            removed, added = set(self._removed), sorted(self._added)
+            base = self._base
+        return heapq.merge((key for key in base if key not in removed), added)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._encode(key) for key in self.keys())
+
+    def first(self, n: int) -> List[str]:
+        return list(islice(iter(self), n))
+
+    # --- edits ----------------------------------------------------------------------
+
+    def _add_key(self, key: bytes) -> bool:
+        if key in self._removed:
+            self._removed.discard(key)
+        elif key in self._added or key in self._base:
+            return False
+        else:
+            self._added.add(key)
+            if self._bloom is not None:
+                self._bloom.add(key)
+        return True
+
+    def _remove_key(self, key: bytes) -> bool:
+        if key in self._added:
+            self._added.discard(key)
+        elif key in self._base and key not in self._removed:
+            self._removed.add(key)
+        else:
+            return False
+        return True
+
+    def _locked_log(self):
+        """Open the log for appending, holding the cross-process lock"""
+        f = open(self.log_path, "ab")
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def _change(self, address: str, add: bool) -> bool:
+        try:
+            key = self._decode(address)
+        except ValueError:
+            return False
+        with self._lock:
+            try:
+                with self._locked_log() as log:
+                    self._catch_up()  # never decide on a stale view
+                    changed = self._add_key(key) if add else self._remove_key(key)
+                    if not changed:
+                        return False
+                    line = f"{'+' if add else '-'}{self._encode(key)}\n".encode()
+                    log.write(line)
+                    log.flush()
+                    self._log_offset += len(line)
+                    self._log_entries += 1
+                    self.version += 1
+                    if self._log_entries >= self.compact_after:
+                        self._compact(log)
+            except OSError as e:
+                print(f"[whale_store] {self.chain}: could not write {self.log_path}: {e}")
+                return False
+        return True
+
+    def add(self, address: str) -> bool:
+        """Track address; False if already tracked or not a valid address for the chain"""
+        return self._change(address, True)
+
+    def remove(self, address: str) -> bool:
+        return self._change(address, False)
+
+    # --- compaction / bulk import / export ------------------------------------------------
+
+    def _write_snapshot(self, keys: Iterable[bytes]):
+        """Atomically replace the snapshot with keys (sorted, unique)"""
+        blob = b"".join(keys)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.key_size, len(blob) // self.key_size))
+            f.write(blob)
+        os.replace(tmp_path, self.snapshot_path)
+        self._base = _SortedKeys(blob, self.key_size)
+        self._added, self._removed = set(), set()
+        self._snapshot_stamp = self._stamp(self.snapshot_path)
+
+    def _compact(self, log, extra: Iterable[bytes] = ()):
+        """Merge logged edits (and extra sorted keys) into a new snapshot; log is held locked"""
+        extra = list(extra)
+        removed = self._removed
+        merged = heapq.merge((key for key in self._base if key not in removed), sorted(self._added), extra)
+        self._write_snapshot(_unique(merged))
+        log.truncate(0)
+        self._log_offset = self._log_entries = 0
+        self._rebuild_bloom()
+        self.compactions += 1
+        self.version += 1
+
+    def compact(self):
+        with self._lock, self._locked_log() as log:
+            self._catch_up()
+            self._compact(log)
+
+    def import_file(self, path: str) -> int:
+        """
+        Bulk-add addresses from CSV (first column; a header row is skipped), JSONL (strings or
+        {"address": ...} objects) or a JSON array. Written as one new snapshot. Returns new addresses.
+        """
+        keys = []
+        for address in _read_addresses(path):
+            try:
+                keys.append(self._decode(address))
+            except ValueError:
+                continue
+        keys.sort()
+        with self._lock, self._locked_log() as log:
+            self._catch_up()
+            before = len(self._base) - len(self._removed) + len(self._added)
+            self._compact(log, _unique(iter(keys)))
+            return len(self._base) - before
+
+    def export_file(self, path: str) -> int:
+        """Write every address as CSV (with an 'address' header) or JSONL, by extension"""
+        count = 0
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", newline="") as f:
+            if path.endswith(".csv"):
+                writer = csv.writer(f)
+                writer.writerow(["address"])
+                for address in self:
+                    writer.writerow([address])
+                    count += 1
+            else:
+                for address in self:
+                    f.write(json.dumps({"address": address}) + "\n")
+                    count += 1
+        os.replace(tmp_path, path)
+        return count
+
+    def stats(self) -> Dict:
+        bloom = self._bloom
+        return {
+            'count': len(self._base) - len(self._removed) + len(self._added),
+            'snapshot_keys': len(self._base),
+            'log_entries': self._log_entries,
+            'bytes': len(self._base.blob) + len(self._base._starts) * 4 + (len(bloom.bits) if bloom else 0),
+            'bloom': bloom is not None,
+            'version': self.version,
+            'reloads': self.reloads,
+            'compactions': self.compactions,
+        }
+
+def _unique(keys: Iterator[bytes]):
+    """Drop adjacent duplicates from a sorted key stream"""
+    previous = None
+    for key in keys:
+        if key != previous:
+            yield key
+            previous = key
+
+def _read_addresses(path: str) -> Iterator[str]:
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if row and row[0].strip() and row[0].strip().lower() != "address":
+                    yield row[0].strip()
+    elif path.endswith(".jsonl"):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                address = item.get("address") if isinstance(item, dict) else item
+                if isinstance(address, str):
+                    yield address
+    else:
+        with open(path) as f:
+            for address in json.load(f):
+                if isinstance(address, str):
+                    yield address
+
+# --- checks / benchmark -----------------------------------------------------------------
+
+def check_shared_writers() -> List[str]:
+    """
+    Two stores on one prefix (as in two gunicorn workers) take turns adding, each compacting
+    every 3 entries; a fresh load must see every address. Returns the missing ones.
+    """
+    import tempfile
+    addresses = [encode_evm(i.to_bytes(20, "big")) for i in range(1, 21)]
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, "shared")
+        a = WhaleStore(prefix, "ethereum", compact_after=3)
+        b = WhaleStore(prefix, "ethereum", compact_after=3)
+        for i, address in enumerate(addresses):
+            writer = a if (i // 4) % 2 == 0 else b  # runs of 4, so each side compacts while the other is stale
+            writer.add(address)
+        a.remove(addresses[0])
+        b.remove(addresses[1])  # b has not seen a's removal yet
+        expected = set(addresses[2:])
+        fresh = set(WhaleStore(prefix, "ethereum"))
+        return sorted(expected ^ fresh)
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _benchmark(n: int = 1_000_000, lookups: int = 200_000):
+    import random
+    import tempfile
+    rng = random.Random(7)
+    for chain in ("ethereum", "solana"):
+        size, _, encode = CODECS[chain]
+        addresses = [encode(rng.randbytes(size)) for _ in range(n)]
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "whales.csv")
+            with open(csv_path, "w") as f:
+                f.write("address\n" + "\n".join(addresses) + "\n")
+
+            rss = _rss_mb()
+            started = time.perf_counter()
+            store = WhaleStore(os.path.join(tmp, chain), chain)
+            store.import_file(csv_path)
+            import_seconds = time.perf_counter() - started
+            store_mb = _rss_mb() - rss
+
+            hits = rng.sample(addresses, lookups // 2)
+            misses = [encode(rng.randbytes(size)) for _ in range(lookups // 2)]
+            probes = hits + misses
+            rng.shuffle(probes)
+            started = time.perf_counter()
+            found = sum(address in store for address in probes)
+            per_second = lookups / (time.perf_counter() - started)
+            keys = [store._decode(a) for a in probes]
+            started = time.perf_counter()
+            sum(store.contains_key(key) for key in keys)
+            keys_per_second = lookups / (time.perf_counter() - started)
+            started = time.perf_counter()
+            for i in range(1000):
+                store.add(encode(rng.randbytes(size)))
+            append_ms = (time.perf_counter() - started) * 1000 / 1000
+            assert found == lookups // 2, found
+
+            # What the JSON lists cost: fresh str objects in a set
+            text = json.dumps(addresses)
+            rss = _rss_mb()
+            as_set = set(json.loads(text))
+            set_mb = _rss_mb() - rss
+            del as_set, text
+
+        print(f"{chain:9s} {n:,} addresses: import {import_seconds:.1f}s, store ~{store_mb:.0f} MB "
+              f"(keys {store.stats()['bytes'] / 2 ** 20:.0f} MB incl. Bloom) vs JSON set[str] ~{set_mb:.0f} MB; "
+              f"{per_second:,.0f} address checks/s, {keys_per_second:,.0f} key checks/s, "
+              f"{append_ms:.3f} ms per logged add")
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) == 4 and sys.argv[1] in ("import", "export"):
+        from whale_tracker import export_whales, import_whales
+        action, chain, path = sys.argv[1:]
+        count = (import_whales if action == "import" else export_whales)(chain, path)
+        print(f"[whale_store] {action}ed {count} {chain} addresses ({path})")
+    else:
+        missing = check_shared_writers()
+        print(f"shared writers: {'OK' if not missing else f'{len(missing)} wrong, first {missing[:5]}'}")
+        _benchmark()
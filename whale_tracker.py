@@ -3,90 +3,57 @@ Whale Tracking System for Multi-Chain Alerts
 Monitors large wallet movements on Solana and Ethereum
 """
 
-import json
-import os
-from typing import Set, Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 
-# File paths for whale addresses
+from whale_store import WhaleStore
+
+# Legacy JSON lists, imported once into the compact stores
 WHALES_ETH_FILE = "whales_eth.json"
 WHALES_SOL_FILE = "whales_sol.json"
 
+# Process-wide whale stores: every entry point (commands, webhooks, tracker) shares these.
+# Each is a sorted key snapshot (whales_<chain>.bin) plus an append log (whales_<chain>.log).
+eth_whales = WhaleStore("whales_eth", "ethereum", legacy_json=WHALES_ETH_FILE)
+sol_whales = WhaleStore("whales_sol", "solana", legacy_json=WHALES_SOL_FILE)
+WHALE_STORES = {"ethereum": eth_whales, "solana": sol_whales}
+
 class WhaleTracker:
     def __init__(self):
-        self.eth_whales = self._load_addresses(WHALES_ETH_FILE)
-        self.sol_whales = self._load_addresses(WHALES_SOL_FILE)
-    
-    def _load_addresses(self, filename: str) -> Set[str]:
-        """Load whale addresses from JSON file"""
-        try:
-            if os.path.exists(filename):
-                with open(filename, 'r') as f:
-                    return set(json.load(f))
-            return set()
-        except Exception as e:
-            print(f"[whale_tracker] Error loading {filename}: {e}")
-            return set()
-    
-    def _save_addresses(self, addresses: Set[str], filename: str):
-        """Save whale addresses to JSON file"""
-        try:
-            with open(filename, 'w') as f:
-                json.dump(list(addresses), f)
-        except Exception as e:
-            print(f"[whale_tracker] Error saving {filename}: {e}")
+        self.eth_whales = eth_whales
+        self.sol_whales = sol_whales
     
     def add_eth_whale(self, address: str) -> bool:
         """Add Ethereum whale address to tracking"""
-        address = address.lower().strip()
-        if address not in self.eth_whales:
-            self.eth_whales.add(address)
-            self._save_addresses(self.eth_whales, WHALES_ETH_FILE)
-            return True
-        return False
+        return self.eth_whales.add(address)
     
     def add_sol_whale(self, address: str) -> bool:
         """Add Solana whale address to tracking"""
-        address = address.strip()
-        if address not in self.sol_whales:
-            self.sol_whales.add(address)
-            self._save_addresses(self.sol_whales, WHALES_SOL_FILE)
-            return True
-        return False
+        return self.sol_whales.add(address)
     
     def remove_eth_whale(self, address: str) -> bool:
         """Remove Ethereum whale address from tracking"""
-        address = address.lower().strip()
-        if address in self.eth_whales:
-            self.eth_whales.remove(address)
-            self._save_addresses(self.eth_whales, WHALES_ETH_FILE)
-            return True
-        return False
+        return self.eth_whales.remove(address)
     
     def remove_sol_whale(self, address: str) -> bool:
         """Remove Solana whale address from tracking"""
-        address = address.strip()
-        if address in self.sol_whales:
-            self.sol_whales.remove(address)
-            self._save_addresses(self.sol_whales, WHALES_SOL_FILE)
-            return True
-        return False
+        return self.sol_whales.remove(address)
     
     def is_eth_whale(self, address: str) -> bool:
         """Check if address is tracked Ethereum whale"""
-        return address.lower().strip() in self.eth_whales
+        return address in self.eth_whales
     
     def is_sol_whale(self, address: str) -> bool:
         """Check if address is tracked Solana whale"""
-        return address.strip() in self.sol_whales
+        return address in self.sol_whales
     
-    def get_eth_whales(self) -> List[str]:
-        """Get list of tracked Ethereum whale addresses"""
-        return list(self.eth_whales)
+    def get_eth_whales(self, limit: Optional[int] = None) -> List[str]:
+        """Get tracked Ethereum whale addresses (the first limit, in key order)"""
+        return self.eth_whales.first(limit) if limit is not None else list(self.eth_whales)
     
-    def get_sol_whales(self) -> List[str]:
-        """Get list of tracked Solana whale addresses"""
-        return list(self.sol_whales)
+    def get_sol_whales(self, limit: Optional[int] = None) -> List[str]:
+        """Get tracked Solana whale addresses (the first limit, in key order)"""
+        return self.sol_whales.first(limit) if limit is not None else list(self.sol_whales)
     
     def format_whale_alert(self, chain: str, direction: str, address: str, 
                           asset: str, amount: str, tx_hash: str = None) -> str:
@@ -129,6 +96,17 @@ def remove_whale_address(chain: str, address: str) -> bool:
         return whale_tracker.remove_sol_whale(address)
     return False
 
+def import_whales(chain: str, path: str) -> int:
+    """Bulk-import a CSV / JSONL address list; returns how many addresses were new"""
+    return WHALE_STORES[chain.lower()].import_file(path)
+
+def export_whales(chain: str, path: str) -> int:
+    """Write a chain's whale addresses to CSV / JSONL; returns how many were written"""
+    return WHALE_STORES[chain.lower()].export_file(path)
+
+def get_stats() -> Dict:
+    return {'ethereum': eth_whales.stats(), 'solana': sol_whales.stats()}
+
 def is_tracked_whale(chain: str, address: str) -> bool:
     """Check if address is a tracked whale"""
     if chain.lower() == "ethereum":